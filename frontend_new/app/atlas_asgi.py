@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+ATLAS Frontend Server - ASGI serving mode
+
+Serves the same routes as atlas_server.py, but the endpoints that wait on
+upstreams (chat, Tetyana, translate, synthesize) run as coroutines with
+aiohttp clients, so a long-running chat costs a coroutine instead of an OS
+thread. When the browser disconnects, or /api/voice/interrupt cancels the
+request's session, the handler task is cancelled and the upstream request
+is closed with it. Synthesis streams the backend's audio through the same
+admission, hedging and cache path as the Flask endpoint.
+
+All other routes fall through to the Flask app, which runs on a thread pool
+(ASGI_WORKER_THREADS, default 32): the app call and each body chunk are
+handed to a pool thread, so a long-lived response such as /logs/stream holds
+a thread only while it waits for its next chunk and never stalls the other
+routes.
+
+Shared state (audio cache, admission slots, circuit breakers, health
+prober) lives in atlas_server and is used by both modes.
+
+Run:
+    uvicorn atlas_asgi:app --host 0.0.0.0 --port 5001
+    python atlas_asgi.py          # same, if uvicorn is installed
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Optional
+from urllib.parse import parse_qs
+
+import aiohttp
+
+import atlas_server as core
+import tracing
+from cancellation import Cancelled
+from singleflight import Abandoned
+from tts_admission import AdmissionRejected
+from circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger('atlas.asgi')
+
+# Threads for the Flask fallthrough and for the blocking parts of the TTS relay
+_worker_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('ASGI_WORKER_THREADS', 32)),
+                                  thread_name_prefix='asgi-worker')
+_client_session: Optional[aiohttp.ClientSession] = None
+
+
+def _client() -> aiohttp.ClientSession:
+    """Shared keep-alive aiohttp session (created on the running loop)"""
+    global _client_session
+    if _client_session is None or _client_session.closed:
+        _client_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=int(os.environ.get('ASGI_UPSTREAM_CONNECTIONS', 100))),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5)
+        )
+    return _client_session
+
+
+class _Request:
+    def __init__(self, scope, body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+        self.cancel = None  # CancelToken when the route belongs to a session (see _SESSION_ROUTES)
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+# --- response helpers ---
+
+async def _start(send, status: int, content_type: str, headers: Optional[dict] = None):
+    raw = [(b'content-type', content_type.encode())]
+    for k, v in (headers or {}).items():
+        raw.append((k.lower().encode(), str(v).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw})
+
+
+async def _send_body(send, body: bytes, more: bool = False):
+    await send({'type': 'http.response.body', 'body': body, 'more_body': more})
+
+
+async def _send_json(send, payload, status: int = 200, headers: Optional[dict] = None):
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    await _start(send, status, 'application/json', {**(headers or {}), 'content-length': len(body)})
+    await _send_body(send, body)
+
+
+async def _send_audio(send, data: bytes, cache_status: str, extra: Optional[dict] = None):
+    mimetype, _ext = core.audio_formats.content_type(data)
+    await _start(send, 200, mimetype, {
+        'content-length': len(data),
+        'x-tts-cache': cache_status,
+        'cache-control': 'no-store',
+        'vary': 'Accept',
+        **(extra or {})
+    })
+    await _send_body(send, data)
+
+
+# --- handlers ---
+
+async def chat(req: _Request, send):
+    """Relay the orchestrator stream; mirrors atlas_server.chat()"""
+    data = req.json()
+    message = data.get('message', '')
+    if not str(message).strip():
+        return await _send_json(send, {'error': 'Message cannot be empty'}, 400)
+    try:
+        core.orchestrator_breaker.check()
+    except CircuitOpenError as e:
+        logger.warning(f"Orchestrator request rejected: {e}")
+        return await _send_json(send, {'error': 'Service unavailable'}, 503,
+                                {'retry-after': max(1, int(e.retry_in))})
+    payload = {
+        'message': message,
+        'sessionId': data.get('sessionId', 'default'),
+        'userId': data.get('userId', 'user')
+    }
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=core.ORCHESTRATOR_READ_TIMEOUT)
+    try:
+        with tracing.span('orchestrator.stream', url=f'{core.ORCHESTRATOR_URL}/chat/stream') as sp:
+            await _relay_chat(send, data, payload, timeout, sp)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        core.orchestrator_breaker.record_failure()
+        logger.error(f"Orchestrator connection failed: {e}")
+        await _send_json(send, {'error': 'Service unavailable'}, 503)
+
+
+async def _relay_chat(send, data: dict, payload: dict, timeout, sp):
+    """Stream (or buffer) one orchestrator reply; `sp` is the enclosing span"""
+    started = monotonic()
+    async with _client().post(f'{core.ORCHESTRATOR_URL}/chat/stream', json=payload, timeout=timeout,
+                              headers={'Accept': 'text/event-stream, application/x-ndjson, application/json',
+                                       **tracing.trace_headers()}
+                              ) as resp:
+        if resp.status >= 500:
+            core.orchestrator_breaker.record_failure()
+        else:
+            core.orchestrator_breaker.record_success()
+        if resp.status != 200:
+            return await _send_json(send, {'error': 'Orchestrator error'}, resp.status)
+        if data.get('stream') is False:
+            events = []
+            async for line in resp.content:
+                line = line.decode('utf-8', errors='replace').strip()
+                if line.startswith('data:'):
+                    line = line[5:].strip()
+                elif not line or line.startswith((':', 'event:', 'id:', 'retry:')):
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    events.append({'type': 'raw', 'data': line})
+            body = events[0] if len(events) == 1 and isinstance(events[0], dict) else \
+                {'success': True, 'events': events}
+            return await _send_json(send, body)
+        content_type = resp.headers.get('Content-Type', '')
+        await _start(send, 200, 'text/event-stream' if 'text/event-stream' in content_type
+                     else 'application/x-ndjson', {'cache-control': 'no-cache', 'x-accel-buffering': 'no'})
+        try:
+            # `send` awaits the client, so a slow reader throttles the upstream read
+            events = 0
+            async for line in resp.content:
+                if not events:
+                    sp.set(first_event_ms=round((monotonic() - started) * 1000, 1))
+                events += 1
+                await _send_body(send, line, more=True)
+            sp.set(events=events)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            core.orchestrator_breaker.record_failure()
+            sp.status = 'error'
+            logger.warning(f"Orchestrator stream broken: {e}")
+            await _send_body(send, json.dumps({'type': 'workflow_error',
+                                               'data': {'error': 'Orchestrator stream broken'}}).encode() + b'\n',
+                             more=True)
+        await _send_body(send, b'')
+
+
+async def chat_with_tetyana(req: _Request, send):
+    data = req.json()
+    message = data.get('message', '')
+    session_id = data.get('sessionId', 'atlas_session')
+    if not str(message).strip():
+        return await _send_json(send, {'error': 'Message cannot be empty'}, 400)
+    try:
+        result = await core.goose_client.send_reply_async(session_id, message)
+    except Exception as e:
+        logger.error(f"Tetyana chat error: {e}")
+        result = {'success': False, 'error': 'Internal error'}
+    body, status = core._tetyana_reply_body(result, session_id)
+    await _send_json(send, body, status)
+
+
+async def stream_tetyana(req: _Request, send):
+    data = req.json()
+    message = data.get('message', '')
+    session_id = data.get('sessionId', 'atlas_session')
+    if not str(message).strip():
+        return await _send_json(send, {'error': 'Message cannot be empty'}, 400)
+    await _start(send, 200, 'application/x-ndjson', {'cache-control': 'no-cache', 'x-accel-buffering': 'no'})
+    try:
+        async for event in core.goose_client.stream_reply(session_id, message):
+            await _send_body(send, core._tetyana_event_line(event), more=True)
+    except asyncio.CancelledError:
+        if req.cancel is not None and req.cancel.cancelled:
+            await _send_body(send, core._tetyana_event_line({'type': 'cancelled', 'reason': req.cancel.reason}),
+                             more=True)
+        raise
+    except Exception as e:
+        logger.error(f"Tetyana stream error: {e}")
+        await _send_body(send, core._tetyana_event_line({'type': 'error', 'error': 'Tetyana is unavailable'}),
+                         more=True)
+    await _send_body(send, b'')
+
+
+async def translate(req: _Request, send):
+    data = req.json()
+    text = data.get('text', '')
+    source = (data.get('source') or '').lower() or 'auto'
+    target = (data.get('target') or '').lower() or 'uk'
+    if 'texts' in data:
+        texts, error = core._translation_texts(data)
+        if error:
+            return await _send_json(send, {'success': False, 'error': error}, 400)
+        results, pending = core._translation_batch(texts, source, target)
+        replies = await core.goose_client.send_many_async([core._translation_prompt(texts[i]) for i in pending],
+                                                          lane_prefix='atlas_translate')
+        for i, reply in zip(pending, replies):
+            results[i] = core._translation_result(texts[i], source, reply)
+        return await _send_json(send, {'success': True, 'results': results, 'texts': [r['text'] for r in results]})
+    if not str(text).strip():
+        return await _send_json(send, {'success': False, 'error': 'Text is required'}, 400)
+    if core._translation_not_needed(text, source, target):
+        return await _send_json(send, {'success': True, 'text': text, 'detected': 'uk'})
+    try:
+        result = await core.goose_client.send_reply_async('atlas_translate', core._translation_prompt(text))
+        if result.get('success'):
+            return await _send_json(send, {'success': True, 'text': result.get('response', text),
+                                           'detected': source or 'auto'})
+    except Exception as e:
+        logger.warning(f"Translate via Goose failed: {e}")
+    await _send_json(send, {'success': True, 'text': text, 'detected': source or 'auto', 'note': 'noop'})
+
+
+async def _acquire_tts_slot(voice: str, cancel=None) -> str:
+    """Admission without blocking the loop: fast path first, else wait on a worker thread"""
+    candidates = lambda: core._tts_candidates(voice)
+    base = core.tts_admission.try_acquire(candidates, core._pick_tts_base)
+    if base:
+        return base
+    loop = asyncio.get_running_loop()
+    fut = loop.run_in_executor(None, tracing.bound(core.tts_admission.acquire), candidates, core._pick_tts_base,
+                               None, cancel)
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        # The waiter thread may still get a slot after we are gone; give it back
+        fut.add_done_callback(
+            lambda f: core.tts_admission.release(f.result()) if not f.cancelled() and f.exception() is None else None)
+        raise
+
+
+async def _open_tts_stream(tts_payload: dict, cancel) -> Optional[tuple]:
+    """atlas_server._open_tts_stream with the slot wait and the hedged POST kept off the loop"""
+    base = await _acquire_tts_slot(tts_payload['voice'], cancel)
+    fut = _worker_pool.submit(tracing.bound(core._post_tts_stream), tts_payload, base, cancel)
+    try:
+        # shield: the POST must run to completion so its slot is always released
+        return await asyncio.shield(asyncio.wrap_future(fut))
+    except asyncio.CancelledError:
+        cancel.cancel('disconnected')
+        fut.add_done_callback(_close_abandoned_upstream)
+        raise
+
+
+def _close_abandoned_upstream(fut):
+    """Done-callback: free a streaming response nobody is going to read"""
+    if fut.cancelled() or fut.exception() is not None or not fut.result():
+        return
+    tts_response, base, started = fut.result()
+    tts_response.close()
+    core.tts_admission.release(base, monotonic() - started)
+
+
+def _drain(chunks):
+    for _ in chunks:
+        pass
+
+
+async def _relay_audio(send, upstream, cache_key: str, params: dict, cancel):
+    """Send the backend's audio as it arrives. atlas_server._relay_tts_audio does the
+    caching, slot release and settling; each chunk is read on a worker thread."""
+    chunks = core._relay_tts_audio(upstream, cache_key, params['agent'], len(params['text']), cancel)
+    mimetype, headers = core._audio_stream_headers(upstream[0], params['agent'])
+    pending, finished = None, False
+    try:
+        await _start(send, 200, mimetype, headers)
+        while True:
+            pending = _worker_pool.submit(next, chunks, None)
+            chunk = await asyncio.shield(asyncio.wrap_future(pending))
+            pending = None
+            if chunk is None:
+                break
+            await _send_body(send, chunk, more=True)
+        finished = True
+        await _send_body(send, b'')
+    finally:
+        if not finished:
+            # Abort the upstream read, then let the relay run its cleanup on a worker thread
+            # (after the chunk read still in progress, if any)
+            cancel.cancel('disconnected')
+            if pending is None:
+                _worker_pool.submit(_drain, chunks)
+            else:
+                pending.add_done_callback(lambda _: _worker_pool.submit(_drain, chunks))
+
+
+async def synthesize_voice(req: _Request, send):
+    try:
+        params = core._parse_synthesis_request(req.json(), req.headers.get('accept'))
+    except ValueError as e:
+        return await _send_json(send, {'error': str(e)}, 400)
+    cache_key = core._synthesis_cache_key(params)
+    cached, tier = core.audio_cache.get(cache_key)
+    if cached:
+        return await _send_audio(send, cached, f'hit-{tier}')
+
+    audio, status = None, 'miss'
+    while True:
+        future, leader = core.tts_inflight.claim(cache_key)
+        if leader:
+            try:
+                upstream = await _open_tts_stream(core._build_tts_payload(params), req.cancel)
+            except AdmissionRejected as e:
+                core.tts_inflight.settle(cache_key, error=e)
+                return await _send_busy(send, e)
+            except (asyncio.CancelledError, Cancelled):
+                # Only our request was interrupted; waiters of other sessions take over
+                core.tts_inflight.abandon(cache_key)
+                raise
+            except Exception as e:
+                logger.warning(f"TTS server request failed: {e}")
+                upstream = None
+            if upstream:
+                return await _relay_audio(send, upstream, cache_key, params, req.cancel)
+            core.tts_inflight.settle(cache_key, result=None)
+            break
+        wait_limit = core.tts_admission.queue_timeout + core._dynamic_timeout_for_text(params['text']) + 5
+        try:
+            # shield: our cancellation must not cancel the leader's shared future
+            audio = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), wait_limit)
+            status = 'coalesced'
+        except Abandoned:
+            continue  # the leader was interrupted: take over, or follow whoever did
+        except AdmissionRejected as e:
+            return await _send_busy(send, e)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Coalesced TTS request failed: {e}")
+        break
+    if audio:
+        return await _send_audio(send, audio, status)
+    # Safe fallback: a short silent WAV keeps the UI smooth
+    await _send_audio(send, core._make_silence_wav(300).getvalue(), status, {'x-tts-fallback': 'silent'})
+
+
+async def _send_busy(send, e: AdmissionRejected):
+    logger.warning(f"TTS admission rejected ({e.reason}), retry after {e.retry_after}s")
+    await _send_json(send, {'error': 'TTS is busy', 'reason': e.reason},
+                     429 if e.reason == 'queue_full' else 503,
+                     {'retry-after': e.retry_after, 'cache-control': 'no-store'})
+
+
+ROUTES = {
+    ('POST', '/api/chat'): chat,
+    ('POST', '/api/agents/tetyana'): chat_with_tetyana,
+    ('POST', '/api/agents/tetyana/stream'): stream_tetyana,
+    ('POST', '/api/translate'): translate,
+    ('POST', '/api/voice/synthesize'): synthesize_voice,
+}
+
+
+# --- ASGI plumbing ---
+
+async def _read_body(receive) -> Optional[bytes]:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+# path -> in-flight kind for routes an interrupt of their sessionId can cancel
+_SESSION_ROUTES = {
+    '/api/chat': 'chat',
+    '/api/agents/tetyana': 'goose',
+    '/api/agents/tetyana/stream': 'goose',
+    '/api/voice/synthesize': 'tts',
+}
+
+
+async def _send_cancelled(send, cancel):
+    """Answer 499 if nothing was sent yet, otherwise just end the body"""
+    try:
+        await _send_json(send, {'error': 'Interrupted', 'cancelled': True, 'reason': cancel.reason}, 499)
+    except Exception:
+        try:
+            await _send_body(send, b'')
+        except Exception:
+            pass
+
+
+async def _run_cancellable(handler, req: _Request, send, receive):
+    """Run a handler, cancelling it (and its upstream calls) if the client goes away
+    or the request's session is interrupted"""
+    task = asyncio.ensure_future(handler(req, send))
+    watcher = asyncio.ensure_future(_wait_disconnect(receive))
+    kind = _SESSION_ROUTES.get(req.path)
+    if kind is not None:
+        loop = asyncio.get_running_loop()
+        # Without a sessionId the token is not registered and only a disconnect cancels the task
+        req.cancel = core.inflight_ops.register(core._client_session_id(req.json()), kind)
+        req.cancel.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        done, _ = await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if task not in done:
+            logger.info(f"Client disconnected, cancelling {req.method} {req.path}")
+            task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Cancelled):
+            if req.cancel is not None and req.cancel.cancelled and not watcher.done():
+                logger.info(f"Session interrupted, cancelled {req.method} {req.path}")
+                await _send_cancelled(send, req.cancel)
+        except Exception as e:
+            logger.error(f"{req.method} {req.path} failed: {e}")
+            try:
+                await _send_json(send, {'error': 'Internal error'}, 500)
+            except Exception:
+                pass  # response already started
+    finally:
+        watcher.cancel()
+        if req.cancel is not None:
+            core.inflight_ops.unregister(req.cancel)
+
+
+def _metered_send(send, method: str, path: str, trace_id: str, root_span_id: str):
+    """Wrap `send` to record route latency, audio bytes and the root span like the Flask hooks do"""
+    started = monotonic()
+    response = {'status': '0', 'audio_source': None, 'audio_bytes': 0}
+
+    async def metered(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = str(message['status'])
+            headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in message.get('headers', [])}
+            if headers.get('content-type', '').startswith('audio/'):
+                response['audio_source'] = headers.get('x-tts-cache', 'uncached')
+            message = {**message, 'headers': list(message.get('headers', [])) +
+                       [(tracing.TRACE_HEADER.lower().encode('latin-1'), trace_id.encode('latin-1'))]}
+        elif message['type'] == 'http.response.body':
+            if response['audio_source'] is not None and message.get('body'):
+                response['audio_bytes'] += len(message['body'])
+                core.AUDIO_BYTES_SERVED.inc(len(message['body']), source=response['audio_source'])
+            if not message.get('more_body'):
+                elapsed = monotonic() - started
+                core.HTTP_LATENCY.observe(elapsed, route=path, method=method, status=response['status'])
+                tracing.record_span('http', elapsed, trace_id=trace_id, parent_id='', span_id=root_span_id,
+                                    status='error' if int(response['status']) >= 500 else 'ok',
+                                    route=path, method=method, status_code=int(response['status']),
+                                    audio_bytes=response['audio_bytes'] or None, cache=response['audio_source'])
+        await send(message)
+
+    return metered
+
+
+# --- Flask fallthrough ---
+
+def _wsgi_environ(scope, body: bytes) -> dict:
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_LENGTH':
+            continue
+        if key != 'CONTENT_TYPE':
+            key = 'HTTP_' + key
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _call_flask(scope, receive, send):
+    """Serve one request with the Flask app, running the app and every body chunk on the worker pool"""
+    body = await _read_body(receive)
+    if body is None:
+        return
+    response = {'written': []}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        return response['written'].append
+
+    def call_app():
+        result = core.app(_wsgi_environ(scope, body), start_response)
+        return result, iter(result)
+
+    result, chunks = await asyncio.wrap_future(_worker_pool.submit(call_app))
+    watcher = asyncio.ensure_future(_wait_disconnect(receive))
+    pending, started = None, False
+    try:
+        while True:
+            pending = _worker_pool.submit(next, chunks, None)
+            chunk_future = asyncio.wrap_future(pending)
+            await asyncio.wait({chunk_future, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not chunk_future.done():
+                # Client gone while the app waits for its next chunk (an idle SSE stream)
+                chunk_future.cancel()
+                return
+            chunk = chunk_future.result()
+            pending = None
+            if not started:
+                await send({'type': 'http.response.start', 'status': response['status'],
+                            'headers': response['headers']})
+                started = True
+                for data in response['written']:
+                    await _send_body(send, data, more=True)
+            if chunk is None:
+                await _send_body(send, b'')
+                return
+            if chunk:
+                await _send_body(send, chunk, more=True)
+    finally:
+        watcher.cancel()
+        close = getattr(result, 'close', None)
+        if close is not None:
+            # close() must not overlap a next() still running on its thread
+            if pending is None:
+                _worker_pool.submit(close)
+            else:
+                pending.add_done_callback(lambda _: _worker_pool.submit(close))
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            _client()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _client_session is not None:
+                await _client_session.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] == 'http':
+        handler = ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            body = await _read_body(receive)
+            if body is None:
+                return
+            headers = dict(scope.get('headers', []))
+            trace_id = tracing.accept_trace_id(
+                headers.get(tracing.TRACE_HEADER.lower().encode('latin-1'), b'').decode('latin-1'))
+            root_span_id = tracing.new_id()
+            tracing.bind(trace_id, root_span_id)
+            send = _metered_send(send, scope['method'], scope['path'], trace_id, root_span_id)
+            return await _run_cancellable(handler, _Request(scope, body), send, receive)
+    if scope['type'] == 'http':
+        await _call_flask(scope, receive, send)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn  # type: ignore
+    except ImportError:
+        raise SystemExit("uvicorn is not installed: pip install uvicorn")
+    logger.info(f"Starting ATLAS Frontend Server (ASGI) on port {core.FRONTEND_PORT}")
+    uvicorn.run(app, host='0.0.0.0', port=core.FRONTEND_PORT)
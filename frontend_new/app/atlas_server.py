@@ -10,8 +10,11 @@ import sys
 import logging
 logging.basicConfig(filename='../logs/frontend.log', level=logging.DEBUG, format='%(asctime)s %(levelname)s: %(message)s')
 import json
+import hashlib
+import uuid
+import re
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, send_file, make_response
+from flask import Flask, Response, g, render_template, jsonify, request, send_file, make_response
 try:
     from flask_cors import CORS
 except ImportError:
@@ -20,16 +23,37 @@ try:
     import requests
 except ImportError:
     requests = None
-import tempfile
 import subprocess
 from pathlib import Path
 from goose_client import GooseClient
+from audio_cache import AudioCache, make_cache_key, normalize_text
+from tts_admission import TTSAdmission, AdmissionRejected
+import cancellation
+from cancellation import Cancelled, InFlightRegistry
+from singleflight import Abandoned, SingleFlight
+from tts_balancer import BackendBalancer
+from tts_hedging import HedgePolicy
+from health_prober import HealthProber
+from shared_state import open_shared_state
+from voice_registry import VoiceRegistry
+from log_reader import LogReader, make_cursor, parse_cursor
+from log_stream import LogStreamHub, format_event
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as metrics
+import tracing
+from tracing import TraceSink
+from circuit_breaker import CircuitOpenError, breakers_snapshot, get_breaker
+from speech_text import clean_for_speech, detect_agent, segment_for_tts, strip_signature
+import audio_formats
 from typing import Optional
 import io
+import queue
 import wave
-from threading import Lock
+import struct
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
 from time import monotonic
-import re
 
 try:
     # Optional: robust retry adapter if available
@@ -58,9 +82,6 @@ app = Flask(__name__,
 if CORS:
     CORS(app)
 
-# Initialize Goose client
-goose_client = GooseClient(base_url="http://localhost:3000", secret_key="test")
-
 # Configuration
 FRONTEND_PORT = int(os.environ.get('FRONTEND_PORT', 5001))
 ORCHESTRATOR_URL = os.environ.get('ORCHESTRATOR_URL', 'http://localhost:5101')
@@ -69,32 +90,99 @@ TTS_SERVER_URL = os.environ.get('TTS_SERVER_URL', 'http://127.0.0.1:3001')
 # Optional: comma-separated list of TTS endpoints for round-robin failover, e.g. "http://127.0.0.1:3001,http://127.0.0.1:3002"
 TTS_SERVER_URLS = os.environ.get('TTS_SERVER_URLS', '')
 
-# Agent voice configuration
+# Initialize Goose client; it makes no network calls until used (see start_discovery below).
+# Without GOOSE_BASE_URL the address is auto-discovered, skipping the TTS servers' ports
+goose_client = GooseClient(secret_key="test", exclude_urls=[TTS_SERVER_URL, *TTS_SERVER_URLS.split(',')])
+
+# Agent voice profiles; rate/pitch match voiceSystem.agents in intelligent-chat-manager.js,
+# so audio prefetched by /api/voice/prepare_response has the cache key the browser asks for
 AGENT_VOICES = {
     'atlas': {
         'voice': 'dmytro',
         'signature': '[ATLAS]',
-        'color': '#00ff00'
+        'color': '#00ff00',
+        'rate': 1.0,
+        'pitch': 1.0
     },
     'tetyana': {
         'voice': 'tetiana', 
         'signature': '[ТЕТЯНА]',
-        'color': '#00ffff'
+        'color': '#00ffff',
+        'rate': 1.0,
+        'pitch': 1.05
     },
     'grisha': {
     'voice': 'mykyta',
         'signature': '[ГРИША]',
-        'color': '#ffff00'
+        'color': '#ffff00',
+        'rate': 1.1,
+        'pitch': 0.9
     }
 }
 
+# Prometheus metrics served by /metrics (per process)
+HTTP_LATENCY = metrics.histogram('atlas_http_request_duration_seconds',
+                                 'HTTP request duration until the response body is finished',
+                                 ['route', 'method', 'status'])
+TTS_UPSTREAM_LATENCY = metrics.histogram('atlas_tts_upstream_duration_seconds',
+                                         'TTS backend request time (to response headers when streamed)',
+                                         ['backend', 'outcome'])
+TTS_UPSTREAM_ERRORS = metrics.counter('atlas_tts_upstream_errors_total',
+                                      'Failed TTS backend requests', ['backend', 'reason'])
+TTS_ADMISSION_WAIT = metrics.histogram('atlas_tts_admission_wait_seconds',
+                                       'Time spent waiting for a TTS backend slot')
+AUDIO_BYTES_SERVED = metrics.counter('atlas_audio_bytes_served_total',
+                                     'Audio bytes sent to clients, by cache outcome', ['source'])
+TTS_PREFETCH = metrics.counter('atlas_tts_prefetch_total',
+                               'Chunks prefetched by /api/voice/prepare_response, by outcome', ['outcome'])
+
+# Spans of each request (trace ID from / to X-Request-ID), written as JSON lines; '' disables
+ATLAS_TRACE_FILE = os.environ.get('ATLAS_TRACE_FILE', str(CURRENT_DIR.parent / 'logs' / 'traces.jsonl'))
+trace_sink = TraceSink(ATLAS_TRACE_FILE) if ATLAS_TRACE_FILE else None
+tracing.configure(trace_sink)
+
+def _on_admission_wait(waited: float):
+    TTS_ADMISSION_WAIT.observe(waited)
+    tracing.record_span('tts.admission_wait', waited)
+
 # Global TTS coordination and HTTP session
-tts_lock = Lock()
-_voices_cache = {
-    'timestamp': 0.0,
-    'ttl': 60.0,
-    'voices': []
-}
+# Per-backend synthesis slots (resized from the capacity each backend advertises in /health)
+# with a bounded FIFO admission queue in front of them
+tts_admission = TTSAdmission(
+    default_capacity=int(os.environ.get('TTS_BACKEND_CAPACITY', 1)),
+    max_queue=int(os.environ.get('TTS_QUEUE_MAX', 16)),
+    queue_timeout=float(os.environ.get('TTS_QUEUE_TIMEOUT', 20)),
+    on_wait=_on_admission_wait
+)
+# Backend selection by latency-per-char EWMA and reported load
+tts_balancer = BackendBalancer()
+# Opt-in hedging: duplicate a slow request to a second backend after the observed p90 for its length
+tts_hedger = HedgePolicy(
+    enabled=os.environ.get('TTS_HEDGE', '0').lower() in ('1', 'true', 'yes'),
+    quantile=float(os.environ.get('TTS_HEDGE_QUANTILE', 0.9))
+)
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('TTS_HEDGE_WORKERS', 16)),
+                                     thread_name_prefix='tts-hedge')
+# Worker pool for fanning sentence synthesis out across backends
+_tts_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('TTS_FANOUT_WORKERS', 8)),
+                                   thread_name_prefix='tts-fanout')
+# Coalesces identical concurrent synthesis requests (keyed like the audio cache)
+tts_inflight = SingleFlight()
+# Per-session in-flight operations, cancelled together by /api/voice/interrupt
+inflight_ops = InFlightRegistry()
+
+# State shared by worker processes under serve.py (voices, health, cache usage); '' disables it
+shared_state = open_shared_state(os.environ.get('ATLAS_SHARED_STATE',
+                                                str(CURRENT_DIR.parent / 'cache' / 'shared_state.sqlite3')))
+
+# Synthesized audio cache (memory LRU + disk), keyed by normalized request parameters
+TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR', str(CURRENT_DIR.parent / 'cache' / 'tts'))
+audio_cache = AudioCache(
+    cache_dir=Path(TTS_CACHE_DIR) if TTS_CACHE_DIR else None,
+    memory_limit_bytes=int(float(os.environ.get('TTS_CACHE_MEMORY_MB', 32)) * 1024 * 1024),
+    disk_limit_bytes=int(float(os.environ.get('TTS_CACHE_DISK_MB', 512)) * 1024 * 1024),
+    shared=shared_state
+)
 
 def _build_http_session():
     if not requests:
@@ -121,10 +209,32 @@ def _build_http_session():
 
 http = _build_http_session()
 
+# Max silence between orchestrator stream chunks (agents can think for a while)
+ORCHESTRATOR_READ_TIMEOUT = float(os.environ.get('ORCHESTRATOR_READ_TIMEOUT', 120))
+# Fail fast while the orchestrator is known to be down; half-open state is probed via /health
+orchestrator_breaker = get_breaker(
+    'orchestrator',
+    probe=lambda: (http or requests).get(f'{ORCHESTRATOR_URL}/health', timeout=3).status_code == 200
+)
+
+# Parsed tails of the service logs served by /logs
+log_reader = LogReader([
+    (CURRENT_DIR.parent / 'logs' / 'frontend.log', 'frontend'),
+    (CURRENT_DIR.parent / 'logs' / 'orchestrator.log', 'orchestrator'),
+    (CURRENT_DIR.parent / 'logs' / 'recovery_bridge.log', 'recovery_bridge'),
+])
+# Followers for /logs/stream share the same parsed tails
+log_hub = LogStreamHub(log_reader.files,
+                       queue_size=int(os.environ.get('LOG_STREAM_QUEUE', 500)),
+                       poll_interval=float(os.environ.get('LOG_STREAM_POLL', 1.0)),
+                       # Each stream parks a server thread; serve.py reserves this many on top of the API's
+                       max_clients=int(os.environ.get('LOG_STREAM_MAX_CLIENTS', 16)))
+
 # Multi-endpoint TTS management
 _tts_endpoints = []  # list[str]
 _tts_index = 0
-_tts_failures = {}  # base_url -> cooldown_until (monotonic seconds)
+# Guards _tts_index only; never held while calling out, so a pick may run under any other lock
+_tts_index_lock = threading.Lock()
 
 def _init_tts_endpoints():
     global _tts_endpoints, _tts_index
@@ -139,111 +249,125 @@ def _init_tts_endpoints():
             if u and u not in urls:
                 urls.append(u)
     _tts_endpoints = urls or ['http://127.0.0.1:3001']
-    _tts_index = 0
+    with _tts_index_lock:
+        _tts_index = 0
 
 _init_tts_endpoints()
 
-def _pick_tts_base() -> str:
-    """Pick next healthy TTS base url with simple round-robin and cooldown.
-    If all are on cooldown, pick the next in order anyway."""
+def _pick_tts_base(candidates: Optional[list] = None) -> str:
+    """Pick a TTS base url among `candidates` (default: all endpoints).
+    Backends with an open circuit are skipped; among the healthy ones the balancer
+    prefers low latency per char and low load (power of two choices), with
+    round-robin order as the tie-breaker. If all circuits are open, the next in
+    order is returned and the request fails fast on its breaker."""
     global _tts_index
-    now = monotonic()
     n = len(_tts_endpoints)
-    for i in range(n):
-        idx = (_tts_index + i) % n
-        base = _tts_endpoints[idx]
-        cooldown = _tts_failures.get(base, 0)
-        if now >= cooldown:
-            _tts_index = (idx + 1) % n
-            return base
-    # All on cooldown: return next in order
-    base = _tts_endpoints[_tts_index]
-    _tts_index = (_tts_index + 1) % len(_tts_endpoints)
+    with _tts_index_lock:
+        start = _tts_index
+    allowed = set(candidates) if candidates is not None else None
+    ordered = [b for b in (_tts_endpoints[(start + i) % n] for i in range(n))
+               if allowed is None or b in allowed]
+    if not ordered:
+        return candidates[0] if candidates else _tts_endpoints[0]
+    healthy = [b for b in ordered if _tts_breaker(b).allow()]
+    base = tts_balancer.choose(healthy, tts_admission.in_flight) if healthy else ordered[0]
+    with _tts_index_lock:
+        _tts_index = (_tts_endpoints.index(base) + 1) % n
     return base
 
-def _mark_tts_failure(base: str, backoff: float = 5.0):
-    _tts_failures[base] = monotonic() + backoff
+def _tts_breaker(base: str):
+    """Circuit breaker for one TTS backend; half-open state is probed via /health"""
+    return get_breaker(f"tts:{base}",
+                       probe=lambda: (http or requests).get(f"{base}/health", timeout=3).status_code == 200)
 
-def _tts_get(path: str, timeout: int = 5):
-    base = _pick_tts_base()
+def _record_tts_result(base: str, status_code: int):
+    if status_code >= 500:
+        _tts_breaker(base).record_failure()
+    else:
+        _tts_breaker(base).record_success()
+
+def _check_tts_breaker(base: str):
     try:
-        r = (http or requests).get(f"{base}{path}", timeout=timeout)
-        if r.status_code >= 500:
-            _mark_tts_failure(base)
-        return r, base
-    except Exception as e:
-        logger.warning(f"TTS GET failed for {base}{path}: {e}")
-        _mark_tts_failure(base)
+        _tts_breaker(base).check()
+    except CircuitOpenError:
+        TTS_UPSTREAM_ERRORS.inc(backend=base, reason='circuit_open')
         raise
 
-def _tts_post(path: str, json_payload: dict, timeout: int):
-    base = _pick_tts_base()
+def _observe_tts_upstream(base: str, elapsed: float, status_code: Optional[int]):
+    """Latency and error metrics for one backend request (status None = no response)"""
+    if status_code is None:
+        TTS_UPSTREAM_ERRORS.inc(backend=base, reason='connection')
+        TTS_UPSTREAM_LATENCY.observe(elapsed, backend=base, outcome='error')
+        return
+    TTS_UPSTREAM_LATENCY.observe(elapsed, backend=base, outcome='ok' if status_code < 400 else 'error')
+    if status_code >= 400:
+        TTS_UPSTREAM_ERRORS.inc(backend=base, reason=f"http_{status_code}")
+
+def _record_tts_server_stages(r, parent_id: Optional[str]):
+    """Child spans from the backend's Server-Timing header (its stages run back to back)"""
+    stages = tracing.parse_server_timing(r.headers.get('Server-Timing'))
+    end = time.time() - sum(d for _, d in stages)
+    for name, duration in stages:
+        end += duration
+        tracing.record_span(f"tts.server.{name}", duration, end=end, parent_id=parent_id)
+
+def _tts_get(path: str, timeout: int = 5, base: Optional[str] = None):
+    base = base or _pick_tts_base()
+    _check_tts_breaker(base)
+    started = monotonic()
     try:
-        r = (http or requests).post(f"{base}{path}", json=json_payload, timeout=timeout)
-        if r.status_code >= 500:
-            _mark_tts_failure(base)
+        r = (http or requests).get(f"{base}{path}", timeout=timeout, headers=tracing.trace_headers())
+        _record_tts_result(base, r.status_code)
+        _observe_tts_upstream(base, monotonic() - started, r.status_code)
         return r, base
     except Exception as e:
-        logger.warning(f"TTS POST failed for {base}{path}: {e}")
-        _mark_tts_failure(base)
+        logger.warning(f"TTS GET failed for {base}{path}: {e}")
+        _tts_breaker(base).record_failure()
+        _observe_tts_upstream(base, monotonic() - started, None)
         raise
 
+def _tts_post(path: str, json_payload: dict, timeout: int, base: Optional[str] = None, stream: bool = False):
+    base = base or _pick_tts_base()
+    _check_tts_breaker(base)
+    started = monotonic()
+    with tracing.span('tts.upstream', backend=base, path=path, chars=len(json_payload.get('text', ''))) as sp:
+        try:
+            r = (http or requests).post(f"{base}{path}", json=json_payload, timeout=timeout, stream=stream,
+                                        headers=tracing.trace_headers())
+            _record_tts_result(base, r.status_code)
+            _observe_tts_upstream(base, monotonic() - started, r.status_code)
+        except Exception as e:
+            logger.warning(f"TTS POST failed for {base}{path}: {e}")
+            _tts_breaker(base).record_failure()
+            _observe_tts_upstream(base, monotonic() - started, None)
+            raise
+        sp.set(status_code=r.status_code)
+        if r.status_code >= 400:
+            sp.status = 'error'
+        _record_tts_server_stages(r, sp.span_id)
+    return r, base
+
 def _dynamic_timeout_for_text(text: str) -> int:
     # ~60ms per char with floor/ceiling
     n = max(1, len(text))
     seconds = min(45, max(10, int(0.06 * n + 5)))
     return seconds
 
-def _get_supported_voices(force: bool = False) -> list:
-    now = monotonic()
-    if not force and _voices_cache['voices'] and (now - _voices_cache['timestamp'] < _voices_cache['ttl']):
-        return _voices_cache['voices']
-    if not requests:
-        return []
-    try:
-        r, base = _tts_get("/voices", timeout=5)
-        if r.status_code == 200:
-            payload = r.json()
-            # Normalize payload to list of dicts with at least 'name' and optional 'locale'
-            if isinstance(payload, dict):
-                raw_voices = payload.get('voices', [])
-            elif isinstance(payload, list):
-                raw_voices = payload
-            else:
-                raw_voices = []
-
-            voices = []
-            for v in raw_voices:
-                if isinstance(v, dict):
-                    name = v.get('name') or v.get('id') or v.get('voice')
-                    if not name and len(v) == 1:
-                        # single-key dict
-                        name = list(v.values())[0]
-                    if name:
-                        voices.append({'name': str(name), 'locale': v.get('locale') or v.get('lang') or ''})
-                elif isinstance(v, str):
-                    voices.append({'name': v, 'locale': ''})
-            _voices_cache['voices'] = voices
-            _voices_cache['timestamp'] = now
-            return voices
-    except Exception as e:
-        logger.warning(f"Fetching supported voices failed: {e}")
-    return _voices_cache['voices'] or []
+def _fetch_tts_voices(base: str):
+    """Raw /voices payload of one backend (used by the voice registry)"""
+    r, _ = _tts_get("/voices", timeout=5, base=base)
+    r.raise_for_status()
+    return r.json()
 
 def _sanitize_voice(agent: str, requested: Optional[str]) -> str:
-    agent_default = AGENT_VOICES.get(agent, {}).get('voice', 'dmytro')
-    voice = (requested or agent_default).strip()
-    supported = _get_supported_voices()
-    if supported:
-        names = {v.get('name') for v in supported if isinstance(v, dict)}
-        if voice not in names:
-            # Try agent default, then fall back to any uk voice, else any, else dmytro
-            if agent_default in names:
-                voice = agent_default
-            else:
-                uk_candidates = [v.get('name') for v in supported if isinstance(v, dict) and str(v.get('locale', '')).startswith('uk')]
-                voice = (uk_candidates[0] if uk_candidates else (next(iter(names)) if names else 'dmytro'))
-    return voice
+    """Map a requested voice to one the backends offer; a set lookup, no network I/O"""
+    return voice_registry.sanitize(requested, AGENT_VOICES.get(agent, {}).get('voice', 'dmytro'))
+
+def _tts_candidates(voice: str) -> list:
+    """Backends that offer `voice`; all endpoints when unknown"""
+    offering = voice_registry.backends_for(voice)
+    candidates = [b for b in _tts_endpoints if b in offering] if offering else []
+    return candidates or list(_tts_endpoints)
 
 def _make_silence_wav(duration_ms: int = 400) -> io.BytesIO:
     sr = 22050
@@ -257,6 +381,293 @@ def _make_silence_wav(duration_ms: int = 400) -> io.BytesIO:
     buf.seek(0)
     return buf
 
+def _silence_frames(fmt: tuple, duration_ms: int) -> bytes:
+    channels, sampwidth, framerate = fmt
+    return b"\x00" * (int(framerate * duration_ms / 1000) * channels * sampwidth)
+
+def _audio_response(data: bytes, agent: str, cache_status: str):
+    mimetype, ext = audio_formats.content_type(data)
+    resp = make_response(send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=False,
+                                   download_name=f'{agent}_{int(datetime.now().timestamp())}.{ext}'))
+    resp.headers['X-TTS-Cache'] = cache_status
+    resp.headers['Cache-Control'] = 'no-store'
+    resp.headers['Vary'] = 'Accept'
+    return resp
+
+def _post_tts_cancel(base: str, target: dict):
+    """POST /cancel with {'session_id': ...} or {'request_id': ...}"""
+    try:
+        (http or requests).post(f"{base}/cancel", json=target, headers=tracing.trace_headers(), timeout=2)
+    except Exception as e:
+        logger.debug(f"TTS cancel of {target} on {base} failed: {e}")
+
+def _client_session_id(data: dict) -> Optional[str]:
+    """The sessionId the client sent, or None: only a named session can be interrupted"""
+    session_id = data.get('sessionId')
+    return str(session_id) if session_id else None
+
+def _cancel_tts_session(session_id: str):
+    """Tell every TTS backend to drop the session's queued and running jobs (fire and forget).
+    Sent to all backends, since the job may have been started by another worker or a hedge."""
+    if not requests or not session_id:
+        return
+    for base in list(_tts_endpoints):
+        _hedge_executor.submit(tracing.bound(_post_tts_cancel), base, {'session_id': session_id})
+
+def _cancelled_response(e: Cancelled):
+    """499 (client closed request): the session was interrupted while this request waited"""
+    resp = make_response(jsonify({'error': 'Interrupted', 'cancelled': True, 'reason': e.reason}), 499)
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
+
+def _tts_busy_response(e: AdmissionRejected):
+    logger.warning(f"TTS admission rejected ({e.reason}), retry after {e.retry_after}s")
+    status_code = 429 if e.reason == 'queue_full' else 503
+    resp = make_response(jsonify({'error': 'TTS is busy', 'reason': e.reason}), status_code)
+    resp.headers['Retry-After'] = str(e.retry_after)
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
+
+def _close_hedge_response(future):
+    try:
+        if future.exception() is None:
+            cancellation.abort_response(future.result()[0])
+    except Exception:
+        pass
+
+def _abort_hedge_loser(future, base: str, request_id: str):
+    """Stop the losing hedged request as soon as the winner is known: free its slot now,
+    tell its backend to drop the job if it is still running, and close its response
+    (now, or when the POST returns) without reading the body"""
+    tts_admission.release(base)
+    if not future.done():
+        _hedge_executor.submit(tracing.bound(_post_tts_cancel), base, {'request_id': request_id})
+    future.add_done_callback(_close_hedge_response)
+
+def _tts_post_hedged(tts_payload: dict, timeout: int, base: str, stream: bool = False):
+    """POST /tts to `base`. With hedging enabled, if the primary has not answered
+    within the observed latency quantile for this text length, the same payload is
+    sent to another backend with a free slot and the first good response wins.
+    Returns (response, base) like _tts_post; the caller owns the returned base's slot.
+    The loser is aborted right away (see _abort_hedge_loser); hedged attempts are
+    always streamed so an unread body can be dropped, and carry a request_id the
+    backend's /cancel accepts."""
+    delay = tts_hedger.threshold(len(tts_payload['text']))
+    if delay is None or len(_tts_endpoints) < 2:
+        return _tts_post('/tts', tts_payload, timeout=timeout, base=base, stream=stream)
+    tts_hedger.count('eligible')
+    attempts = {'primary': dict(tts_payload, request_id=uuid.uuid4().hex)}
+    primary = _hedge_executor.submit(tracing.bound(_tts_post), '/tts', attempts['primary'], timeout, base, True)
+    try:
+        return primary.result(timeout=delay)
+    except FuturesTimeout:
+        pass
+    hedge_base = tts_admission.try_acquire(
+        lambda: [b for b in _tts_candidates(tts_payload['voice']) if b != base], _pick_tts_base)
+    if not hedge_base:
+        tts_hedger.count('no_spare_backend')
+        return primary.result()
+    tts_hedger.count('hedged')
+    logger.info(f"TTS hedge: {base} slower than {delay:.2f}s, duplicating to {hedge_base}")
+    attempts['hedge'] = dict(tts_payload, request_id=uuid.uuid4().hex)
+    hedge = _hedge_executor.submit(tracing.bound(_tts_post), '/tts', attempts['hedge'], timeout, hedge_base, True)
+    slots = {primary: (base, attempts['primary']['request_id']), hedge: (hedge_base, attempts['hedge']['request_id'])}
+    pending = set(slots)
+    winner = None
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None and f.result()[0].status_code == 200:
+                winner = f
+                break
+    if winner is None:
+        tts_hedger.count('both_failed')
+        winner = primary
+    else:
+        tts_hedger.count('hedge_wins' if winner is hedge else 'primary_wins')
+    loser = hedge if winner is primary else primary
+    _abort_hedge_loser(loser, *slots[loser])
+    return winner.result()
+
+def _synthesize_upstream(tts_payload: dict, cache_key: str, cancel=None) -> Optional[bytes]:
+    """Synthesize on a TTS backend slot and cache the result.
+    Returns WAV bytes, or None when the backend answered with an error.
+    Raises AdmissionRejected when no slot could be obtained, Cancelled when
+    `cancel` fires while waiting for one."""
+    base = tts_admission.acquire(lambda: _tts_candidates(tts_payload['voice']), _pick_tts_base, cancel=cancel)
+    started = monotonic()
+    try:
+        timeout_sec = _dynamic_timeout_for_text(tts_payload['text'])
+        tts_response, base = _tts_post_hedged(tts_payload, timeout_sec, base)
+        elapsed = monotonic() - started
+        if tts_response.status_code == 200 and tts_response.content:
+            tts_balancer.observe(base, elapsed, len(tts_payload['text']))
+            tts_hedger.observe(len(tts_payload['text']), elapsed)
+            audio_cache.put(cache_key, tts_response.content)
+            logger.info(f"TTS OK [{tts_payload.get('voice')}] via {base} in {elapsed:.2f}s, size={len(tts_response.content)} bytes")
+            return tts_response.content
+        logger.warning(f"TTS server HTTP {tts_response.status_code} from {base}: {tts_response.text[:200] if hasattr(tts_response, 'text') else 'no text'}")
+        return None
+    finally:
+        tts_admission.release(base, monotonic() - started)
+
+def _open_tts_stream(tts_payload: dict, cancel=None):
+    """Acquire a backend slot and open a streaming /tts response.
+    Returns (response, base, started) with the slot still held, or None when
+    the backend answered with an error. Raises AdmissionRejected or Cancelled."""
+    base = tts_admission.acquire(lambda: _tts_candidates(tts_payload['voice']), _pick_tts_base, cancel=cancel)
+    return _post_tts_stream(tts_payload, base, cancel)
+
+def _post_tts_stream(tts_payload: dict, base: str, cancel=None):
+    """Open a streaming /tts response on an already acquired slot of `base` (hedged
+    like every synthesis). Returns (response, base, started) with the slot of the
+    answering backend still held, or None; the slot is released on any other outcome."""
+    started = monotonic()
+    try:
+        timeout_sec = _dynamic_timeout_for_text(tts_payload['text'])
+        tts_response, base = _tts_post_hedged(tts_payload, timeout_sec, base, stream=True)
+    except Exception:
+        tts_admission.release(base, monotonic() - started)
+        raise
+    if cancel is not None and cancel.cancelled:
+        # Interrupted while the POST was waiting for the backend's headers
+        tts_response.close()
+        tts_admission.release(base, monotonic() - started)
+        raise Cancelled(cancel.reason or 'cancelled')
+    if tts_response.status_code != 200:
+        logger.warning(f"TTS server HTTP {tts_response.status_code} from {base}: {tts_response.text[:200]}")
+        tts_response.close()
+        tts_admission.release(base, monotonic() - started)
+        return None
+    # Time to response headers == synthesis time on the backend
+    tts_hedger.observe(len(tts_payload['text']), monotonic() - started)
+    return tts_response, base, started
+
+def _relay_tts_audio(upstream, cache_key: str, agent: str, chars: int, cancel):
+    """Chunks of the backend's audio body, for relaying to the client as they arrive.
+    The bytes are teed (up to the cache entry limit) so the finished audio
+    lands in the cache and is handed to coalesced waiters. `cancel` is the
+    request's token; the relay takes it over and unregisters it at the end.
+    An interrupt of the session closes the upstream response, which ends the relay."""
+    tts_response, base, started = upstream
+    cancel.on_cancel(lambda: cancellation.abort_response(tts_response))
+
+    def generate():
+        buf = bytearray()
+        complete = failed = False
+        try:
+            for chunk in tts_response.iter_content(chunk_size=16384):
+                if not chunk:
+                    continue
+                if buf is not None:
+                    buf.extend(chunk)
+                    if len(buf) > audio_cache.max_entry_bytes:
+                        buf = None
+                yield chunk
+            complete = True
+        except Exception:
+            if not cancel.cancelled:
+                failed = True
+                raise
+            logger.info(f"TTS stream from {base} cancelled ({cancel.reason})")
+        finally:
+            inflight_ops.unregister(cancel)
+            tts_response.close()
+            elapsed = monotonic() - started
+            tts_admission.release(base, elapsed)
+            audio = bytes(buf) if complete and buf else None
+            if complete:
+                tts_balancer.observe(base, elapsed, chars)
+            if audio:
+                audio_cache.put(cache_key, audio)
+                logger.info(f"TTS OK [{agent}] via {base} in {elapsed:.2f}s, size={len(audio)} bytes (streamed)")
+            elif failed:
+                logger.warning(f"TTS stream from {base} aborted after {elapsed:.2f}s")
+            if complete or failed:
+                tts_inflight.settle(cache_key, result=audio)
+            else:
+                # Interrupted, or our client went away: waiters of other sessions take over
+                tts_inflight.abandon(cache_key)
+
+    return generate()
+
+def _audio_stream_headers(tts_response, agent: str):
+    """(mimetype, headers) for relaying a streaming /tts response"""
+    # The backend labels what it actually encoded (older ones always send WAV)
+    mimetype, ext = audio_formats.FORMATS[audio_formats.from_content_type(tts_response.headers.get('Content-Type'))]
+    headers = {}
+    content_length = tts_response.headers.get('Content-Length')
+    if content_length and not tts_response.headers.get('Content-Encoding'):
+        headers['Content-Length'] = content_length
+    headers['Content-Disposition'] = f'inline; filename={agent}_{int(datetime.now().timestamp())}.{ext}'
+    headers['X-TTS-Cache'] = 'miss'
+    headers['Cache-Control'] = 'no-store'
+    headers['Vary'] = 'Accept'
+    return mimetype, headers
+
+def _stream_audio_response(upstream, cache_key: str, agent: str, chars: int, cancel):
+    """Flask response relaying the backend's audio (see _relay_tts_audio)"""
+    mimetype, headers = _audio_stream_headers(upstream[0], agent)
+    resp = Response(_relay_tts_audio(upstream, cache_key, agent, chars, cancel), mimetype=mimetype,
+                    direct_passthrough=True)
+    resp.headers.update(headers)
+    return resp
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = monotonic()
+    g.trace_id = tracing.accept_trace_id(request.headers.get(tracing.TRACE_HEADER))
+    g.root_span_id = tracing.new_id()
+    tracing.bind(g.trace_id, g.root_span_id)
+
+# Polled by dashboards; tracing them would only bury the interesting traces
+_UNTRACED_ROUTES = {'/metrics', '/logs', '/logs/stream', '/api/traces', '/api/traces/<trace_id>',
+                    '/static/<path:filename>', 'unmatched'}
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    method, status = request.method, str(response.status_code)
+    audio_source = None
+    if response.mimetype and response.mimetype.startswith('audio/'):
+        audio_source = response.headers.get('X-TTS-Cache', 'uncached')
+
+    trace_id, root_span_id = g.trace_id, g.root_span_id
+    response.headers[tracing.TRACE_HEADER] = trace_id
+
+    def finished(audio_bytes):
+        elapsed = monotonic() - started
+        HTTP_LATENCY.observe(elapsed, route=route, method=method, status=status)
+        if audio_source and audio_bytes:
+            AUDIO_BYTES_SERVED.inc(audio_bytes, source=audio_source)
+        if route not in _UNTRACED_ROUTES:
+            tracing.record_span('http', elapsed, trace_id=trace_id, parent_id='', span_id=root_span_id,
+                                status='error' if response.status_code >= 500 else 'ok',
+                                route=route, method=method, status_code=response.status_code,
+                                audio_bytes=audio_bytes or None, cache=audio_source)
+
+    # Streamed bodies finish long after this hook. Passthrough bodies go to the
+    # server as-is (call_on_close never runs for them), so observe from the body itself.
+    if response.direct_passthrough or (audio_source and response.content_length is None):
+        response.response = _observe_body(response.response, finished)
+    else:
+        response.call_on_close(lambda: finished(response.content_length if audio_source else 0))
+    return response
+
+def _observe_body(body, finished):
+    sent = 0
+    try:
+        for chunk in body:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+        finished(sent)
+
 @app.route('/')
 def index():
     """Serve the main interface"""
@@ -273,159 +684,78 @@ def health():
         'services': {
             'frontend': 'running',
             'orchestrator': check_orchestrator_health(),
-            'tts': check_tts_health()
-        }
+            'tts': check_tts_health(),
+            'goose': goose_client.readiness()['state']
+        },
+        'checks': health_prober.snapshot()
     })
 
 @app.route('/logs')
 def get_logs():
-    """Get system logs"""
+    """Get system logs.
+
+    Query: limit (default 100), since (cursor from a previous response) to get only newer entries.
+    """
     try:
         limit = int(request.args.get('limit', 100))
+        logs, cursor = log_reader.read(limit=limit, since=request.args.get('since'))
+        return jsonify({'logs': logs, 'cursor': cursor})
+    except Exception as e:
+        logger.error(f"Error getting logs: {e}")
+        return jsonify({'error': 'Failed to get logs', 'logs': []}), 500
 
-        # Read and normalize logs from multiple sources
-        logs = []
-        log_files = [
-            '../logs/frontend.log',
-            '../logs/orchestrator.log',
-            '../logs/recovery_bridge.log'
-        ]
-
-        # Timestamp patterns we support:
-        # 1) 2025-09-04 20:19:54,360
-        ts_pat_1 = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})')
-        # 2) [2025-09-05T00:23:19.735Z] ...
-        ts_pat_2 = re.compile(r'^\[(\d{4}-\d{2}-\d{2}T[^\]]+)\]')
-        # 3) 03:13:48 or 03:13:48.123 (time-only)
-        ts_pat_3 = re.compile(r'^(\d{2}:\d{2}:\d{2}(?:[\.,]\d{1,3})?)')
-        # Levels
-        lvl_pat = re.compile(r'\[(DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|TRACE)\]', re.IGNORECASE)
-
-        def parse_ts(ts_str: str):
-            """Return (iso_str, sort_key_dt) from known formats; fallback to now."""
-            now_dt = datetime.now()
-            # 2025-09-04 20:19:54,360
-            try:
-                if 'T' not in ts_str and ',' in ts_str:
-                    dt = datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S,%f')
-                    return dt.isoformat(timespec='milliseconds'), dt
-            except Exception:
-                pass
-            # ISO in brackets e.g. 2025-09-05T00:23:19.735Z
-            try:
-                iso = ts_str.replace('Z', '+00:00')
-                dt = datetime.fromisoformat(iso)
-                return dt.isoformat(timespec='milliseconds'), dt
-            except Exception:
-                pass
-            # Time-only: 03:13:48(.123)
-            try:
-                # Normalize decimal separator
-                ts_norm = ts_str.replace(',', '.')
-                fmt = '%H:%M:%S.%f' if '.' in ts_norm else '%H:%M:%S'
-                t = datetime.strptime(ts_norm, fmt).time()
-                dt = datetime.combine(now_dt.date(), t)
-                return dt.isoformat(timespec='milliseconds'), dt
-            except Exception:
-                pass
-            # Fallback
-            return now_dt.isoformat(timespec='milliseconds'), now_dt
-
-        for log_file in log_files:
-            log_path = CURRENT_DIR.parent / log_file.replace('../', '')
-            if not log_path.exists():
-                continue
-            try:
-                with open(log_path, 'r') as f:
-                    # Read a bit more to allow multi-line grouping
-                    raw_lines = [ln.rstrip('\n') for ln in f.readlines()[-max(limit * 4, 200):]]
-
-                source = log_path.name.replace('.log', '')
-                current = None  # current aggregated entry
-
-                def push_current():
-                    nonlocal current
-                    if current and current.get('message'):
-                        logs.append({
-                            'timestamp': current['timestamp_iso'],
-                            'source': source,
-                            'level': current['level'],
-                            'message': current['message']
-                        })
-                    current = None
-
-                for line in raw_lines:
-                    text = line.strip('\r')
-                    if not text:
-                        # keep empty lines as part of the message if we have one
-                        if current:
-                            current['message'] += '\n'
-                        continue
-
-                    # Detect timestamp
-                    ts_iso = None
-                    ts_dt = None
-                    ts_match = ts_pat_1.match(text) or ts_pat_2.match(text) or ts_pat_3.match(text)
-                    if ts_match:
-                        ts_iso, ts_dt = parse_ts(ts_match.group(1))
-
-                    # Detect level
-                    level = 'info'
-                    m_lvl = lvl_pat.search(text)
-                    if m_lvl:
-                        level = m_lvl.group(1).lower()
-                        if level == 'warning':
-                            level = 'warn'
-                    else:
-                        low = text.lower()
-                        if ' error' in low or low.startswith('error'):
-                            level = 'error'
-                        elif ' warn' in low or low.startswith('warn'):
-                            level = 'warn'
-                        elif ' debug' in low or low.startswith('debug'):
-                            level = 'debug'
-
-                    # New entry if has timestamp, else continuation
-                    if ts_iso is not None:
-                        push_current()
-                        current = {
-                            'timestamp_iso': ts_iso,
-                            'timestamp_dt': ts_dt,
-                            'level': level,
-                            'message': text
-                        }
-                    else:
-                        # Continuation: append to previous entry if exists, else create minimal
-                        if current is None:
-                            ts_iso, ts_dt = parse_ts('')
-                            current = {
-                                'timestamp_iso': ts_iso,
-                                'timestamp_dt': ts_dt,
-                                'level': level,
-                                'message': text
-                            }
-                        else:
-                            # Append with newline to keep multi-line structure (e.g., markdown like "### [ТЕТЯНА]")
-                            current['message'] += f"\n{text}"
+@app.route('/logs/stream')
+def stream_logs():
+    """Server-Sent Events stream of new log entries.
 
-                # push the last aggregated entry for this source
-                push_current()
-            except Exception as e:
-                logger.warning(f"Failed to read {log_file}: {e}")
+    Starts with the last `limit` entries, or only the newer ones when resuming with
+    Last-Event-ID (sent by EventSource on reconnect) or ?since=<cursor>.
+    Answers 503 when this worker already serves LOG_STREAM_MAX_CLIENTS (default 16)
+    streams; the dashboard then polls /logs instead.
+    """
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        limit = 100
+    # Subscribe before reading the backlog so nothing falls in between
+    sub = log_hub.subscribe()
+    if sub is None:
+        return jsonify({'error': 'Too many log streams'}), 503, {'Retry-After': '30'}
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    backlog, positions = log_reader.changes(limit=limit, since=since)
 
-        # Sort by timestamp (we normalized to ISO for strings, but sorting by ISO may still be off for time-only)
-        # To be safe, convert back to dt for sorting where possible
-        def sort_key(item):
-            try:
-                return datetime.fromisoformat(item['timestamp'])
-            except Exception:
-                return datetime.now()
+    def generate():
+        try:
+            seen = parse_cursor(since, len(positions)) or [None] * len(positions)
+            for index, inode, _dt, start, end, entry in backlog:
+                # Started before the resume point: continuation lines were added since
+                grown = seen[index] is not None and seen[index][0] == inode and start < seen[index][1]
+                seen[index] = (inode, end)
+                yield format_event(entry, event='update' if grown else None, event_id=make_cursor(seen))
+            # Files without new entries moved on too; an id-only frame updates Last-Event-ID
+            seen = list(positions)
+            yield f"id: {make_cursor(seen)}\n\n"
+            while True:
+                try:
+                    (index, inode, end), frame = sub.queue.get(timeout=15)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                if seen[index] is not None and seen[index][0] == inode and end <= seen[index][1]:
+                    continue  # already in the backlog
+                seen[index] = (inode, end)
+                sub.sent += 1
+                yield frame
+                if sub.dropped > sub.reported_dropped:
+                    sub.reported_dropped = sub.dropped
+                    yield format_event({'dropped': sub.dropped}, event='dropped')
+        finally:
+            log_hub.unsubscribe(sub)
 
-        logs.sort(key=sort_key)
-        return jsonify({'logs': logs[-limit:]})
-    except Exception as e:
-        logger.error(f"Error getting logs: {e}")
-        return jsonify({'error': 'Failed to get logs', 'logs': []}), 500
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @app.route('/api/voice/health')
 def voice_health():
@@ -438,7 +768,15 @@ def voice_health():
             'timestamp': datetime.now().isoformat(),
             'tts_url': TTS_SERVER_URL,
             'backends': _tts_endpoints,
-            'available': tts_status == 'running'
+            'available': tts_status == 'running',
+            'cache': audio_cache.stats(),
+            'admission': tts_admission.stats(),
+            'coalescing': tts_inflight.stats(),
+            'balancer': tts_balancer.stats(),
+            'hedging': tts_hedger.stats(),
+            'voices': voice_registry.stats(),
+            'in_flight': inflight_ops.stats(),
+            'circuits': breakers_snapshot()
         })
     except Exception as e:
         logger.error(f"Error checking voice health: {e}")
@@ -447,7 +785,50 @@ def voice_health():
 @app.route('/api/agents')
 def get_agents():
     """Get agent configuration"""
-    return jsonify(AGENT_VOICES)
+    return _conditional(jsonify(AGENT_VOICES), _AGENTS_ETAG)
+
+_AGENTS_ETAG = hashlib.sha1(json.dumps(AGENT_VOICES, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _conditional(resp, etag: str):
+    """Attach an ETag and answer 304 when the client already has this version"""
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
+
+def _tetyana_reply_body(result: dict, session_id: str):
+    """Shape a Goose send_reply result into the /api/agents/tetyana response (body, status)"""
+    if result.get('success'):
+        response_text = result.get('response', '')
+        return {
+            'success': True,
+            'response': [{
+                'role': 'assistant',
+                'content': f'[ТЕТЯНА] {response_text}',
+                'agent': 'tetyana',
+                'voice': 'tetiana',
+                'color': '#00ffff',
+                'timestamp': datetime.now().isoformat()
+            }],
+            'session': {
+                'id': session_id,
+                'currentAgent': 'tetyana'
+            }
+        }, 200
+    if result.get('cancelled'):
+        return {'success': False, 'cancelled': True, 'error': 'Interrupted'}, 499
+    error_msg = result.get('error', 'Unknown error')
+    logger.error(f"Goose client error: {error_msg}")
+    return {
+        'success': False,
+        'error': f'Tetyana is unavailable: {error_msg}',
+        'fallback_response': [{
+            'role': 'assistant',
+            'content': '[ATLAS] Тетяна тимчасово недоступна. Перевірте з\'єднання з Goose.',
+            'agent': 'atlas',
+            'voice': 'dmytro',
+            'color': '#00ff00'
+        }]
+    }, 503
 
 @app.route('/api/agents/tetyana', methods=['POST'])
 def chat_with_tetyana():
@@ -460,40 +841,11 @@ def chat_with_tetyana():
         if not message.strip():
             return jsonify({'error': 'Message cannot be empty'}), 400
         
-        # Send message to Goose (Tetyana)
-        result = goose_client.send_reply(session_id, message)
-        
-        if result.get('success'):
-            response_text = result.get('response', '')
-            return jsonify({
-                'success': True,
-                'response': [{
-                    'role': 'assistant',
-                    'content': f'[ТЕТЯНА] {response_text}',
-                    'agent': 'tetyana',
-                    'voice': 'tetiana',
-                    'color': '#00ffff',
-                    'timestamp': datetime.now().isoformat()
-                }],
-                'session': {
-                    'id': session_id,
-                    'currentAgent': 'tetyana'
-                }
-            })
-        else:
-            error_msg = result.get('error', 'Unknown error')
-            logger.error(f"Goose client error: {error_msg}")
-            return jsonify({
-                'success': False,
-                'error': f'Tetyana is unavailable: {error_msg}',
-                'fallback_response': [{
-                    'role': 'assistant',
-                    'content': '[ATLAS] Тетяна тимчасово недоступна. Перевірте з\'єднання з Goose.',
-                    'agent': 'atlas',
-                    'voice': 'dmytro',
-                    'color': '#00ff00'
-                }]
-            }), 503
+        # Send message to Goose (Tetyana); an interrupt of the session aborts the reply
+        with inflight_ops.track(_client_session_id(data), 'goose') as cancel:
+            result = goose_client.send_reply(session_id, message, cancel=cancel)
+        body, status_code = _tetyana_reply_body(result, session_id)
+        return jsonify(body), status_code
             
     except Exception as e:
         logger.error(f"Tetyana chat error: {e}")
@@ -509,6 +861,86 @@ def chat_with_tetyana():
             }]
         }), 500
 
+def _tetyana_event_line(event: dict) -> bytes:
+    """One Goose stream event as an NDJSON line of /api/agents/tetyana/stream"""
+    return json.dumps({**event, 'agent': 'tetyana'}, ensure_ascii=False).encode('utf-8') + b'\n'
+
+def _relay_goose_events(session_id: str, message: str, cancel):
+    """Forward Goose reply events as they are generated; `cancel` is unregistered at the end"""
+    try:
+        for event in goose_client.iter_reply(session_id, message, cancel=cancel):
+            yield _tetyana_event_line(event)
+    except Exception as e:
+        logger.error(f"Tetyana stream error: {e}")
+        yield _tetyana_event_line({'type': 'error', 'error': 'Tetyana is unavailable'})
+    finally:
+        inflight_ops.unregister(cancel)
+
+@app.route('/api/agents/tetyana/stream', methods=['POST'])
+def stream_tetyana():
+    """Tetyana's reply as NDJSON events (text, tool_call, tool_result, error, complete) while Goose generates it"""
+    data = request.get_json(silent=True) or {}
+    message = data.get('message', '')
+    session_id = data.get('sessionId', 'atlas_session')
+    if not str(message).strip():
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    cancel = inflight_ops.register(_client_session_id(data), 'goose')
+    return Response(_relay_goose_events(session_id, message, cancel), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _relay_orchestrator_events(response, started: Optional[float] = None, cancel=None):
+    """Forward the orchestrator stream line by line as it arrives.
+    The client pulls from this generator, so a slow reader throttles the upstream read.
+    When `cancel` fires (the session was interrupted) the upstream response is closed."""
+    started = monotonic() if started is None else started
+    first_event, events, status = None, 0, 'ok'
+    if cancel is not None:
+        cancel.on_cancel(lambda: cancellation.abort_response(response))
+    try:
+        for line in response.iter_lines(chunk_size=None):
+            if first_event is None:
+                first_event = monotonic() - started
+            events += 1
+            yield line + b'\n'
+    except Exception as e:
+        if cancel is not None and cancel.cancelled:
+            status = 'cancelled'
+            logger.info(f"Orchestrator stream cancelled ({cancel.reason})")
+            yield json.dumps({'type': 'workflow_cancelled', 'data': {'reason': cancel.reason}}).encode() + b'\n'
+        else:
+            status = 'error'
+            orchestrator_breaker.record_failure()
+            logger.warning(f"Orchestrator stream broken: {e}")
+            yield json.dumps({'type': 'workflow_error', 'data': {'error': 'Orchestrator stream broken'}}).encode() + b'\n'
+    finally:
+        if cancel is not None:
+            inflight_ops.unregister(cancel)
+        response.close()
+        tracing.record_span('orchestrator.stream', monotonic() - started, status=status, events=events,
+                            first_event_ms=round(first_event * 1000, 1) if first_event is not None else None)
+
+def _collect_orchestrator_events(response) -> dict:
+    """Read the whole orchestrator stream (NDJSON or SSE data lines) into one document"""
+    events = []
+    try:
+        for line in response.iter_lines(chunk_size=None):
+            line = line.decode('utf-8', errors='replace').strip()
+            if line.startswith('data:'):
+                line = line[5:].strip()
+            elif not line or line.startswith((':', 'event:', 'id:', 'retry:')):
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                events.append({'type': 'raw', 'data': line})
+    finally:
+        response.close()
+    if len(events) == 1 and isinstance(events[0], dict):
+        return events[0]
+    return {'success': True, 'events': events}
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Main chat endpoint that forwards to orchestrator"""
@@ -523,18 +955,47 @@ def chat():
             
         # Forward to orchestrator
         if requests:
-            response = requests.post(f'{ORCHESTRATOR_URL}/chat/stream', 
-                                   json={
-                                       'message': message,
-                                       'sessionId': session_id,
-                                       'userId': user_id
-                                   },
-                                   timeout=30)
-            
-            if response.status_code == 200:
-                return jsonify(response.json())
+            try:
+                orchestrator_breaker.check()
+            except CircuitOpenError as e:
+                logger.warning(f"Orchestrator request rejected: {e}")
+                resp = make_response(jsonify({'error': 'Service unavailable'}), 503)
+                resp.headers['Retry-After'] = str(max(1, int(e.retry_in)))
+                return resp
+            started = monotonic()
+            try:
+                with tracing.span('orchestrator.connect', url=f'{ORCHESTRATOR_URL}/chat/stream'):
+                    response = http.post(f'{ORCHESTRATOR_URL}/chat/stream',
+                                         json={
+                                             'message': message,
+                                             'sessionId': session_id,
+                                             'userId': user_id
+                                         },
+                                         headers={'Accept': 'text/event-stream, application/x-ndjson, application/json',
+                                                  **tracing.trace_headers()},
+                                         stream=True,
+                                         timeout=(5, ORCHESTRATOR_READ_TIMEOUT))
+            except Exception:
+                orchestrator_breaker.record_failure()
+                raise
+            if response.status_code >= 500:
+                orchestrator_breaker.record_failure()
             else:
+                orchestrator_breaker.record_success()
+
+            if response.status_code != 200:
+                response.close()
                 return jsonify({'error': 'Orchestrator error'}), response.status_code
+            if data.get('stream') is False:
+                # Buffered mode for callers that want a single JSON document
+                return jsonify(_collect_orchestrator_events(response))
+            content_type = response.headers.get('Content-Type', '')
+            mimetype = 'text/event-stream' if 'text/event-stream' in content_type else 'application/x-ndjson'
+            cancel = inflight_ops.register(_client_session_id(data), 'chat')
+            return Response(_relay_orchestrator_events(response, started, cancel), mimetype=mimetype, headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
         else:
             # Fallback mock response if requests not available
             return jsonify({
@@ -555,80 +1016,162 @@ def chat():
             logger.error(f"Chat processing error: {e}")
             return jsonify({'error': 'Internal error'}), 500
 
+def _parse_synthesis_request(data: dict, accept: Optional[str] = None) -> dict:
+    """Validate and normalize parameters shared by the synthesize endpoints.
+    `accept` is the request's Accept header, used when there is no `format` field.
+    Raises ValueError with a client-facing message."""
+    text = data.get('text', '') or ''
+    agent = data.get('agent', 'atlas')
+    req_voice = data.get('voice')
+    req_fx = data.get('fx')
+    req_rate = data.get('rate')  # 1.0 по умолчанию
+    req_speed = data.get('speed')  # совместимость, приоритетнее, если задано
+
+    if not text.strip():
+        raise ValueError('Text is required')
+
+    if agent not in AGENT_VOICES:
+        raise ValueError(f'Unknown agent: {agent}')
+
+    # Базовые значения по агенту
+    agent_defaults = AGENT_VOICES.get(agent, {})
+    voice_name = req_voice or agent_defaults.get('voice', 'dmytro')
+    fx = req_fx
+    if fx is None:
+        # Попробуем получить из /api/voice/agents маппинга — по умолчанию none
+        fx = 'none'
+    fx = str(fx).strip() or 'none'
+    if fx.lower() == 'none':
+        fx = 'none'
+    # Преобразуем rate -> speed (простое соответствие)
+    speed = float(req_speed if req_speed is not None else (req_rate if req_rate is not None else 1.0))
+
+    return {
+        'text': normalize_text(text),
+        'agent': agent,
+        'voice': _sanitize_voice(agent, voice_name),
+        'speed': float(max(0.5, min(1.5, speed))),
+        'fx': fx,
+        'format': audio_formats.negotiate(data.get('format'), accept),
+        'sample_rate': audio_formats.parse_sample_rate(data.get('sample_rate')),
+        'session_id': _client_session_id(data)
+    }
+
+def _build_tts_payload(params: dict) -> dict:
+    # Omit optional fields when not needed
+    tts_payload = {
+        'text': params['text'],
+        'voice': params['voice'],
+        'speed': params['speed'],
+        'return_audio': True
+    }
+    if params['fx'] != 'none':
+        tts_payload['fx'] = params['fx']
+    if params.get('format', 'wav') != 'wav':
+        tts_payload['format'] = params['format']
+    if params.get('sample_rate'):
+        tts_payload['sample_rate'] = params['sample_rate']
+    if params.get('session_id'):
+        # Lets the backend drop the job when the session is interrupted (POST /cancel)
+        tts_payload['session_id'] = params['session_id']
+    return tts_payload
+
+def _synthesis_cache_key(params: dict) -> str:
+    return make_cache_key(params['text'], params['voice'], params['speed'], params['fx'],
+                          params.get('format', 'wav'), params.get('sample_rate'))
+
+def _synthesize_cached(params: dict, cancel=None):
+    """Return (wav_bytes or None, cache_status) going through cache, coalescing and admission.
+    Raises AdmissionRejected when no backend slot could be obtained, Cancelled when `cancel` fires."""
+    cache_key = _synthesis_cache_key(params)
+    cached, tier = audio_cache.get(cache_key)
+    if cached:
+        return cached, f'hit-{tier}'
+    while True:
+        future, leader = tts_inflight.claim(cache_key)
+        if leader:
+            break
+        wait_limit = tts_admission.queue_timeout + _dynamic_timeout_for_text(params['text']) + 5
+        try:
+            return cancellation.result(future, wait_limit, cancel), 'coalesced'
+        except Abandoned:
+            continue  # the leader was interrupted: take over, or follow whoever did
+    try:
+        audio = _synthesize_upstream(_build_tts_payload(params), cache_key, cancel)
+    except Cancelled:
+        tts_inflight.abandon(cache_key)
+        raise
+    except BaseException as e:
+        tts_inflight.settle(cache_key, error=e)
+        raise
+    tts_inflight.settle(cache_key, result=audio)
+    return audio, 'miss'
+
 @app.route('/api/voice/synthesize', methods=['POST'])
 def synthesize_voice():
     """TTS synthesis endpoint"""
     try:
         data = request.get_json()
-        text = data.get('text', '')
-        agent = data.get('agent', 'atlas')
-        req_voice = data.get('voice')
-        req_fx = data.get('fx')
-        req_rate = data.get('rate')  # 1.0 по умолчанию
-        req_speed = data.get('speed')  # совместимость, приоритетнее, если задано
-        
-        if not text.strip():
-            return jsonify({'error': 'Text is required'}), 400
-            
-        if agent not in AGENT_VOICES:
-            return jsonify({'error': f'Unknown agent: {agent}'}), 400
-            
-        # Базовые значения по агенту
-        agent_defaults = AGENT_VOICES.get(agent, {})
-        voice_name = req_voice or agent_defaults.get('voice', 'dmytro')
-        fx = req_fx
-        if fx is None:
-            # Попробуем получить из /api/voice/agents маппинга — по умолчанию none
-            fx = 'none'
-        # Преобразуем rate -> speed (простое соответствие)
-        speed = float(req_speed if req_speed is not None else (req_rate if req_rate is not None else 1.0))
-        
-        # Try Ukrainian TTS server with retries, sanitization and dynamic timeout
+        try:
+            params = _parse_synthesis_request(data, request.headers.get('Accept'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        agent = params['agent']
+        voice_name = params['voice']
+        text = params['text']
+
+        cache_key = _synthesis_cache_key(params)
+        cached, tier = audio_cache.get(cache_key)
+        if cached:
+            logger.debug(f"TTS cache hit ({tier}) [{voice_name}] size={len(cached)} bytes")
+            return _audio_response(cached, agent, f'hit-{tier}')
+
+        # Try Ukrainian TTS server with retries and dynamic timeout
         if requests:
-            acquired = tts_lock.acquire(timeout=30)
-            if not acquired:
-                logger.warning("TTS busy: lock acquire timeout")
-                # Return a short silence to keep pipeline flowing without throwing 502
-                silence = _make_silence_wav(250)
-                resp = make_response(send_file(silence, mimetype='audio/wav', as_attachment=False,
-                                               download_name=f'{agent}_busy_silent.wav'))
-                resp.headers['X-TTS-Fallback'] = 'busy-silence'
-                resp.headers['Cache-Control'] = 'no-store'
-                return resp
+            tts_payload = _build_tts_payload(params)
+            # Registered by hand: a streamed response outlives this function and unregisters the token itself
+            cancel = inflight_ops.register(params['session_id'], 'tts')
+            handed_off = False
             try:
-                started = monotonic()
-                voice_name = _sanitize_voice(agent, voice_name)
-                # Build payload, omit optional fields when not needed
-                tts_payload = {
-                    'text': text,
-                    'voice': voice_name,
-                    'speed': float(max(0.5, min(1.5, speed))),
-                    'return_audio': True
-                }
-                if req_fx and str(req_fx).lower() != 'none':
-                    tts_payload['fx'] = req_fx
-
-                timeout_sec = _dynamic_timeout_for_text(text)
-                tts_response, base = _tts_post('/tts', tts_payload, timeout=timeout_sec)
-                elapsed = monotonic() - started
-                if tts_response.status_code == 200 and tts_response.content:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                        temp_file.write(tts_response.content)
-                        temp_path = temp_file.name
-                    logger.info(f"TTS OK [{voice_name}] in {elapsed:.2f}s, size={len(tts_response.content)} bytes")
-                    resp = make_response(send_file(temp_path, mimetype='audio/wav', as_attachment=False,
-                                                   download_name=f'{agent}_{int(datetime.now().timestamp())}.wav'))
-                    resp.headers['Cache-Control'] = 'no-store'
-                    return resp
-                else:
-                    logger.warning(f"TTS server HTTP {tts_response.status_code} from {base}: {tts_response.text[:200] if hasattr(tts_response, 'text') else 'no text'}")
-            except Exception as e:
-                logger.warning(f"TTS server request failed: {e}")
+                while True:
+                    future, leader = tts_inflight.claim(cache_key)
+                    if leader:
+                        try:
+                            upstream = _open_tts_stream(tts_payload, cancel)
+                        except AdmissionRejected as e:
+                            tts_inflight.settle(cache_key, error=e)
+                            return _tts_busy_response(e)
+                        except Cancelled as e:
+                            # Only our session was interrupted; waiters of other sessions take over
+                            tts_inflight.abandon(cache_key)
+                            return _cancelled_response(e)
+                        except Exception as e:
+                            logger.warning(f"TTS server request failed: {e}")
+                            upstream = None
+                        if upstream:
+                            handed_off = True
+                            return _stream_audio_response(upstream, cache_key, agent, len(text), cancel)
+                        tts_inflight.settle(cache_key, result=None)
+                        break
+                    # Identical request already in flight: wait for its bytes
+                    wait_limit = tts_admission.queue_timeout + _dynamic_timeout_for_text(text) + 5
+                    try:
+                        audio = cancellation.result(future, wait_limit, cancel)
+                    except Abandoned:
+                        continue  # the leader was interrupted: take over, or follow whoever did
+                    except AdmissionRejected as e:
+                        return _tts_busy_response(e)
+                    except Cancelled as e:
+                        return _cancelled_response(e)
+                    except Exception as e:
+                        logger.warning(f"Coalesced TTS request failed: {e}")
+                        audio = None
+                    if audio:
+                        return _audio_response(audio, agent, 'coalesced')
+                    break
             finally:
-                try:
-                    tts_lock.release()
-                except Exception:
-                    pass
+                if not handed_off:
+                    inflight_ops.unregister(cancel)
 
         # Safe fallback: return a short silent WAV to avoid client 502 handling and keep UI smooth
         silence = _make_silence_wav(300)
@@ -642,14 +1185,231 @@ def synthesize_voice():
         logger.error(f"TTS synthesis error: {e}")
         return jsonify({'error': 'TTS synthesis failed'}), 500
 
+def _wav_stream_header(channels: int, sampwidth: int, framerate: int) -> bytes:
+    """RIFF header for a WAV of unknown length (sizes set to the maximum)"""
+    block_align = channels * sampwidth
+    return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, framerate, framerate * block_align,
+                                    block_align, sampwidth * 8)
+            + b'data' + struct.pack('<I', 0xFFFFFFFF - 36))
+
+def _read_wav(data: bytes):
+    """Return ((channels, sampwidth, framerate), pcm_frames) or None"""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            return (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()), wf.readframes(wf.getnframes())
+    except Exception as e:
+        logger.warning(f"Could not decode synthesized segment: {e}")
+        return None
+
+def _synthesize_segment(params: dict, cancel=None, attempts: int = 3) -> Optional[bytes]:
+    """Synthesize one phrase for the streaming endpoint, backing off while the queue is full"""
+    for attempt in range(attempts):
+        try:
+            audio, _ = _synthesize_cached(params, cancel)
+            return audio
+        except AdmissionRejected as e:
+            if attempt + 1 < attempts:
+                delay = min(e.retry_after, 2)
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    return None
+        except Cancelled:
+            return None
+        except Exception as e:
+            logger.warning(f"TTS segment failed: {e}")
+            return None
+    return None
+
+@app.route('/api/voice/synthesize_stream', methods=['GET', 'POST'])
+def synthesize_voice_stream():
+    """Split text into phrases, synthesize them in parallel across TTS backends
+    and stream one continuous WAV back in order.
+    GET with query parameters lets an <audio> element play it progressively."""
+    try:
+        data = request.get_json(silent=True) if request.method == 'POST' else request.args.to_dict()
+        try:
+            params = _parse_synthesis_request(data or {})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Phrases are joined as PCM into one WAV, so they are always fetched as WAV
+        params['format'] = 'wav'
+        if not requests:
+            return jsonify({'error': 'TTS backend unavailable'}), 503
+
+        segments = segment_for_tts(params['text'], params['agent']) or [params['text']]
+        pause_ms = max(0, min(1000, int((data or {}).get('pause_ms', 150))))
+        # Keep at most one phrase per free backend slot in flight so one long reply cannot flood the queue
+        window = max(1, sum(tts_admission.capacity(b) for b in _tts_endpoints))
+
+        # An interrupt of the session ends the stream and drops the phrases not yet synthesized
+        cancel = inflight_ops.register(params['session_id'], 'tts_stream')
+
+        def generate():
+            futures = {}
+            next_index = 0
+            fmt = None
+            pending_silence = 0  # failed segments before the first decodable one
+            try:
+                for i in range(len(segments)):
+                    while next_index < len(segments) and next_index < i + window:
+                        seg_params = dict(params, text=segments[next_index])
+                        futures[next_index] = _tts_executor.submit(tracing.bound(_synthesize_segment),
+                                                                   seg_params, cancel)
+                        next_index += 1
+                    try:
+                        audio = cancellation.result(futures.pop(i), cancel=cancel)
+                    except Cancelled:
+                        audio = None
+                    if cancel.cancelled:
+                        logger.info(f"TTS stream cancelled after {i} of {len(segments)} segments ({cancel.reason})")
+                        return
+                    decoded = _read_wav(audio) if audio else None
+                    if decoded is None:
+                        if fmt is None:
+                            pending_silence += 1
+                        else:
+                            yield _silence_frames(fmt, 300)
+                        continue
+                    seg_fmt, frames = decoded
+                    if fmt is None:
+                        fmt = seg_fmt
+                        yield _wav_stream_header(*fmt)
+                        for _ in range(pending_silence):
+                            yield _silence_frames(fmt, 300)
+                    elif seg_fmt != fmt:
+                        logger.warning(f"Skipping segment {i}: format {seg_fmt} differs from stream format {fmt}")
+                        continue
+                    if i > 0 and pause_ms:
+                        yield _silence_frames(fmt, pause_ms)
+                    yield frames
+                if fmt is None:
+                    # Nothing could be synthesized: still return a valid (silent) WAV
+                    yield _make_silence_wav(300).getvalue()
+            finally:
+                inflight_ops.unregister(cancel)
+                for future in futures.values():
+                    future.cancel()
+
+        resp = Response(generate(), mimetype='audio/wav', direct_passthrough=True)
+        resp.headers['X-TTS-Segments'] = str(len(segments))
+        resp.headers['Cache-Control'] = 'no-store'
+        return resp
+    except Exception as e:
+        logger.error(f"TTS stream synthesis error: {e}")
+        return jsonify({'error': 'TTS synthesis failed'}), 500
+
+# Upper bound of chunks one prepared message may prefetch, so a long reply cannot fill the admission queue
+PREFETCH_MAX_CHUNKS = int(os.environ.get('TTS_PREFETCH_MAX_CHUNKS', 6))
+_ENGLISH_HINT_RE = re.compile(r'\b(the|and|to|of|for|with|is|are|in)\b', re.IGNORECASE)
+_CYRILLIC_RE = re.compile(r'[А-ЯІЇЄҐа-яіїєґ]')
+
+def _prefetch_chunk(params: dict, cancel):
+    try:
+        audio, status = _synthesize_cached(params, cancel)
+        if not audio:
+            outcome = 'failed'
+        elif status.startswith('hit'):
+            outcome = 'cached'
+        else:
+            outcome = 'synthesized' if status == 'miss' else status
+        TTS_PREFETCH.inc(outcome=outcome)
+    except AdmissionRejected:
+        TTS_PREFETCH.inc(outcome='rejected')
+    except Cancelled:
+        TTS_PREFETCH.inc(outcome='cancelled')
+    except Exception as e:
+        TTS_PREFETCH.inc(outcome='failed')
+        logger.debug(f"TTS prefetch failed: {e}")
+
+def _prefetch_chunks(chunk_params: list, session_id: Optional[str]) -> int:
+    """Warm the audio cache with the chunks the browser is about to request.
+    Runs in the background under the session's cancel token; skipped while the
+    admission queue is half full so live requests go first. Returns chunks queued."""
+    if not requests or not chunk_params:
+        return 0
+    admission = tts_admission.stats()
+    if admission['waiting'] * 2 >= max(1, admission['max_queue']):
+        TTS_PREFETCH.inc(len(chunk_params), outcome='skipped')
+        return 0
+    cancel = inflight_ops.register(session_id, 'prefetch')
+    remaining = [len(chunk_params)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            inflight_ops.unregister(cancel)
+
+    for params in chunk_params:
+        _tts_executor.submit(tracing.bound(_prefetch_chunk), params, cancel).add_done_callback(done)
+    return len(chunk_params)
+
+@app.route('/api/voice/prepare_response', methods=['POST'])
+def prepare_voice_response():
+    """Prepare an agent message for speech: detect the agent from its signature, strip
+    the signature and markdown, split into phrases and start synthesizing them in the
+    background so the browser's follow-up synthesize calls hit a warm cache.
+    Body: { text: str, agent?: str, sessionId?: str, prefetch?: bool }
+    Send the same Accept header as the synthesize calls; it selects the prefetched format.
+    `text` is the message for display (signature removed, markdown kept); `speech_text`
+    is the cleaned text to synthesize when `chunks` is empty."""
+    try:
+        data = request.get_json(silent=True) or {}
+        raw = str(data.get('text') or '')
+        if not raw.strip():
+            return jsonify({'success': False, 'error': 'Text is required'}), 400
+        signatures = {name: cfg['signature'] for name, cfg in AGENT_VOICES.items()}
+        agent = data.get('agent') if data.get('agent') in AGENT_VOICES else detect_agent(raw, signatures, 'atlas')
+        profile = AGENT_VOICES[agent]
+        session_id = _client_session_id(data)
+        display_text = strip_signature(raw).strip()
+        chunks = segment_for_tts(raw, agent)
+        # English text is translated by the browser before synthesis, so its audio would not be reused
+        needs_translation = bool(_ENGLISH_HINT_RE.search(display_text)) and not _CYRILLIC_RE.search(display_text)
+
+        queued, audio_format = 0, None
+        if chunks and not needs_translation and data.get('prefetch', True) is not False:
+            chunk_params = [
+                _parse_synthesis_request({'text': chunk, 'agent': agent, 'voice': profile['voice'],
+                                          'rate': profile.get('rate', 1.0), 'sessionId': session_id},
+                                         request.headers.get('Accept'))
+                for chunk in chunks[:PREFETCH_MAX_CHUNKS]
+            ]
+            audio_format = chunk_params[0]['format']
+            queued = _prefetch_chunks(chunk_params, session_id)
+
+        return jsonify({
+            'success': True,
+            'agent': agent,
+            'signature': profile['signature'],
+            'voice': profile['voice'],
+            'text': display_text,
+            'speech_text': clean_for_speech(raw, agent),
+            'chunks': [] if needs_translation else chunks,
+            'needs_translation': needs_translation,
+            'prefetch': {'queued': queued, 'format': audio_format}
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Prepare voice response error: {e}")
+        return jsonify({'success': False, 'error': 'Failed to prepare response'}), 500
+
 @app.route('/api/voice/interrupt', methods=['POST'])
 def handle_voice_interrupt():
     """Handle user voice interruptions"""
     try:
         data = request.get_json()
         transcript = data.get('transcript', '')
-        session_id = data.get('sessionId', 'default')
+        session_id = _client_session_id(data)
         confidence = data.get('confidence', 0)
+        if not session_id:
+            # Without it the interrupt would hit every anonymous client's work
+            return jsonify({'error': 'sessionId is required'}), 400
         
         # Detect interruption intent
         interrupt_keywords = [
@@ -661,23 +1421,37 @@ def handle_voice_interrupt():
         is_interruption = any(keyword in transcript_lower for keyword in interrupt_keywords)
         
         if is_interruption:
+            # Stop this session's work first so barge-in frees TTS slots and upstream streams right away
+            cancelled = inflight_ops.cancel_session(session_id, 'interrupt')
+            _cancel_tts_session(session_id)
+
             # Forward interruption to orchestrator
-            if requests:
+            if requests and orchestrator_breaker.allow():
                 try:
-                    response = requests.post(f'{ORCHESTRATOR_URL}/chat/stream',
-                                           json={
-                                               'message': transcript,
-                                               'sessionId': session_id,
-                                               'userId': 'user',
-                                               'type': 'voice_interruption'
-                                           },
-                                           timeout=10)
+                    try:
+                        response = http.post(f'{ORCHESTRATOR_URL}/chat/stream',
+                                             json={
+                                                 'message': transcript,
+                                                 'sessionId': session_id,
+                                                 'userId': 'user',
+                                                 'type': 'voice_interruption'
+                                             },
+                                             headers=tracing.trace_headers(),
+                                             timeout=10)
+                    except Exception:
+                        orchestrator_breaker.record_failure()
+                        raise
+                    if response.status_code >= 500:
+                        orchestrator_breaker.record_failure()
+                    else:
+                        orchestrator_breaker.record_success()
                     
                     return jsonify({
                         'success': True,
                         'interruption_detected': True,
                         'transcript': transcript,
                         'action': 'interrupt',
+                        'cancelled': cancelled,
                         'response': response.json() if response.status_code == 200 else None
                     })
                 except Exception:
@@ -689,6 +1463,7 @@ def handle_voice_interrupt():
                 'interruption_detected': True,
                 'transcript': transcript,
                 'action': 'interrupt',
+                'cancelled': cancelled,
                 'response': {
                     'success': True,
                     'message': f'Interruption processed: {transcript}',
@@ -710,14 +1485,17 @@ def handle_voice_interrupt():
 @app.route('/api/status')
 def status():
     """Simple status endpoint for Status Manager"""
+    orchestrator_status = check_orchestrator_health()
+    tts_status = check_tts_health()
     return jsonify({
         'timestamp': datetime.now().isoformat(),
         'processes': {
             'frontend': {'count': 1, 'status': 'running'},
-            'orchestrator': {'count': 1 if check_orchestrator_health() == 'running' else 0, 'status': check_orchestrator_health()},
+            'orchestrator': {'count': 1 if orchestrator_status == 'running' else 0, 'status': orchestrator_status},
             'recovery': {'count': 1, 'status': 'running'},  # Recovery bridge is usually running if frontend is up
-            'tts': {'count': 1 if check_tts_health() == 'running' else 0, 'status': check_tts_health()}
+            'tts': {'count': 1 if tts_status == 'running' else 0, 'status': tts_status}
         },
+        'checks': health_prober.snapshot(),
         'memory': {'usage': 50},  # Placeholder
         'network': {'active': True}
     })
@@ -740,8 +1518,18 @@ def system_status():
             'tts': {
                 'status': check_tts_health(),
                 'url': TTS_SERVER_URL
+            },
+            'goose': {
+                **goose_client.readiness(),
+                'transport': goose_client.transport_status(),
+                'ws_pool': goose_client.ws_pool.stats()
             }
         },
+        'checks': health_prober.snapshot(),
+        'circuits': breakers_snapshot(),
+        'log_stream': log_hub.stats(),
+        'in_flight': inflight_ops.stats(),
+        'tracing': trace_sink.stats() if trace_sink else None,
         'agents': AGENT_VOICES
     })
 
@@ -749,95 +1537,254 @@ def system_status():
 def voice_agents():
     """Return voice mapping for agents and available voices with uk-UA locale"""
     try:
-        voices_list = []
-        if requests:
-            try:
-                r, base = _tts_get("/voices", timeout=5)
-                if r.status_code == 200:
-                    payload = r.json()
-                    if isinstance(payload, dict):
-                        raw = payload.get('voices', [])
-                    else:
-                        raw = payload if isinstance(payload, list) else []
-                    # Normalize
-                    tmp = []
-                    for v in raw:
-                        if isinstance(v, dict):
-                            name = v.get('name') or v.get('id') or v.get('voice')
-                            if not name and len(v) == 1:
-                                name = list(v.values())[0]
-                            if name:
-                                tmp.append({'name': str(name), 'locale': v.get('locale') or v.get('lang') or ''})
-                        elif isinstance(v, str):
-                            tmp.append({'name': v, 'locale': ''})
-                    voices_list = tmp
-            except Exception as e:
-                logger.warning(f"Failed to fetch voices: {e}")
+        voices_list = voice_registry.voices()
         agents = {
-            'atlas': { **AGENT_VOICES.get('atlas', {}), 'lang': 'uk-UA', 'fx': 'none', 'rate': 1.0, 'pitch': 1.0 },
-            'tetyana': { **AGENT_VOICES.get('tetyana', {}), 'lang': 'uk-UA', 'fx': 'none', 'rate': 1.0, 'pitch': 1.05 },
+            'atlas': { **AGENT_VOICES.get('atlas', {}), 'lang': 'uk-UA', 'fx': 'none' },
+            'tetyana': { **AGENT_VOICES.get('tetyana', {}), 'lang': 'uk-UA', 'fx': 'none' },
             # Для українського TTS використовуємо голос 'mykyta' та вимикаємо спец-ефекти
-            'grisha': { **AGENT_VOICES.get('grisha', {}), 'lang': 'uk-UA', 'fx': 'none', 'rate': 1.1, 'pitch': 0.9 }
+            'grisha': { **AGENT_VOICES.get('grisha', {}), 'lang': 'uk-UA', 'fx': 'none' }
         }
-        return jsonify({
+        resp = jsonify({
             'success': True,
             'agents': agents,
             'availableVoices': voices_list,
             'locale': 'uk-UA'
         })
+        # Changes only when the backends' voices change; clients revalidate with If-None-Match
+        return _conditional(resp, f"{_AGENTS_ETAG}-{voice_registry.snapshot.etag}")
     except Exception as e:
         logger.error(f"Error building voice agents: {e}")
         return jsonify({'success': False, 'error': 'Failed to build agents'}), 500
 
+def _probe_orchestrator() -> str:
+    """One orchestrator health check (runs on the prober thread)"""
+    if not orchestrator_breaker.allow():
+        return 'stopped'
+    try:
+        response = http.get(f'{ORCHESTRATOR_URL}/health', timeout=5)
+    except Exception:
+        orchestrator_breaker.record_failure()
+        return 'stopped'
+    # Same rule as the chat path and the TTS prober: only 5xx counts against the breaker
+    if response.status_code >= 500:
+        orchestrator_breaker.record_failure()
+    else:
+        orchestrator_breaker.record_success()
+    return 'running' if response.status_code == 200 else 'error'
+
+def _probe_tts_backend(base: str) -> str:
+    """One TTS backend health check; talks to `base` directly (no round-robin)"""
+    breaker = _tts_breaker(base)
+    if not breaker.allow():
+        return 'stopped'
+    try:
+        response = http.get(f"{base}/health", timeout=3)
+    except Exception:
+        breaker.record_failure()
+        return 'stopped'
+    _record_tts_result(base, response.status_code)
+    if response.status_code != 200:
+        return 'error'
+    try:
+        payload = response.json()
+    except Exception:
+        payload = None
+    # Details are applied through the prober so other workers get them too
+    return 'running', payload if isinstance(payload, dict) else None
+
 def check_orchestrator_health():
-    """Check if orchestrator is responding"""
+    """Last known orchestrator status from the background prober"""
     if not requests:
         return 'unavailable'
-    try:
-        response = requests.get(f'{ORCHESTRATOR_URL}/health', timeout=5)
-        return 'running' if response.status_code == 200 else 'error'
-    except:
-        return 'stopped'
+    return health_prober.status('orchestrator')
+
+def _update_tts_backend_status(base: str, payload: dict):
+    """Apply capacity and load a backend advertises in /health"""
+    if not isinstance(payload, dict):
+        return
+    if payload.get('capacity'):
+        tts_admission.set_capacity(base, payload.get('capacity'))
+    if 'in_flight' in payload or 'queue_depth' in payload:
+        tts_balancer.update_load(base, payload.get('in_flight'), payload.get('queue_depth'))
 
 def check_tts_health():
-    """Check if TTS server is responding"""
+    """Last known TTS status: running if any backend answered its last probe"""
     if not requests:
-        return 'fallback'
-    try:
-        # Try multiple backends quickly
-        for _ in range(len(_tts_endpoints)):
-            try:
-                r, base = _tts_get('/health', timeout=3)
-                if r.status_code == 200:
-                    return 'running'
-            except Exception:
-                continue
-        return 'error'
-    except:
         return 'fallback'  # Can use browser TTS
+    statuses = [health_prober.status(f"tts:{b}") for b in _tts_endpoints]
+    if 'running' in statuses:
+        return 'running'
+    if all(st == 'unknown' for st in statuses):
+        return 'unknown'
+    return 'error'
+
+# Voices of all TTS backends, refreshed in the background
+voice_registry = VoiceRegistry(
+    fetch=_fetch_tts_voices,
+    backends=lambda: list(_tts_endpoints),
+    refresh_interval=float(os.environ.get('TTS_VOICES_REFRESH', 60)),
+    shared=shared_state
+)
+
+# Upstream health is probed in the background; status endpoints read the snapshot
+health_prober = HealthProber(
+    interval=float(os.environ.get('HEALTH_PROBE_INTERVAL', 10)),
+    down_interval=float(os.environ.get('HEALTH_PROBE_DOWN_INTERVAL', 5)),
+    shared=shared_state
+)
+if requests:
+    health_prober.register('orchestrator', _probe_orchestrator)
+    for _base in _tts_endpoints:
+        health_prober.register(f"tts:{_base}", lambda b=_base: _probe_tts_backend(b),
+                               apply=lambda payload, b=_base: _update_tts_backend_status(b, payload))
+    health_prober.start()
+    voice_registry.start()
+# Goose address and transport are resolved in the background; /api/health reports readiness
+goose_client.start_discovery()
+
+
+def _collect_metrics():
+    """Scrape-time samples from the stats the components already keep"""
+    cache = audio_cache.stats()
+    yield ('atlas_audio_cache_lookups_total', 'counter', 'Audio cache lookups by result', [
+        ({'result': 'hit_memory'}, cache['hits_memory']),
+        ({'result': 'hit_disk'}, cache['hits_disk']),
+        ({'result': 'miss'}, cache['misses']),
+    ])
+    yield ('atlas_audio_cache_hit_ratio', 'gauge', 'Share of audio cache lookups served from cache',
+           [({}, cache['hit_ratio'])])
+    yield ('atlas_audio_cache_bytes', 'gauge', 'Audio cache size by tier', [
+        ({'tier': 'memory'}, cache['memory_bytes']),
+        ({'tier': 'disk'}, cache['disk_bytes']),
+    ])
+    admission = tts_admission.stats()
+    yield ('atlas_tts_admission_waiting', 'gauge', 'Requests queued for a TTS slot',
+           [({}, admission['waiting'])])
+    yield ('atlas_tts_admission_rejected_total', 'counter', 'Requests refused a TTS slot', [
+        ({'reason': 'queue_full'}, admission['rejected_full']),
+        ({'reason': 'queue_timeout'}, admission['rejected_timeout']),
+        ({'reason': 'cancelled'}, admission['cancelled']),
+    ])
+    yield ('atlas_tts_backend_in_flight', 'gauge', 'Busy synthesis slots per TTS backend',
+           [({'backend': b}, v['in_flight']) for b, v in admission['backends'].items()])
+    yield ('atlas_tts_backend_capacity', 'gauge', 'Synthesis slots per TTS backend',
+           [({'backend': b}, v['capacity']) for b, v in admission['backends'].items()])
+    inflight = inflight_ops.stats()
+    yield ('atlas_inflight_operations', 'gauge', 'Cancellable per-session operations in flight by kind',
+           [({'kind': k}, v) for k, v in inflight['by_kind'].items()])
+    yield ('atlas_cancelled_operations_total', 'counter', 'Operations cancelled by session interrupts',
+           [({}, inflight['cancelled'])])
+    coalescing = tts_inflight.stats()
+    yield ('atlas_tts_coalesced_total', 'counter', 'Synthesis requests served by an identical in-flight one',
+           [({}, coalescing['coalesced'])])
+    hedging = tts_hedger.stats()
+    yield ('atlas_tts_hedges_total', 'counter', 'Hedged TTS requests by winner', [
+        ({'winner': 'hedge'}, hedging.get('hedge_wins', 0)),
+        ({'winner': 'primary'}, hedging.get('primary_wins', 0)),
+    ])
+    yield ('atlas_circuit_open', 'gauge', 'Circuit breaker state (1 = open or half-open)',
+           [({'name': name}, 0 if b['state'] == 'closed' else 1) for name, b in breakers_snapshot().items()])
+    yield ('atlas_upstream_up', 'gauge', 'Last background health check result (1 = running)',
+           [({'target': name}, 1 if c['status'] == 'running' else 0) for name, c in health_prober.snapshot().items()])
+    yield ('atlas_log_stream_subscribers', 'gauge', 'Open /logs/stream connections',
+           [({}, log_hub.stats()['clients'])])
+
+metrics.collector(_collect_metrics)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
+
+@app.route('/api/traces')
+def recent_traces():
+    """Most recent traces of this worker, newest first"""
+    if trace_sink is None:
+        return jsonify({'success': False, 'error': 'Tracing disabled'}), 404
+    limit = max(1, min(int(request.args.get('limit', 50)), 500))
+    return jsonify({'success': True, 'traces': trace_sink.recent(limit)})
+
+@app.route('/api/traces/<trace_id>')
+def get_trace(trace_id):
+    """All spans of one request plus the time spent per stage"""
+    if trace_sink is None:
+        return jsonify({'success': False, 'error': 'Tracing disabled'}), 404
+    spans = trace_sink.trace(trace_id)
+    if not spans:
+        return jsonify({'success': False, 'error': 'Trace not found'}), 404
+    stages = {}
+    for s in spans:
+        stages[s['name']] = round(stages.get(s['name'], 0.0) + s['duration_ms'], 3)
+    return jsonify({'success': True, 'trace_id': trace_id, 'spans': spans, 'stages_ms': stages})
+
+
+def _translation_not_needed(text: str, source: str, target: str) -> bool:
+    # For now, perform a no-op for non-English or already Ukrainian, to avoid bad machine output
+    return target.startswith('uk') and (source == 'uk' or 'а' in text or 'і' in text or 'є' in text or 'ї' in text)
+
+def _translation_prompt(text: str) -> str:
+    return f"Переклади українською коротко і природно: {text}"
+
+TRANSLATE_BATCH_MAX = int(os.environ.get('TRANSLATE_BATCH_MAX', 50))
+
+def _translation_batch(texts: list, source: str, target: str):
+    """Split a `texts` batch into (results, indexes that need Goose); passthrough entries are already filled"""
+    results, pending = [None] * len(texts), []
+    for i, text in enumerate(texts):
+        if not text.strip() or _translation_not_needed(text, source, target):
+            results[i] = {'text': text, 'detected': 'uk' if text.strip() else source}
+        else:
+            pending.append(i)
+    return results, pending
+
+def _translation_result(text: str, source: str, reply: Optional[dict]) -> dict:
+    """One translated entry; the original text when Goose failed"""
+    if reply and reply.get('success'):
+        return {'text': reply.get('response', text), 'detected': source or 'auto'}
+    entry = {'text': text, 'detected': source or 'auto', 'note': 'noop'}
+    if reply and reply.get('error'):
+        entry['error'] = reply['error']
+    return entry
 
+def _translation_texts(data: dict):
+    """The `texts` list of a batch request, or an error message"""
+    texts = data.get('texts')
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+        return None, 'texts must be a non-empty list of strings'
+    if len(texts) > TRANSLATE_BATCH_MAX:
+        return None, f'At most {TRANSLATE_BATCH_MAX} texts per request'
+    return texts, None
 
 @app.route('/api/translate', methods=['POST'])
 def translate_api():
     """Lightweight translation endpoint (en->uk by default). Uses Goose as a stub if available.
-    Body: { text: str, source?: str, target?: str }
+    Body: { text: str, source?: str, target?: str } or { texts: [str], ... } for a batch;
+    a batch is translated in parallel and answered as { results: [{text, detected}], texts: [str] }.
     """
     try:
         data = request.get_json(force=True) or {}
         text = data.get('text', '')
         source = (data.get('source') or '').lower() or 'auto'
         target = (data.get('target') or '').lower() or 'uk'
+        if 'texts' in data:
+            texts, error = _translation_texts(data)
+            if error:
+                return jsonify({'success': False, 'error': error}), 400
+            results, pending = _translation_batch(texts, source, target)
+            replies = goose_client.send_many([_translation_prompt(texts[i]) for i in pending],
+                                             lane_prefix='atlas_translate')
+            for i, reply in zip(pending, replies):
+                results[i] = _translation_result(texts[i], source, reply)
+            return jsonify({'success': True, 'results': results, 'texts': [r['text'] for r in results]})
         if not text.strip():
             return jsonify({'success': False, 'error': 'Text is required'}), 400
 
-        # For now, perform a no-op for non-English or already Ukrainian, to avoid bad machine output
-        if target.startswith('uk') and (source == 'uk' or 'а' in text or 'і' in text or 'є' in text or 'ї' in text):
+        if _translation_not_needed(text, source, target):
             return jsonify({'success': True, 'text': text, 'detected': 'uk'})
 
         # Try Goose paraphrase to Ukrainian (placeholder). If unavailable, return original.
         try:
-            prompt = f"Переклади українською коротко і природно: {text}"
-            result = goose_client.send_reply('atlas_translate', prompt)
+            result = goose_client.send_reply('atlas_translate', _translation_prompt(text))
             if result.get('success'):
                 return jsonify({'success': True, 'text': result.get('response', text), 'detected': source or 'auto'})
         except Exception as e:
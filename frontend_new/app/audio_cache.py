@@ -0,0 +1,234 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Two tiers: an in-memory LRU bounded by total bytes and an on-disk store
+with size-based eviction (oldest files by mtime are removed first).
+Entries are keyed by a hash of the normalized synthesis parameters, so the
+same phrase spoken with the same voice/speed/fx/format is synthesized once.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Tuple
+
+logger = logging.getLogger('atlas.audio_cache')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic differences do not miss the cache"""
+    return ' '.join(str(text or '').split())
+
+
+def make_cache_key(text: str, voice: str, speed: float, fx: Optional[str], fmt: str = 'wav',
+                   sample_rate: Optional[int] = None) -> str:
+    """Build a stable content address for a synthesis request"""
+    fx_norm = str(fx or 'none').strip().lower()
+    fields = {
+        'text': normalize_text(text),
+        'voice': str(voice or '').strip(),
+        'speed': round(float(speed), 2),
+        'fx': fx_norm,
+        'format': str(fmt or 'wav').lower(),
+    }
+    if sample_rate:
+        # Only when resampling, so keys of native-rate entries stay unchanged
+        fields['sample_rate'] = int(sample_rate)
+    material = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+_DISK_BYTES_COUNTER = 'audio_cache:disk_bytes'
+
+
+class AudioCache:
+    """Two-tier (memory LRU + disk) cache of encoded audio bytes"""
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 memory_limit_bytes: int = 32 * 1024 * 1024,
+                 disk_limit_bytes: int = 512 * 1024 * 1024,
+                 max_entry_bytes: int = 8 * 1024 * 1024,
+                 shared=None):
+        # Optional SharedState: keeps disk usage as one counter across worker processes
+        self.shared = shared
+        self.memory_limit_bytes = max(0, int(memory_limit_bytes))
+        self.disk_limit_bytes = max(0, int(disk_limit_bytes))
+        self.max_entry_bytes = max(0, int(max_entry_bytes))
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_bytes = 0
+        self._lock = Lock()
+        self._stats = {
+            'hits_memory': 0,
+            'hits_disk': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions_memory': 0,
+            'evictions_disk': 0,
+        }
+        self.cache_dir = None
+        self._disk_bytes = 0
+        if cache_dir and self.disk_limit_bytes > 0:
+            try:
+                cache_dir = Path(cache_dir)
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                self.cache_dir = cache_dir
+                self._disk_bytes = self._scan_disk_bytes()
+                if self.shared is not None:
+                    self.shared.set_counter(_DISK_BYTES_COUNTER, self._disk_bytes)
+            except Exception as e:
+                logger.warning(f"Audio disk cache disabled ({cache_dir}): {e}")
+                self.cache_dir = None
+
+    def get(self, key: str) -> Tuple[Optional[bytes], str]:
+        """Return (data, tier) where tier is 'memory', 'disk' or 'miss'"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats['hits_memory'] += 1
+                return data, 'memory'
+        data = self._disk_read(key)
+        if data is not None:
+            with self._lock:
+                self._stats['hits_disk'] += 1
+                self._memory_put(key, data)
+            return data, 'disk'
+        with self._lock:
+            self._stats['misses'] += 1
+        return None, 'miss'
+
+    def put(self, key: str, data: bytes) -> bool:
+        """Store encoded audio in both tiers; oversized entries are skipped"""
+        if not data or (self.max_entry_bytes and len(data) > self.max_entry_bytes):
+            return False
+        with self._lock:
+            self._memory_put(key, data)
+            self._stats['stores'] += 1
+        self._disk_write(key, data)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_bytes
+        shared_bytes = self.shared.counter(_DISK_BYTES_COUNTER) if self.shared is not None else None
+        stats['disk_bytes'] = self._disk_bytes if shared_bytes is None else shared_bytes
+        stats['disk_enabled'] = self.cache_dir is not None
+        lookups = stats['hits_memory'] + stats['hits_disk'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits_memory'] + stats['hits_disk']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    # --- memory tier (caller holds self._lock) ---
+
+    def _memory_put(self, key: str, data: bytes):
+        if self.memory_limit_bytes <= 0 or len(data) > self.memory_limit_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_limit_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats['evictions_memory'] += 1
+
+    # --- disk tier ---
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def _scan_disk_bytes(self) -> int:
+        total = 0
+        for p in self.cache_dir.glob('*.bin'):
+            try:
+                total += p.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Audio cache read failed for {path.name}: {e}")
+            return None
+        try:
+            # Touch so eviction treats recently used entries as fresh
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data or None
+
+    def _disk_write(self, key: str, data: bytes):
+        if not self.cache_dir or len(data) > self.disk_limit_bytes:
+            return
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.cache_dir), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.debug(f"Audio cache write failed for {path.name}: {e}")
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            self._disk_bytes += len(data)
+            total = self._disk_bytes
+        if self.shared is not None:
+            # Other workers write to the same directory; their bytes count too
+            shared_total = self.shared.incr(_DISK_BYTES_COUNTER, len(data))
+            if shared_total is not None:
+                total = shared_total
+        if total > self.disk_limit_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove least recently used files until the store fits its budget"""
+        try:
+            entries = []
+            for p in self.cache_dir.glob('*.bin'):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            # Evict down to 90% of the budget so we do not rescan on every write
+            target = int(self.disk_limit_bytes * 0.9)
+            evicted = 0
+            for _, size, p in entries:
+                if total <= target:
+                    break
+                try:
+                    p.unlink()
+                    total -= size
+                    evicted += 1
+                except OSError:
+                    continue
+            with self._lock:
+                self._disk_bytes = total
+                self._stats['evictions_disk'] += evicted
+            if self.shared is not None:
+                self.shared.set_counter(_DISK_BYTES_COUNTER, total)
+        except Exception as e:
+            logger.warning(f"Audio disk cache eviction failed: {e}")
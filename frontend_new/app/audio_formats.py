@@ -0,0 +1,99 @@
+"""
+Audio format negotiation for synthesized speech.
+
+Clients pick an encoding with a `format` field or the Accept header; the TTS
+backend encodes it (soundfile: WAV, FLAC, OGG/Vorbis, OGG/Opus), optionally
+downsampled for speech. The encoded bytes are what the audio cache stores,
+so the format is part of the cache key. Responses are labelled by sniffing
+the bytes, which also covers older backends that always answer with WAV.
+"""
+from typing import Optional, Tuple
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    'wav': ('audio/wav', 'wav'),
+    'flac': ('audio/flac', 'flac'),
+    'ogg': ('audio/ogg', 'ogg'),
+    'opus': ('audio/ogg; codecs=opus', 'opus'),
+}
+DEFAULT_FORMAT = 'wav'
+# Rates a client may ask for (Opus itself only encodes 8/12/16/24/48 kHz)
+SAMPLE_RATES = (8000, 16000, 22050, 24000, 48000)
+
+_MEDIA_TYPES = {
+    'audio/wav': 'wav', 'audio/wave': 'wav', 'audio/x-wav': 'wav', 'audio/vnd.wave': 'wav',
+    'audio/flac': 'flac', 'audio/x-flac': 'flac',
+    'audio/ogg': 'ogg', 'audio/vorbis': 'ogg',
+    'audio/opus': 'opus',
+}
+_ALIASES = {'vorbis': 'ogg', 'oga': 'ogg', 'ogg_opus': 'opus', 'wave': 'wav'}
+
+
+def _from_accept(accept: str) -> Optional[str]:
+    """Best concrete audio format in an Accept header (wildcards are ignored)"""
+    best, best_q = None, 0.0
+    for item in accept.split(','):
+        parts = [p.strip() for p in item.split(';')]
+        media = parts[0].lower()
+        q, codecs = 1.0, ''
+        for param in parts[1:]:
+            name, _, value = param.partition('=')
+            name = name.strip().lower()
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+            elif name == 'codecs':
+                codecs = value.strip().strip('"').lower()
+        fmt = _MEDIA_TYPES.get(media)
+        if fmt == 'ogg' and codecs == 'opus':
+            fmt = 'opus'
+        if fmt and q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def negotiate(requested: Optional[str], accept: Optional[str]) -> str:
+    """`format` field first, then the Accept header, else WAV.
+    Raises ValueError for an unknown explicit format."""
+    if requested:
+        fmt = str(requested).strip().lower()
+        fmt = _ALIASES.get(fmt, fmt)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported audio format: {requested} (use one of {', '.join(FORMATS)})")
+        return fmt
+    return _from_accept(accept or '') or DEFAULT_FORMAT
+
+
+def parse_sample_rate(value) -> Optional[int]:
+    """Requested output rate, or None for the model's native rate. Raises ValueError."""
+    if value in (None, '', 0, '0'):
+        return None
+    try:
+        rate = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid sample_rate: {value}")
+    if rate not in SAMPLE_RATES:
+        raise ValueError(f"Unsupported sample_rate: {rate} (use one of {', '.join(map(str, SAMPLE_RATES))})")
+    return rate
+
+
+def from_content_type(value: Optional[str]) -> str:
+    """Format named by a Content-Type header (WAV when unrecognized)"""
+    return _from_accept(value or '') or DEFAULT_FORMAT
+
+
+def sniff(data: bytes) -> str:
+    """Format of encoded audio bytes (WAV when unrecognized)"""
+    head = data[:64]
+    if head.startswith(b'fLaC'):
+        return 'flac'
+    if head.startswith(b'OggS'):
+        return 'opus' if b'OpusHead' in head else 'ogg'
+    return 'wav'
+
+
+def content_type(data: bytes) -> Tuple[str, str]:
+    """(mimetype, extension) for encoded audio bytes"""
+    return FORMATS[sniff(data)]
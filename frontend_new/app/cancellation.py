@@ -0,0 +1,183 @@
+"""
+Per-session registry of in-flight operations.
+
+Every upstream call made on behalf of a chat session (TTS synthesis, the
+orchestrator stream, Goose replies) registers a CancelToken under the
+session ID. When the user interrupts ("стоп"), cancel_session() fires all of
+that session's tokens: queued TTS jobs leave the admission queue, streaming
+upstream responses are closed and blocking waits return early, so backend
+capacity frees up right away instead of when the abandoned work finishes.
+
+Tokens are passed explicitly to the code that can be interrupted. Work of a
+client that sent no session ID gets a token that is not registered, so no
+interrupt can reach it. The registry is per process; with several workers
+an interrupt cancels what runs in the worker that received it (the TTS
+servers are told separately).
+"""
+import itertools
+import logging
+import socket
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from time import monotonic
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger('atlas.cancellation')
+
+
+class Cancelled(Exception):
+    """Raised when an operation is abandoned because its session was interrupted"""
+
+    def __init__(self, reason: str = 'cancelled'):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """One cancellable operation; callbacks run once, on the cancelling thread"""
+
+    def __init__(self, session_id: Optional[str], kind: str):
+        self.session_id = session_id
+        self.kind = kind
+        self.created = monotonic()
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._ids = itertools.count()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = 'cancelled') -> bool:
+        """Cancel and run the registered callbacks; False if it was already cancelled"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancel callback for {self.kind} failed: {e}")
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run `callback` on cancellation (now, if already cancelled); returns a remover"""
+        with self._lock:
+            if not self._event.is_set():
+                key = next(self._ids)
+                self._callbacks[key] = callback
+                return lambda: self._callbacks.pop(key, None)
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason or 'cancelled')
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep up to `timeout` seconds; True if cancelled meanwhile"""
+        return self._event.wait(timeout)
+
+
+def result(future: Future, timeout: Optional[float] = None, cancel: Optional[CancelToken] = None) -> Any:
+    """future.result(), but returns early by raising Cancelled when `cancel` fires"""
+    if cancel is None:
+        return future.result(timeout=timeout)
+    settled = threading.Event()
+    future.add_done_callback(lambda _: settled.set())
+    remove = cancel.on_cancel(settled.set)
+    try:
+        settled.wait(timeout)
+    finally:
+        remove()
+    if not future.done():
+        cancel.raise_if_cancelled()
+    return future.result(timeout=0)
+
+
+def abort_response(response) -> None:
+    """Close a streaming `requests` response from another thread.
+    close() alone does not wake a thread blocked reading the socket; shutting the socket down does."""
+    raw = getattr(response, 'raw', None)
+    conn = getattr(raw, 'connection', None) or getattr(raw, '_connection', None)
+    sock = getattr(conn, 'sock', None)
+    if sock is None:
+        # urllib3 2.x detaches the socket from the connection once the body is being read;
+        # it is still reachable through http.client's buffered socket file
+        fp = getattr(getattr(raw, '_fp', None), 'fp', None)
+        sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+class InFlightRegistry:
+    """session ID -> tokens of the operations running for it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, set] = {}
+        self._stats = {'registered': 0, 'cancelled': 0, 'interrupts': 0}
+
+    def register(self, session_id: Optional[str], kind: str) -> CancelToken:
+        """Token for one operation; registered under the session only if there is one"""
+        token = CancelToken(str(session_id) if session_id else None, kind)
+        if token.session_id is None:
+            return token
+        with self._lock:
+            self._sessions.setdefault(token.session_id, set()).add(token)
+            self._stats['registered'] += 1
+        return token
+
+    def unregister(self, token: CancelToken) -> None:
+        with self._lock:
+            tokens = self._sessions.get(token.session_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._sessions[token.session_id]
+
+    @contextmanager
+    def track(self, session_id: Optional[str], kind: str):
+        """Register an operation for the duration of the block"""
+        token = self.register(session_id, kind)
+        try:
+            yield token
+        finally:
+            self.unregister(token)
+
+    def cancel_session(self, session_id: str, reason: str = 'interrupt') -> int:
+        """Cancel everything in flight for the session; returns how many operations were cancelled"""
+        if not session_id:
+            return 0
+        with self._lock:
+            tokens = list(self._sessions.pop(str(session_id), ()))
+            self._stats['interrupts'] += 1
+        cancelled = sum(1 for token in tokens if token.cancel(reason))
+        with self._lock:
+            self._stats['cancelled'] += cancelled
+        if cancelled:
+            logger.info(f"Session {session_id}: cancelled {cancelled} in-flight operation(s) ({reason})")
+        return cancelled
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            by_kind: Dict[str, int] = {}
+            for tokens in self._sessions.values():
+                for token in tokens:
+                    by_kind[token.kind] = by_kind.get(token.kind, 0) + 1
+            stats['sessions'] = len(self._sessions)
+        stats['in_flight'] = sum(by_kind.values())
+        stats['by_kind'] = by_kind
+        return stats
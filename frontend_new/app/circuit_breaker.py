@@ -0,0 +1,187 @@
+"""
+Circuit breaker for upstream dependencies (TTS backends, orchestrator, Goose).
+
+States:
+  closed    - calls pass; outcomes are recorded in a sliding time window and the
+              circuit opens when the failure rate crosses the threshold.
+  open      - calls fail fast with CircuitOpenError until the open period ends.
+  half_open - a single probe decides: with a probe callable it runs once in a
+              background thread while callers keep failing fast; without one,
+              exactly one caller is let through as the trial request.
+"""
+import logging
+import threading
+from collections import deque
+from time import monotonic
+from typing import Callable, Optional
+
+logger = logging.getLogger('atlas.circuit_breaker')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit '{name}' is open (retry in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = max(0.0, retry_in)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with half-open probing"""
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 3,
+                 window: float = 30.0, open_seconds: float = 10.0, max_open_seconds: float = 60.0,
+                 probe: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.failure_rate = float(failure_rate)
+        self.min_calls = max(1, int(min_calls))
+        self.window = float(window)
+        self.base_open_seconds = float(open_seconds)
+        self.max_open_seconds = float(max_open_seconds)
+        self.probe = probe
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._events = deque()  # (timestamp, ok)
+        self._open_seconds = self.base_open_seconds
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0, 'probes': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed now (may move open -> half-open)"""
+        start_probe = False
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and monotonic() - self._opened_at >= self._open_seconds:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+                start_probe = self.probe is not None
+                logger.info(f"Circuit '{self.name}' half-open")
+            if self._state == HALF_OPEN and self.probe is None and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+        if start_probe:
+            threading.Thread(target=self._run_probe, name=f"probe-{self.name}", daemon=True).start()
+        return False
+
+    def check(self) -> None:
+        """Raise CircuitOpenError when the call must fail fast"""
+        if not self.allow():
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._state == CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self._open_seconds - monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._stats['successes'] += 1
+            if self._state != CLOSED:
+                self._close()
+                return
+            self._append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._stats['failures'] += 1
+            if self._state == HALF_OPEN:
+                self._open(backoff=True)
+                return
+            if self._state == OPEN:
+                return
+            self._append(False)
+            calls = len(self._events)
+            failures = sum(1 for _, ok in self._events if not ok)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._open(backoff=False)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._prune()
+            calls = len(self._events)
+            failures = sum(1 for _, ok in self._events if not ok)
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'window_failure_rate': round(failures / calls, 3) if calls else 0.0,
+                'retry_in': round(max(0.0, self._opened_at + self._open_seconds - monotonic()), 1)
+                if self._state != CLOSED else 0.0,
+                **self._stats,
+            }
+
+    # --- internals (caller holds self._lock) ---
+
+    def _append(self, ok: bool):
+        self._events.append((monotonic(), ok))
+        self._prune()
+
+    def _prune(self):
+        cutoff = monotonic() - self.window
+        while self._events and self._events[0][0] < cutoff:
+            self._events.popleft()
+
+    def _open(self, backoff: bool):
+        if backoff:
+            self._open_seconds = min(self.max_open_seconds, self._open_seconds * 2)
+        else:
+            self._open_seconds = self.base_open_seconds
+        self._state = OPEN
+        self._opened_at = monotonic()
+        self._trial_in_flight = False
+        self._stats['opened'] += 1
+        logger.warning(f"Circuit '{self.name}' opened for {self._open_seconds:.0f}s")
+
+    def _close(self):
+        self._state = CLOSED
+        self._events.clear()
+        self._open_seconds = self.base_open_seconds
+        self._trial_in_flight = False
+        logger.info(f"Circuit '{self.name}' closed")
+
+    def _run_probe(self):
+        with self._lock:
+            self._stats['probes'] += 1
+        try:
+            ok = bool(self.probe())
+        except Exception as e:
+            logger.debug(f"Circuit '{self.name}' probe failed: {e}")
+            ok = False
+        if ok:
+            self.record_success()
+        else:
+            self.record_failure()
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Return the process-wide breaker for `name`, creating it on first use"""
+    with _registry_lock:
+        breaker = _registry.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _registry[name] = breaker
+        return breaker
+
+
+def breakers_snapshot() -> dict:
+    with _registry_lock:
+        breakers = list(_registry.values())
+    return {b.name: b.snapshot() for b in breakers}
@@ -1,21 +1,98 @@
 import json
 import time
 import os
+import queue
 import requests
 import aiohttp
 import asyncio
+import threading
+import weakref
+from concurrent.futures import CancelledError as FutureCancelled
+import cancellation
+from cancellation import Cancelled
+from circuit_breaker import CircuitOpenError, get_breaker
+from goose_ws_pool import get_pool
+from metrics import REGISTRY
+import tracing
+
+# Час відповіді Goose за транспортом (ws / sse), для /metrics
+GOOSE_LATENCY = REGISTRY.histogram('atlas_goose_request_duration_seconds',
+                                   'Goose reply time by transport', ['transport', 'outcome'])
 
 class GooseClient:
     """Клієнт для взаємодії з Goose (web/ws або goosed /reply SSE)."""
 
-    def __init__(self, base_url: str | None = None, secret_key: str | None = None):
-        # Порядок пріоритетів: аргумент -> env -> авто-вибір
-        env_url = os.getenv('GOOSE_BASE_URL')
-        self.base_url = base_url or env_url or self._auto_pick_goose_url()
+    def __init__(self, base_url: str | None = None, secret_key: str | None = None, exclude_urls=()):
+        # Порядок пріоритетів: аргумент -> env -> авто-вибір. Авто-вибір опитує порти
+        # і може тривати секунди, тому робиться не тут, а у фоні або при першому використанні.
+        # exclude_urls - адреси інших сервісів (напр. TTS на 3001), які авто-вибір не повинен взяти за Goose
+        self._base_url = base_url or os.getenv('GOOSE_BASE_URL') or None
+        self._exclude = {self._normalize_url(u) for u in exclude_urls if u}
+        self._discovery_lock = threading.Lock()
+        self._discovering = False
         self.secret_key = secret_key or os.getenv('GOOSE_SECRET_KEY', 'test')
+        # Визначений транспорт (ws / sse) кешується на transport_ttl секунд
+        # і скидається раніше лише тоді, коли обраний транспорт дав збій
+        self.transport_ttl = float(os.getenv('GOOSE_TRANSPORT_TTL', '300'))
+        self._transport = None
+        self._transport_checked = 0.0
+        self._transport_lock = threading.Lock()
+        # asyncio.Lock прив'язаний до свого циклу подій, а клієнт працює на кількох (ASGI, пул)
+        self._transport_async_locks = weakref.WeakKeyDictionary()
+        self._transport_stats = {'probes': 0, 'invalidations': 0}
+        # Скільки запитів send_many виконує одночасно, якщо не вказано явно
+        self.batch_concurrency = int(os.getenv('GOOSE_BATCH_CONCURRENCY', '4'))
+        # Постійні ws-з'єднання на сесію, спільні для всіх клієнтів процесу
+        self.ws_pool = get_pool()
+
+    @property
+    def base_url(self) -> str:
+        if self._base_url is None:
+            self._discover()
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, value: str):
+        self._base_url = value
+
+    def _discover(self):
+        with self._discovery_lock:
+            if self._base_url is None:
+                self._discovering = True
+                try:
+                    self._base_url = self._auto_pick_goose_url()
+                finally:
+                    self._discovering = False
+
+    def start_discovery(self):
+        """Визначає адресу і транспорт у фоновому потоці, щоб старт сервера і перший запит їх не чекали"""
+        threading.Thread(target=self._warm_up, name='goose-discovery', daemon=True).start()
+
+    def _warm_up(self):
+        try:
+            self._discover()
+            self._transport_mode()
+        except Exception:
+            pass  # перший запит спробує ще раз
+
+    def readiness(self) -> dict:
+        """Стан ініціалізації для /api/health: ready, коли адреса і транспорт уже відомі"""
+        if self._base_url is not None and self._transport is not None:
+            state = 'ready'
+        elif self._discovering or self._transport_lock.locked():
+            state = 'discovering'
+        else:
+            state = 'pending'
+        return {"state": state, "base_url": self._base_url, "transport": self._transport}
+
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        return url.strip().rstrip('/').replace('://localhost', '://127.0.0.1')
 
     def _auto_pick_goose_url(self) -> str:
         for base in ("http://127.0.0.1:3000", "http://127.0.0.1:3001"):
+            if base in self._exclude:
+                continue
             for ep in ("/status", "/api/health", "/"):
                 try:
                     r = requests.get(f"{base}{ep}", timeout=2)
@@ -39,94 +116,386 @@ class GooseClient:
         except Exception:
             return False
 
-    def send_reply(self, session_name: str, message: str, timeout: int = 90) -> dict:
-        if self._is_web():
-            try:
-                return asyncio.run(self._via_ws(session_name, message, timeout))
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                try:
-                    asyncio.set_event_loop(loop)
-                    return loop.run_until_complete(self._via_ws(session_name, message, timeout))
-                finally:
-                    asyncio.set_event_loop(None)
-                    loop.close()
-        return self._via_sse(session_name, message, timeout)
+    async def _is_web_async(self) -> bool:
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=3)) as session:
+                async with session.get(f"{self.base_url}/api/health") as r:
+                    return r.status == 200
+        except Exception:
+            return False
 
-    async def _via_ws(self, session_name: str, message: str, timeout: int):
-        ws_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws"
-        payload = {"type": "message", "content": message, "session_id": session_name, "timestamp": int(time.time()*1000)}
+    def _transport_fresh(self) -> bool:
+        return self._transport is not None and time.monotonic() - self._transport_checked < self.transport_ttl
+
+    def _store_transport(self, is_web: bool) -> str:
+        self._transport = 'ws' if is_web else 'sse'
+        self._transport_checked = time.monotonic()
+        self._transport_stats['probes'] += 1
+        return self._transport
+
+    def _transport_mode(self) -> str:
+        if self._transport_fresh():
+            return self._transport
+        # Під замком: паралельні запити чекають одну пробу замість робити кожен свою
+        with self._transport_lock:
+            if self._transport_fresh():
+                return self._transport
+            return self._store_transport(self._is_web())
+
+    async def _transport_mode_async(self) -> str:
+        if self._transport_fresh():
+            return self._transport
+        loop = asyncio.get_running_loop()
+        lock = self._transport_async_locks.get(loop)
+        if lock is None:
+            lock = self._transport_async_locks[loop] = asyncio.Lock()
+        # Як і в синхронному шляху: одна проба на всіх, хто чекає
+        async with lock:
+            if self._transport_fresh():
+                return self._transport
+            return self._store_transport(await self._is_web_async())
+
+    def _invalidate_transport(self, transport: str):
+        """Обраний транспорт не спрацював - наступне повідомлення визначить його заново"""
+        with self._transport_lock:
+            if self._transport == transport:
+                self._transport = None
+                self._transport_stats['invalidations'] += 1
+
+    def _check_transport(self, transport: str, result):
+        # Відмова з'єднання чи HTTP-помилка означає, що вибір міг застаріти;
+        # скасування та помилки самої моделі кеш не чіпають
+        if result is None or (not result.get("cancelled") and str(result.get("error", "")).startswith("HTTP ")):
+            self._invalidate_transport(transport)
+
+    def transport_status(self) -> dict:
+        """Поточний транспорт і вік його визначення (для /api/status)"""
+        mode = self._transport
+        age = round(time.monotonic() - self._transport_checked, 1) if mode else None
+        return {"mode": mode, "age_seconds": age, "ttl_seconds": self.transport_ttl,
+                "base_url": self._base_url, **self._transport_stats}
+
+    def _breaker(self):
+        # Окремий автомат на кожен base_url; у half-open стан перевіряє фонова проба
+        return get_breaker(f"goose:{self.base_url}", probe=lambda: self._is_web() or self._is_goosed())
+
+    def send_reply(self, session_name: str, message: str, timeout: int = 90, cancel=None) -> dict:
+        """Синхронна обгортка над send_reply_async для потоків Flask.
+        cancel - необов'язковий CancelToken; після його спрацювання відповідь
+        обривається і повертається {"success": False, "cancelled": True}"""
+        if cancel is not None and cancel.cancelled:
+            return self._cancelled(cancel)
+        future = self.ws_pool.submit(self._traced(self.send_reply_async(session_name, message, timeout)))
+        remove = cancel.on_cancel(future.cancel) if cancel else None
+        try:
+            return cancellation.result(future, None, cancel)
+        except (Cancelled, FutureCancelled):
+            return self._cancelled(cancel)
+        finally:
+            if remove is not None:
+                remove()
+
+    def iter_reply(self, session_name: str, message: str, timeout: int = 90, cancel=None):
+        """Синхронний ітератор подій stream_reply (для потокових відповідей Flask).
+        Після скасування через cancel останньою подією йде {"type": "cancelled"}"""
+        if cancel is not None and cancel.cancelled:
+            yield {"type": "cancelled", "reason": cancel.reason}
+            return
+        events = queue.Queue()
+
+        async def pump():
+            async for event in self.stream_reply(session_name, message, timeout):
+                events.put(event)
+
+        future = self.ws_pool.submit(self._traced(pump()))
+        # Кінець потоку позначає None - і після завершення, і після скасування задачі
+        future.add_done_callback(lambda _: events.put(None))
+        remove = cancel.on_cancel(future.cancel) if cancel else None
+        try:
+            while (event := events.get()) is not None:
+                yield event
+            if future.cancelled():
+                yield {"type": "cancelled", "reason": cancel.reason if cancel else "cancelled"}
+            else:
+                future.result()
+        finally:
+            # Споживач пішов раніше (клієнт відключився) - зупиняємо відповідь Goose
+            future.cancel()
+            if remove is not None:
+                remove()
+
+    async def send_reply_async(self, session_name: str, message: str, timeout: int = 90) -> dict:
+        """Повна відповідь одним словником - зібрані події stream_reply (для ASGI-режиму)"""
         chunks = []
-        timeout_total = aiohttp.ClientTimeout(total=timeout)
-        async with aiohttp.ClientSession(timeout=timeout_total) as session:
-            async with session.ws_connect(ws_url, heartbeat=30) as ws:
-                await ws.send_str(json.dumps(payload))
-                async for msg in ws:
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        try:
-                            obj = json.loads(msg.data)
-                        except Exception:
-                            obj = None
-                        if isinstance(obj, dict):
-                            t = obj.get("type")
-                            if t == "response":
-                                content = obj.get("content")
-                                if content:
-                                    chunks.append(str(content))
-                            elif t in ("complete", "cancelled"):
-                                break
-                            elif t == "error":
-                                return {"success": False, "error": obj.get("message", "websocket error")}
-                        else:
-                            chunks.append(str(msg.data))
-                    elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
-                        break
+        async for event in self.stream_reply(session_name, message, timeout):
+            if event["type"] == "text":
+                chunks.append(event["text"])
+            elif event["type"] == "error":
+                result = {"success": False, "error": event["error"]}
+                if event.get("response"):
+                    result["response"] = event["response"]
+                return result
         return {"success": True, "response": "".join(chunks).strip()}
 
-    def _via_sse(self, session_name: str, message: str, timeout: int):
-        url = f"{self.base_url}/reply"
-        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache", "X-Secret-Key": self.secret_key}
+    def send_many(self, prompts, concurrency: int | None = None, timeout: int = 90, cancel=None,
+                  lane_prefix: str = "atlas_batch") -> list:
+        """Паралельно надсилає незалежні запити; результати в тому ж порядку, що й prompts.
+        prompts - (session_name, message) або просто message: такі розходяться по сесіях
+        f"{lane_prefix}_{n}", по одній на кожне з concurrency одночасних з'єднань.
+        timeout діє на кожен запит окремо; збій одного запиту стає його результатом
+        {"success": False, "error": ...}. Після спрацювання cancel незавершені запити
+        зупиняються і отримують результат скасування."""
+        results = [None] * len(prompts)
+        if not prompts:
+            return results
+        if cancel is not None and cancel.cancelled:
+            return [self._cancelled(cancel) for _ in prompts]
+        future = self.ws_pool.submit(self._traced(
+            self._send_many(prompts, results, concurrency or self.batch_concurrency, timeout, lane_prefix)))
+        remove = cancel.on_cancel(future.cancel) if cancel else None
+        try:
+            cancellation.result(future, None, cancel)
+        except (Cancelled, FutureCancelled):
+            pass
+        finally:
+            if remove is not None:
+                remove()
+        # Знімок: скасовані задачі ще можуть дописати свій результат на циклі пулу
+        return [r if r is not None else self._cancelled(cancel) for r in list(results)]
+
+    async def send_many_async(self, prompts, concurrency: int | None = None, timeout: int = 90,
+                              lane_prefix: str = "atlas_batch") -> list:
+        """Те саме, що send_many, для асинхронних викликачів; скасування задачі скасовує весь пакет"""
+        results = [None] * len(prompts)
+        await self._send_many(prompts, results, concurrency or self.batch_concurrency, timeout, lane_prefix)
+        return results
+
+    async def _send_many(self, prompts, results: list, concurrency: int, timeout: int, lane_prefix: str):
+        lanes = asyncio.Queue()
+        for n in range(max(1, min(concurrency, len(prompts)))):
+            lanes.put_nowait(n)
+
+        async def one(index: int, prompt):
+            # Вільна «смуга» обмежує паралельність і дає запиту без сесії власну сесію
+            lane = await lanes.get()
+            try:
+                if isinstance(prompt, (tuple, list)):
+                    session_name, message = prompt
+                else:
+                    session_name, message = f"{lane_prefix}_{lane}", prompt
+                results[index] = await asyncio.wait_for(self.send_reply_async(session_name, message, timeout),
+                                                        timeout)
+            except asyncio.TimeoutError:
+                results[index] = {"success": False, "error": f"Timed out after {timeout}s"}
+            except Exception as e:
+                results[index] = {"success": False, "error": str(e) or type(e).__name__}
+            finally:
+                lanes.put_nowait(lane)
+
+        await asyncio.gather(*(one(i, p) for i, p in enumerate(prompts)))
+
+    async def stream_reply(self, session_name: str, message: str, timeout: int = 90):
+        """Асинхронний ітератор подій відповіді Goose у міру їх надходження:
+            {"type": "text", "text": ...}                       - фрагмент тексту
+            {"type": "tool_call", "id": ..., "name": ..., "arguments": ...}
+            {"type": "tool_result", "id": ..., "output": ...}
+            {"type": "error", "error": ...}                     - остання подія при збої
+            {"type": "complete", "response": ...}               - остання подія, повний текст
+        Мережеві збої та тайм-аут піднімаються як винятки, як і раніше"""
+        if self._base_url is None:
+            # Адреса ще не визначена - опитування портів блокує, тож виконуємо його поза циклом подій
+            await asyncio.get_running_loop().run_in_executor(None, self._discover)
+        breaker = self._breaker()
+        try:
+            breaker.check()
+        except CircuitOpenError as e:
+            yield {"type": "error", "error": str(e)}
+            return
+        transport = await self._transport_mode_async()
+        started = time.monotonic()
+        if transport == 'ws':
+            events = self._ws_events(session_name, message, timeout)
+        else:
+            events = self._sse_events(session_name, message, timeout)
+        chunks = []
+        result = None  # підсумок для метрик, автомата і кешу транспорту
+        try:
+            async for event in events:
+                if event["type"] == "text":
+                    chunks.append(event["text"])
+                elif event["type"] == "error":
+                    result = {"success": False, "error": event["error"]}
+                yield event
+                if result is not None:
+                    return
+            result = {"success": True, "response": "".join(chunks).strip()}
+            yield {"type": "complete", "response": result["response"]}
+        except (asyncio.CancelledError, GeneratorExit):
+            # Клієнт пішов або сесію перервано - це не збій Goose
+            if result is None:
+                result = {"success": False, "cancelled": True, "error": "Cancelled"}
+            raise
+        except Exception:
+            breaker.record_failure()
+            self._invalidate_transport(transport)
+            raise
+        finally:
+            await events.aclose()
+            if result is not None:
+                self._record_result(breaker, result)
+                self._check_transport(transport, result)
+            self._observe(transport, started, result)
+
+    @staticmethod
+    def _traced(coro):
+        """Переносить трасу потоку, що викликає, у задачу на циклі пулу"""
+        trace_id, span_id = tracing.current_trace_id(), tracing.current_span_id()
+
+        async def run():
+            if trace_id:
+                tracing.bind(trace_id, span_id)
+            return await coro
+        return run()
+
+    def _observe(self, transport: str, started: float, result):
+        if result and result.get("cancelled"):
+            outcome = 'cancelled'
+        else:
+            outcome = 'ok' if result and result.get("success") else 'error'
+        elapsed = time.monotonic() - started
+        GOOSE_LATENCY.observe(elapsed, transport=transport, outcome=outcome)
+        tracing.record_span('goose.reply', elapsed, status=outcome, transport=transport, base_url=self.base_url,
+                            error=(result or {}).get("error") if outcome == 'error' else None)
+
+    @staticmethod
+    def _record_result(breaker, result: dict):
+        if result.get("cancelled"):
+            # Перервано користувачем - нічого не знаємо про здоров'я Goose
+            return
+        if not result.get("success") and str(result.get("error", "")).startswith("HTTP 5"):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    @staticmethod
+    def _cancelled(cancel) -> dict:
+        return {"success": False, "cancelled": True, "error": f"Cancelled ({cancel.reason})"}
+
+    @staticmethod
+    def _tool_call(call_id, call) -> dict:
+        # goose загортає виклик у {"status": ..., "value": {"name", "arguments"}}
+        value = call.get("value", call) if isinstance(call, dict) else {}
+        value = value if isinstance(value, dict) else {}
+        return {"type": "tool_call", "id": call_id, "name": value.get("name"), "arguments": value.get("arguments")}
+
+    @staticmethod
+    def _tool_result(call_id, result) -> dict:
+        output = result.get("value", result) if isinstance(result, dict) else result
+        return {"type": "tool_result", "id": call_id, "output": output}
+
+    def _ws_message_events(self, data: str):
+        """Події з одного кадру goose web; повертає (події, чи завершена відповідь)"""
+        try:
+            obj = json.loads(data)
+        except Exception:
+            obj = None
+        if not isinstance(obj, dict):
+            return [{"type": "text", "text": str(data)}], False
+        t = obj.get("type")
+        if t == "response":
+            content = obj.get("content")
+            return ([{"type": "text", "text": str(content)}] if content else []), False
+        if t == "tool_request":
+            return [self._tool_call(obj.get("id"), obj.get("tool_call"))], False
+        if t == "tool_response":
+            return [self._tool_result(obj.get("id"), obj.get("result"))], False
+        if t == "error":
+            return [{"type": "error", "error": obj.get("message", "websocket error")}], True
+        return [], t in ("complete", "cancelled")
+
+    async def _ws_events(self, session_name: str, message: str, timeout: int):
+        payload = {"type": "message", "content": message, "session_id": session_name, "timestamp": int(time.time()*1000)}
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue()
+
+        def on_message(data: str) -> bool:
+            # Викликається на циклі пулу - події передаються на цикл споживача
+            events, done = self._ws_message_events(data)
+            for event in events:
+                loop.call_soon_threadsafe(pending.put_nowait, event)
+            return done
+
+        # X-Request-ID зв'язує з'єднання з трасою запиту, який його відкрив
+        future = self.ws_pool.exchange(self.base_url, session_name, payload, timeout, on_message,
+                                       tracing.trace_headers())
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(pending.put_nowait, None))
+        try:
+            while (event := await pending.get()) is not None:
+                yield event
+            if not future.cancelled():
+                future.result()
+        finally:
+            # Скасування ходу закриває його сокет у пулі
+            future.cancel()
+
+    def _sse_request(self, session_name: str, message: str):
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache", "X-Secret-Key": self.secret_key,
+                   **tracing.trace_headers()}
         payload = {
             "messages": [{"role": "user", "created": int(time.time()), "content": [{"type": "text", "text": message}]}],
             "session_id": session_name,
             "session_working_dir": os.getcwd(),
         }
-        with requests.post(url, json=payload, headers=headers, stream=True, timeout=timeout) as resp:
-            if resp.status_code != 200:
-                try:
-                    text = resp.text[:500]
-                except Exception:
-                    text = "<no body>"
-                return {"success": False, "error": f"HTTP {resp.status_code}", "response": text}
-            chunks = []
-            for raw_line in resp.iter_lines(decode_unicode=True):
-                if raw_line is None:
-                    continue
-                line = raw_line.strip()
-                if not line or line.startswith(":"):
+        return f"{self.base_url}/reply", headers, payload
+
+    def _sse_line_events(self, raw_line: str):
+        """Розбирає один рядок SSE від goosed; повертає (події, чи завершена відповідь)"""
+        line = raw_line.strip()
+        if not line or line.startswith(":"):
+            return [], False
+        if line.lower() == "event: done":
+            return [], True
+        if not line.startswith("data:"):
+            return [], False
+        data_part = line[5:].lstrip()
+        try:
+            obj = json.loads(data_part)
+        except Exception:
+            return [{"type": "text", "text": data_part}], False
+        if not isinstance(obj, dict):
+            return [{"type": "text", "text": str(obj)}], False
+        kind = obj.get("type")
+        if kind == "Message" and isinstance(obj.get("message"), dict):
+            events = []
+            for c in obj["message"].get("content", []) or []:
+                if not isinstance(c, dict):
                     continue
-                if line.startswith("data:"):
-                    data_part = line[5:].lstrip()
-                    try:
-                        obj = json.loads(data_part)
-                        if isinstance(obj, dict):
-                            if obj.get("type") == "Message" and isinstance(obj.get("message"), dict):
-                                msg = obj["message"]
-                                for c in msg.get("content", []) or []:
-                                    if isinstance(c, dict) and c.get("type") == "text":
-                                        t = c.get("text")
-                                        if t:
-                                            chunks.append(str(t))
-                            else:
-                                token = obj.get("text") or obj.get("token") or obj.get("content")
-                                if token:
-                                    chunks.append(str(token))
-                                if obj.get("final") is True or obj.get("done") is True:
-                                    break
-                        else:
-                            chunks.append(str(obj))
-                    except Exception:
-                        chunks.append(data_part)
-                elif line.lower() == "event: done":
-                    break
-        return {"success": True, "response": "".join(chunks).strip()}
+                if c.get("type") == "text" and c.get("text"):
+                    events.append({"type": "text", "text": str(c["text"])})
+                elif c.get("type") == "toolRequest":
+                    events.append(self._tool_call(c.get("id"), c.get("toolCall")))
+                elif c.get("type") == "toolResponse":
+                    events.append(self._tool_result(c.get("id"), c.get("toolResult")))
+            return events, False
+        if kind == "Error":
+            return [{"type": "error", "error": str(obj.get("error") or "goosed error")}], True
+        if kind == "Finish":
+            return [], True
+        token = obj.get("text") or obj.get("token") or obj.get("content")
+        events = [{"type": "text", "text": str(token)}] if token else []
+        return events, obj.get("final") is True or obj.get("done") is True
+
+    async def _sse_events(self, session_name: str, message: str, timeout: int):
+        url, headers, payload = self._sse_request(session_name, message)
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            async with session.post(url, json=payload, headers=headers) as resp:
+                if resp.status != 200:
+                    text = (await resp.text(errors="replace"))[:500]
+                    yield {"type": "error", "error": f"HTTP {resp.status}", "response": text}
+                    return
+                async for raw_line in resp.content:
+                    events, done = self._sse_line_events(raw_line.decode("utf-8", errors="replace"))
+                    for event in events:
+                        yield event
+                    if done:
+                        return
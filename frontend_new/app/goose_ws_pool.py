@@ -0,0 +1,222 @@
+"""
+Persistent WebSocket connections to the Goose web UI.
+
+One socket is kept per (base_url, session_id) and reused for the following
+turns of that session, so a turn normally skips the TCP and WebSocket
+handshake. All sockets live on one background event loop thread; callers from
+any thread or loop submit work with submit() and get a concurrent Future back.
+
+  heartbeat - aiohttp pings idle sockets; a missing pong closes the socket and
+              the next turn reconnects.
+  reconnect - connecting retries with exponential backoff; a reused socket
+              that turns out to be dead is replaced before the message is sent.
+  eviction  - sockets idle longer than idle_ttl are closed by a sweeper task,
+              which skips entries that a turn is using or waiting for.
+
+Turns on one session are serialized. A turn that is cancelled or times out
+closes its socket, since late frames of the abandoned reply would otherwise
+leak into the next turn. An entry whose socket is closed leaves the map as
+soon as no turn needs it, so the next turn starts from a fresh entry.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger('atlas.goose_ws_pool')
+
+
+class _PooledSocket:
+    def __init__(self, key: Tuple[str, str]):
+        self.key = key
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.lock = asyncio.Lock()
+        # Turns holding or waiting for the lock; the lock alone looks free between two turns
+        self.users = 0
+        self.last_used = monotonic()
+        self.turns = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.ws is not None and not self.ws.closed
+
+    async def close(self):
+        ws, self.ws = self.ws, None
+        if ws is not None and not ws.closed:
+            try:
+                await ws.close()
+            except Exception:
+                pass
+
+
+class GooseWSPool:
+    """(base_url, session_id) -> long-lived WebSocket, served from a background loop"""
+
+    def __init__(self, idle_ttl: float = 300.0, heartbeat: float = 30.0,
+                 connect_retries: int = 3, backoff: float = 0.25, connect_timeout: float = 10.0):
+        self.idle_ttl = idle_ttl
+        self.heartbeat = heartbeat
+        self.connect_retries = connect_retries
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock = threading.Lock()
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._sockets: Dict[Tuple[str, str], _PooledSocket] = {}
+        self._stats = {'connects': 0, 'reuses': 0, 'reconnects': 0, 'connect_failures': 0,
+                       'evicted': 0, 'dropped': 0}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='goose-ws-pool', daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._sweep(), loop)
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro) -> Future:
+        """Run a coroutine on the pool loop; cancelling the Future cancels the task"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def exchange(self, base_url: str, session_id: str, payload: dict, timeout: float,
+                 on_message: Callable[[str], bool], headers: Optional[dict] = None) -> Future:
+        """Send `payload` on the session's socket and feed text frames to `on_message`
+        until it returns True or the socket closes. Returns a Future of the turn."""
+        return self.submit(self._exchange(base_url, session_id, payload, timeout, on_message, headers))
+
+    async def _exchange(self, base_url, session_id, payload, timeout, on_message, headers):
+        key = (base_url, str(session_id))
+        sock = self._sockets.get(key)
+        if sock is None:
+            sock = self._sockets[key] = _PooledSocket(key)
+        sock.users += 1
+        try:
+            async with sock.lock:
+                sock.last_used = monotonic()
+                finished = False
+                try:
+                    await asyncio.wait_for(self._turn(sock, payload, on_message, headers), timeout)
+                    finished = True
+                finally:
+                    sock.last_used = monotonic()
+                    if not finished or not sock.alive:
+                        # Reply abandoned midway or the server hung up - the socket can't be reused
+                        await self._drop(sock)
+        finally:
+            sock.users -= 1
+            if not sock.users and not sock.alive:
+                self._forget(sock)
+
+    async def _turn(self, sock: _PooledSocket, payload: dict, on_message, headers):
+        data = json.dumps(payload)
+        reused = sock.alive
+        if reused:
+            try:
+                await sock.ws.send_str(data)
+                self._stats['reuses'] += 1
+            except (ConnectionError, aiohttp.ClientError, RuntimeError):
+                reused = False
+                await sock.close()
+        if not reused:
+            await self._connect(sock, headers)
+            await sock.ws.send_str(data)
+        sock.turns += 1
+        if not await self._receive(sock, on_message) and reused:
+            # The server had closed the idle socket (restart, missed pong) before our
+            # message arrived: its close frame was simply not read yet
+            self._stats['reconnects'] += 1
+            await self._connect(sock, headers)
+            await sock.ws.send_str(data)
+            await self._receive(sock, on_message)
+
+    @staticmethod
+    async def _receive(sock: _PooledSocket, on_message) -> bool:
+        """Feed text frames to on_message until it reports the end; False if none arrived"""
+        replied = False
+        async for msg in sock.ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                replied = True
+                if on_message(msg.data):
+                    return True
+            elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                break
+        await sock.close()
+        return replied
+
+    async def _connect(self, sock: _PooledSocket, headers):
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession()
+        base_url = sock.key[0]
+        ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws"
+        delay = self.backoff
+        for attempt in range(self.connect_retries):
+            try:
+                sock.ws = await asyncio.wait_for(
+                    self._http.ws_connect(ws_url, heartbeat=self.heartbeat, headers=headers), self.connect_timeout)
+                self._stats['connects'] += 1
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                self._stats['connect_failures'] += 1
+                if attempt == self.connect_retries - 1:
+                    raise
+                logger.debug(f"Goose ws connect to {ws_url} failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _drop(self, sock: _PooledSocket):
+        # Turns already waiting on the lock reconnect on the same entry; the last one out removes it
+        await sock.close()
+        self._stats['dropped'] += 1
+
+    def _forget(self, sock: _PooledSocket):
+        if self._sockets.get(sock.key) is sock:
+            del self._sockets[sock.key]
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(max(1.0, min(self.heartbeat, self.idle_ttl / 2)))
+            try:
+                await self._evict_idle()
+            except Exception as e:
+                logger.warning(f"Goose ws pool sweep failed: {e}")
+
+    async def _evict_idle(self):
+        now = monotonic()
+        for sock in list(self._sockets.values()):
+            if sock.users or (sock.alive and now - sock.last_used <= self.idle_ttl):
+                continue
+            # Unlisted before the first await, so no new turn can pick the entry up
+            self._forget(sock)
+            async with sock.lock:
+                if sock.alive:
+                    self._stats['evicted'] += 1
+                await sock.close()
+
+    def stats(self) -> dict:
+        sockets = list(self._sockets.values())
+        stats = dict(self._stats)
+        stats['open'] = sum(1 for s in sockets if s.alive)
+        stats['busy'] = sum(1 for s in sockets if s.lock.locked())
+        stats['idle_ttl'] = self.idle_ttl
+        return stats
+
+
+_pool: Optional[GooseWSPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> GooseWSPool:
+    """Process-wide pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GooseWSPool(idle_ttl=float(os.getenv('GOOSE_WS_IDLE_TTL', '300')),
+                                heartbeat=float(os.getenv('GOOSE_WS_HEARTBEAT', '30')))
+        return _pool
@@ -0,0 +1,150 @@
+"""
+Background health probing for upstream services.
+
+Each registered target is checked by its own daemon thread on its own
+schedule, so a slow or dead dependency never delays the others and HTTP
+handlers only read the latest snapshot instead of probing inline.
+
+With a SharedState, worker processes elect one prober per target through a
+lease; the others adopt its published results instead of probing again.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from time import monotonic
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger('atlas.health_prober')
+
+
+class HealthProber:
+    """Runs periodic health checks and keeps the last result per target"""
+
+    def __init__(self, interval: float = 10.0, down_interval: float = 5.0, shared=None):
+        self.interval = max(0.5, float(interval))
+        self.down_interval = max(0.5, float(down_interval))
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._targets = {}  # name -> (check, interval, apply)
+        self._results = {}  # name -> dict
+        self._threads = {}
+
+    def register(self, name: str, check: Callable, interval: Optional[float] = None,
+                 apply: Optional[Callable[[dict], None]] = None) -> None:
+        """Add a target.
+
+        `check` returns a status string ('running', 'error', ...) or (status, details);
+        `apply(details)` runs in every process for each fresh result, including adopted ones.
+        """
+        with self._lock:
+            self._targets[name] = (check, float(interval or self.interval), apply)
+            started = bool(self._threads)
+        if started:
+            self._spawn(name)
+
+    def start(self) -> None:
+        with self._lock:
+            names = [n for n in self._targets if n not in self._threads]
+        for name in names:
+            self._spawn(name)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def status(self, name: str, default: str = 'unknown') -> str:
+        with self._lock:
+            result = self._results.get(name)
+        return result['status'] if result else default
+
+    def snapshot(self, prefix: str = '') -> Dict[str, dict]:
+        now = monotonic()
+        with self._lock:
+            items = [(n, dict(r)) for n, r in self._results.items() if n.startswith(prefix)]
+        result = {}
+        for name, entry in items:
+            entry['age_seconds'] = round(now - entry.pop('_checked_mono'), 1)
+            result[name] = entry
+        return result
+
+    # --- internals ---
+
+    def _spawn(self, name: str) -> None:
+        with self._lock:
+            if name in self._threads:
+                return
+            thread = threading.Thread(target=self._run, args=(name,), name=f"health-{name}", daemon=True)
+            self._threads[name] = thread
+        thread.start()
+
+    def _run(self, name: str) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                target = self._targets.get(name)
+            if target is None:
+                return
+            check, interval, apply = target
+            if self.shared is not None and not self.shared.acquire_lease(f"health:{name}", interval * 2 + 5):
+                result = self._adopt(name, apply)
+            else:
+                result = self._probe(name, check, apply)
+            status = result['status'] if result else 'unknown'
+            # Re-check failing targets sooner so recovery shows up quickly
+            self._stop.wait(interval if status == 'running' else min(interval, self.down_interval))
+
+    def _adopt(self, name: str, apply) -> Optional[dict]:
+        """Take the result another process published for `name`"""
+        published = self.shared.get(f"health:{name}")
+        if not isinstance(published, dict):
+            return None
+        with self._lock:
+            prev = self._results.get(name)
+            if prev and prev.get('checked_at') == published.get('checked_at'):
+                return prev
+        self._store(name, published, apply)
+        return published
+
+    def _probe(self, name: str, check: Callable, apply=None) -> dict:
+        started = monotonic()
+        error = None
+        details = None
+        try:
+            outcome = check()
+            if isinstance(outcome, tuple):
+                outcome, details = outcome
+            status = outcome or 'unknown'
+        except Exception as e:
+            status, error = 'stopped', str(e)
+        latency = monotonic() - started
+        with self._lock:
+            prev = self._results.get(name)
+        entry = {
+            'status': status,
+            'last_checked': datetime.now().isoformat(),
+            'checked_at': time.time(),
+            'latency_ms': round(latency * 1000, 1),
+            'error': error,
+            'since': prev['since'] if prev and prev['status'] == status else datetime.now().isoformat(),
+            'details': details,
+        }
+        if self.shared is not None:
+            self.shared.set(f"health:{name}", entry)
+        return self._store(name, entry, apply)
+
+    def _store(self, name: str, entry: dict, apply=None) -> dict:
+        entry = dict(entry)
+        # Age is measured from when the check ran, also for results adopted from another process
+        entry['_checked_mono'] = monotonic() - max(0.0, time.time() - entry.get('checked_at', time.time()))
+        details = entry.pop('details', None)
+        with self._lock:
+            prev = self._results.get(name)
+            self._results[name] = entry
+        if prev is None or prev['status'] != entry['status']:
+            logger.info(f"Health of {name}: {entry['status']} ({entry['latency_ms']}ms)")
+        if apply is not None and details is not None:
+            try:
+                apply(details)
+            except Exception as e:
+                logger.debug(f"Applying health details for {name} failed: {e}")
+        return entry
@@ -0,0 +1,258 @@
+"""
+Incremental log tailing for the /logs endpoint.
+
+Each file keeps an (inode, offset) cursor and a bounded list of already
+parsed entries. The first read seeks from the end in blocks and parses only
+the tail; later reads parse just the bytes appended since the last offset, so
+the cost of a poll does not depend on the size of the log. Rotation or
+truncation (inode change or shrinking file) resets the cursor.
+
+Entries are identified by where they start: inode and byte offset. The
+cursor handed to clients is the (inode, offset) reached in every file, so it
+means the same thing in every worker process reading these files; clients
+pass it back as `since` to fetch only newer entries.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger('atlas.log_reader')
+
+# Timestamp patterns we support:
+# 1) 2025-09-04 20:19:54,360
+_TS_PAT_1 = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})')
+# 2) [2025-09-05T00:23:19.735Z] ...
+_TS_PAT_2 = re.compile(r'^\[(\d{4}-\d{2}-\d{2}T[^\]]+)\]')
+# 3) 03:13:48 or 03:13:48.123 (time-only)
+_TS_PAT_3 = re.compile(r'^(\d{2}:\d{2}:\d{2}(?:[\.,]\d{1,3})?)')
+_LVL_PAT = re.compile(r'\[(DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|TRACE)\]', re.IGNORECASE)
+
+_BLOCK_SIZE = 64 * 1024
+
+# (inode, offset) reached in one file; None when nothing was read from it yet
+Position = Optional[Tuple[int, int]]
+
+
+def parse_ts(ts_str: str):
+    """Return (iso_str, sort_key_dt) from known formats; fallback to now."""
+    now_dt = datetime.now()
+    # 2025-09-04 20:19:54,360
+    try:
+        if 'T' not in ts_str and ',' in ts_str:
+            dt = datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S,%f')
+            return dt.isoformat(timespec='milliseconds'), dt
+    except Exception:
+        pass
+    # ISO in brackets e.g. 2025-09-05T00:23:19.735Z
+    try:
+        iso = ts_str.replace('Z', '+00:00')
+        dt = datetime.fromisoformat(iso)
+        return dt.isoformat(timespec='milliseconds'), dt
+    except Exception:
+        pass
+    # Time-only: 03:13:48(.123)
+    try:
+        ts_norm = ts_str.replace(',', '.')
+        fmt = '%H:%M:%S.%f' if '.' in ts_norm else '%H:%M:%S'
+        t = datetime.strptime(ts_norm, fmt).time()
+        dt = datetime.combine(now_dt.date(), t)
+        return dt.isoformat(timespec='milliseconds'), dt
+    except Exception:
+        pass
+    return now_dt.isoformat(timespec='milliseconds'), now_dt
+
+
+def detect_level(text: str) -> str:
+    m_lvl = _LVL_PAT.search(text)
+    if m_lvl:
+        level = m_lvl.group(1).lower()
+        return 'warn' if level == 'warning' else level
+    low = text.lower()
+    if ' error' in low or low.startswith('error'):
+        return 'error'
+    if ' warn' in low or low.startswith('warn'):
+        return 'warn'
+    if ' debug' in low or low.startswith('debug'):
+        return 'debug'
+    return 'info'
+
+
+def parse_cursor(value: Optional[str], count: int) -> Optional[List[Position]]:
+    """Turn a client cursor ('<inode>.<offset>' per file, hex, '-'-joined) into positions;
+    None if absent or not made for `count` files"""
+    if not value:
+        return None
+    parts = str(value).split('-')
+    if len(parts) != count:
+        return None
+    positions = []
+    for part in parts:
+        inode, _, offset = part.partition('.')
+        try:
+            position = (int(inode, 16), int(offset, 16))
+        except ValueError:
+            return None
+        positions.append(position if position[0] else None)
+    return positions
+
+
+def make_cursor(positions: List[Position]) -> str:
+    return '-'.join(f"{p[0]:x}.{p[1]:x}" if p else '0.0' for p in positions)
+
+
+class LogFile:
+    """Parsed tail of one log file, kept in sync by reading appended bytes only"""
+
+    def __init__(self, path, source: str, max_entries: int = 2000):
+        self.path = str(path)
+        self.source = source
+        self.max_entries = max(1, int(max_entries))
+        self._inode = None
+        self._offset = 0
+        # [sort_dt, start, end, entry] by byte offsets; continuation lines extend the last entry in place
+        self._entries = deque(maxlen=self.max_entries)
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        with self._lock:
+            if self._inode != st.st_ino or st.st_size < self._offset:
+                self._reset(st)
+            elif st.st_size > self._offset:
+                self._read_appended(st.st_size)
+
+    def position(self) -> Position:
+        with self._lock:
+            return (self._inode, self._offset) if self._inode is not None else None
+
+    def entries_since(self, position: Position, limit: int) -> Tuple[List[tuple], Position]:
+        """Newest-last (sort_dt, start, end, entry) copies of the entries that end past
+        `position` (at most `limit`), and the position they bring the reader to.
+        An entry that starts before `position` grew by continuation lines since.
+        A position in another file (rotated away) or beyond the end of this one
+        (truncated in place) selects everything."""
+        with self._lock:
+            if position is not None and (position[0] != self._inode or position[1] > self._offset):
+                position = None
+            picked = []
+            for sort_dt, start, end, entry in reversed(self._entries):
+                if (position is not None and end <= position[1]) or len(picked) >= limit:
+                    break
+                picked.append((sort_dt, start, end, dict(entry)))
+            current = (self._inode, self._offset) if self._inode is not None else None
+        picked.reverse()
+        return picked, current
+
+    # --- internals (caller holds self._lock) ---
+
+    def _reset(self, st) -> None:
+        self._inode = st.st_ino
+        self._entries.clear()
+        # Over-read lines a bit so multi-line entries at the cut are grouped correctly
+        start, data = self._read_tail_lines(st.st_size, self.max_entries * 4)
+        self._offset = start
+        self._consume(data)
+
+    def _read_tail_lines(self, size: int, want_lines: int) -> Tuple[int, bytes]:
+        """Seek back from the end in blocks until `want_lines` complete lines are covered"""
+        with open(self.path, 'rb') as f:
+            pos = size
+            chunks = []
+            newlines = 0
+            while pos > 0 and newlines <= want_lines:
+                step = min(_BLOCK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                chunks.append(chunk)
+                newlines += chunk.count(b'\n')
+        data = b''.join(reversed(chunks))
+        if pos > 0:
+            # Drop the partial first line
+            cut = data.find(b'\n') + 1
+            data = data[cut:]
+            pos += cut
+        return pos, data
+
+    def _read_appended(self, size: int) -> None:
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        self._consume(data)
+
+    def _consume(self, data: bytes) -> None:
+        # Only complete lines; the unfinished tail is re-read next time
+        end = data.rfind(b'\n') + 1
+        if end <= 0:
+            return
+        start = self._offset
+        for raw in data[:end].split(b'\n')[:-1]:
+            self._add_line(raw.decode('utf-8', errors='replace').rstrip('\r'), start, start + len(raw) + 1)
+            start += len(raw) + 1
+        self._offset += end
+
+    def _add_line(self, text: str, start: int, end: int) -> None:
+        last = self._entries[-1] if self._entries else None
+        if not text:
+            # keep empty lines as part of the message if we have one
+            if last:
+                last[3]['message'] += '\n'
+                last[2] = end
+            return
+        ts_match = _TS_PAT_1.match(text) or _TS_PAT_2.match(text) or _TS_PAT_3.match(text)
+        if ts_match is None and last is not None:
+            # Continuation: keep multi-line structure (e.g., markdown like "### [ТЕТЯНА]")
+            last[3]['message'] += f"\n{text}"
+            last[2] = end
+            return
+        ts_iso, ts_dt = parse_ts(ts_match.group(1) if ts_match else '')
+        if ts_dt.tzinfo is not None:
+            # Compare aware (ISO 'Z') and naive stamps on local time
+            ts_dt = ts_dt.astimezone().replace(tzinfo=None)
+        self._entries.append([ts_dt, start, end, {
+            # Stable in every process; the line checksum tells apart entries of a file truncated in place
+            'id': f"{self.source}:{self._inode:x}:{start:x}:{zlib.crc32(text.encode('utf-8')):08x}",
+            'timestamp': ts_iso,
+            'source': self.source,
+            'level': detect_level(text),
+            'message': text,
+        }])
+
+
+class LogReader:
+    """Merged view over several LogFile tails"""
+
+    def __init__(self, files, max_entries: int = 2000):
+        self.files = [LogFile(path, source, max_entries=max_entries) for path, source in files]
+
+    def changes(self, limit: int = 100, since: Optional[str] = None) -> Tuple[List[tuple], List[Position]]:
+        """Entries newer than the cursor `since` as time-sorted (file index, inode, sort_dt,
+        start, end, entry), at most `limit` of the newest, and the positions reached"""
+        limit = max(0, int(limit))
+        positions = parse_cursor(since, len(self.files)) or [None] * len(self.files)
+        items = []
+        for index, log_file in enumerate(self.files):
+            try:
+                log_file.refresh()
+                picked, current = log_file.entries_since(positions[index], limit)
+            except Exception as e:
+                logger.warning(f"Failed to read {log_file.path}: {e}")
+                continue
+            if current is not None:
+                items.extend((index, current[0]) + item for item in picked)
+                positions[index] = current
+        items.sort(key=lambda item: (item[2], item[0], item[3]))
+        return (items[-limit:] if limit else []), positions
+
+    def read(self, limit: int = 100, since: Optional[str] = None) -> Tuple[List[dict], str]:
+        """Return (entries sorted by time, cursor) for entries newer than the cursor `since`"""
+        items, positions = self.changes(max(1, int(limit)), since)
+        return [item[5] for item in items], make_cursor(positions)
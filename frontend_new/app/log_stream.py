@@ -0,0 +1,184 @@
+"""
+Push-based log fan-out for /logs/stream (Server-Sent Events).
+
+One follower thread per log file watches for appends (inotify when the
+optional `inotify_simple` package is available, a stat poll otherwise),
+parses new lines once through the shared LogFile tails and serializes each
+entry once. Every connected client gets its own bounded queue; when a slow
+client's queue is full, new entries are dropped for that client only and
+counted, so one stalled dashboard never blocks the followers or the others.
+
+Each frame's event id is the cursor (see log_reader) of everything published
+up to it, so EventSource's Last-Event-ID resumes correctly in any worker.
+Continuation lines appended to an entry that was already sent are published
+as an 'update' event carrying the whole entry under the same id.
+Reading and encoding happen once per entry whatever the number of clients,
+so ten dashboards cost about the CPU of one. Under gthread each connected
+client still parks a server thread in its queue; `max_clients` (16 by
+default, above the expected fan-out) bounds those per process, serve.py adds
+that many threads on top of the ones for the UI and API, and only clients
+beyond it are refused and fall back to polling /logs.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from typing import List, Optional
+
+from log_reader import LogFile, Position, make_cursor
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags  # type: ignore
+except Exception:
+    INotify = None
+    inotify_flags = None
+
+logger = logging.getLogger('atlas.log_stream')
+
+
+class Subscriber:
+    """One connected client: a bounded queue of ((file index, inode, end offset), pre-encoded SSE frame)"""
+
+    def __init__(self, maxsize: int):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.sent = 0
+
+    def offer(self, key: tuple, frame: str) -> None:
+        try:
+            self.queue.put_nowait((key, frame))
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogStreamHub:
+    """Follows log files and fans parsed entries out to subscribers"""
+
+    def __init__(self, files: List[LogFile], queue_size: int = 500, poll_interval: float = 1.0,
+                 max_clients: int = 16):
+        self.files = list(files)
+        self.queue_size = max(1, int(queue_size))
+        self.poll_interval = max(0.1, float(poll_interval))
+        self.max_clients = max(1, int(max_clients))
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        # Position published so far in each file; frame ids are cursors over all of them
+        self._positions: List[Position] = [None] * len(self.files)
+        self._started = False
+        self._stop = threading.Event()
+        self._stats = {'published': 0, 'clients_total': 0, 'rejected': 0}
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """New subscriber, or None when max_clients are already connected"""
+        sub = Subscriber(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                self._stats['rejected'] += 1
+                return None
+            self._subscribers.add(sub)
+            self._stats['clients_total'] += 1
+        self._ensure_started()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._subscribers)
+            stats = dict(self._stats)
+        stats['clients'] = len(subs)
+        stats['max_clients'] = self.max_clients
+        stats['dropped'] = sum(s.dropped for s in subs)
+        stats['backend'] = 'inotify' if INotify is not None else 'poll'
+        return stats
+
+    # --- internals ---
+
+    def _ensure_started(self) -> None:
+        # Followers start with the first client and then keep the tails warm
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for index, log_file in enumerate(self.files):
+            threading.Thread(target=self._follow, args=(index, log_file),
+                             name=f"log-follow-{log_file.source}", daemon=True).start()
+
+    def _publish(self, index: int, inode: int, items, resumed_at: Optional[int] = None) -> None:
+        """Fan out entries of file `index`; those starting before `resumed_at` were sent
+        before and grew by continuation lines, so they go out as 'update' events"""
+        if not items:
+            return
+        with self._lock:
+            subs = list(self._subscribers)
+            self._stats['published'] += len(items)
+            event_ids = []
+            for item in items:
+                self._positions[index] = (inode, item[2])
+                event_ids.append(make_cursor(self._positions))
+        # Encode once; all subscribers share the same frame
+        frames = [((index, inode, item[2]),
+                   format_event(item[3], event='update' if resumed_at is not None and item[1] < resumed_at else None,
+                                event_id=event_id))
+                  for item, event_id in zip(items, event_ids)]
+        for sub in subs:
+            for key, frame in frames:
+                sub.offer(key, frame)
+
+    def _follow(self, index: int, log_file: LogFile) -> None:
+        log_file.refresh()
+        position = log_file.position()
+        with self._lock:
+            self._positions[index] = position
+        notifier = self._make_notifier(log_file.path)
+        while not self._stop.is_set():
+            if notifier is not None:
+                try:
+                    notifier.read(timeout=int(self.poll_interval * 1000))
+                except Exception as e:
+                    logger.debug(f"inotify read failed for {log_file.path}: {e}")
+                    notifier = None
+            else:
+                self._stop.wait(self.poll_interval)
+            try:
+                log_file.refresh()
+                new_items, current = log_file.entries_since(position, log_file.max_entries)
+            except Exception as e:
+                logger.debug(f"Log follow failed for {log_file.path}: {e}")
+                continue
+            if current is not None:
+                # Same file as before: resume after what was sent, else (rotated, truncated) start over
+                same_file = position is not None and position[0] == current[0] and position[1] <= current[1]
+                self._publish(index, current[0], new_items, position[1] if same_file else None)
+                position = current
+
+    def _make_notifier(self, path: str):
+        if INotify is None:
+            return None
+        directory = os.path.dirname(path) or '.'
+        try:
+            notifier = INotify()
+            # Watch the directory so creation and rotation of the file are seen too
+            notifier.add_watch(directory, inotify_flags.MODIFY | inotify_flags.CREATE | inotify_flags.MOVED_TO)
+            return notifier
+        except Exception as e:
+            logger.debug(f"inotify unavailable for {directory}, polling: {e}")
+            return None
+
+
+def format_event(data: dict, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """Serialize one SSE frame"""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
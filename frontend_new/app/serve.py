@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+ATLAS Frontend - production launcher (pre-fork, multi-worker)
+
+Runs atlas_server under gunicorn instead of the Werkzeug debug server:
+  - worker count: --workers / ATLAS_WORKERS, else `server.workers` from
+    IntelligentConfigManager, else min(2 * CPU, 8)
+  - threads per worker: `server.threads` (gthread workers), or --asgi to run
+    atlas_asgi under uvicorn workers
+  - workers are recycled after --max-requests (+ jitter)
+  - graceful reload: kill -HUP <master pid>; stop: kill -TERM <master pid>
+
+Workers share voices, health snapshots and audio cache usage through the
+SQLite file from ATLAS_SHARED_STATE (see shared_state.py); the disk audio
+cache itself is shared through its directory. Log cursors are file
+positions, so /logs and /logs/stream resume correctly on any worker.
+
+Each open /logs/stream connection parks one gthread thread of its worker, so
+gthread workers get LOG_STREAM_MAX_CLIENTS (default 16) threads on top of
+`server.threads`; streams beyond that fall back to polling /logs.
+
+Usage:
+    python serve.py [--port 5001] [--workers N] [--max-requests 1000] [--asgi]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+
+try:
+    from gunicorn.app.base import BaseApplication  # type: ignore
+except ImportError:
+    BaseApplication = None
+
+CURRENT_DIR = Path(__file__).parent
+CONFIG_DIR = CURRENT_DIR.parent / 'config'
+
+logger = logging.getLogger('atlas.serve')
+
+
+def _intelligent_server_config() -> dict:
+    """`server` section from the saved or freshly generated intelligent config"""
+    if str(CONFIG_DIR) not in sys.path:
+        sys.path.insert(0, str(CONFIG_DIR))
+    try:
+        from intelligent_config import IntelligentConfigManager
+        manager = IntelligentConfigManager(CONFIG_DIR)
+        config = manager.load_config() or manager.generate_complete_config()
+        server = config.get('server') if isinstance(config, dict) else None
+        return server if isinstance(server, dict) else {}
+    except Exception as e:
+        logger.warning(f"Intelligent config unavailable, using defaults: {e}")
+        return {}
+
+
+def build_options(args) -> dict:
+    server = _intelligent_server_config()
+    cpu = multiprocessing.cpu_count()
+    workers = args.workers or int(os.environ.get('ATLAS_WORKERS', 0)) or int(server.get('workers') or 0) \
+        or min(cpu * 2, 8)
+    threads = int(server.get('threads') or 0) or min(cpu * 4, 16)
+    options = {
+        'bind': f"{args.host}:{args.port}",
+        'workers': max(1, workers),
+        'max_requests': args.max_requests,
+        'max_requests_jitter': max(1, args.max_requests // 10) if args.max_requests else 0,
+        # Long chats and Goose replies can take up to ~2 minutes
+        'timeout': args.timeout,
+        'graceful_timeout': 30,
+        'keepalive': 5,
+        # No preload: each worker starts its own background threads (prober, pools) after fork
+        'preload_app': False,
+        'accesslog': '-',
+        'errorlog': '-',
+        'loglevel': 'info',
+        'proc_name': 'atlas-frontend',
+        'chdir': str(CURRENT_DIR),
+    }
+    if args.asgi:
+        options['worker_class'] = 'uvicorn.workers.UvicornWorker'
+    else:
+        options['worker_class'] = 'gthread'
+        # Log streams sit in their own threads so they never take the API's
+        options['threads'] = max(1, threads) + int(os.environ.get('LOG_STREAM_MAX_CLIENTS', 16))
+    return options
+
+
+if BaseApplication is not None:
+    class AtlasApplication(BaseApplication):
+        """gunicorn application that loads atlas_server (or atlas_asgi) in each worker"""
+
+        def __init__(self, options: dict, asgi: bool = False):
+            self.options = options
+            self.asgi = asgi
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            if str(CURRENT_DIR) not in sys.path:
+                sys.path.insert(0, str(CURRENT_DIR))
+            if self.asgi:
+                from atlas_asgi import app
+            else:
+                from atlas_server import app
+            return app
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    parser = argparse.ArgumentParser(description='ATLAS frontend production server')
+    parser.add_argument('--host', default=os.environ.get('FRONTEND_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('FRONTEND_PORT', 5001)))
+    parser.add_argument('--workers', type=int, default=0, help='0 = from intelligent config')
+    parser.add_argument('--max-requests', type=int, default=int(os.environ.get('ATLAS_MAX_REQUESTS', 1000)),
+                        help='recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('ATLAS_WORKER_TIMEOUT', 150)))
+    parser.add_argument('--asgi', action='store_true', help='serve atlas_asgi with uvicorn workers')
+    args = parser.parse_args()
+
+    if BaseApplication is None:
+        raise SystemExit("gunicorn is not installed: pip install gunicorn "
+                         "(or run python atlas_server.py for a single development process)")
+    options = build_options(args)
+    logger.info(f"Starting ATLAS frontend: {options['workers']} workers ({options['worker_class']}) "
+                f"on {options['bind']}, recycle after {options['max_requests']} requests")
+    AtlasApplication(options, asgi=args.asgi).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+State shared between frontend worker processes.
+
+A small SQLite file (WAL mode) holds JSON values with update times, named
+leases and counters. With several pre-forked workers this lets one worker
+refresh something (voice list, upstream health) while the others reuse the
+result, and keeps the disk audio cache's usage as one number for all of them.
+
+Every operation fails open: if the database is unavailable, reads return
+nothing and leases are granted, so each worker simply behaves as if it ran
+alone.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger('atlas.shared_state')
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+
+class SharedState:
+    """SQLite-backed key/value store, leases and counters for multi-process use"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+
+    @property
+    def owner(self) -> str:
+        return str(os.getpid())
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after fork (connections must not cross processes)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the stored value, or None if missing or older than max_age seconds"""
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        value, updated = entry
+        if max_age is not None and time.time() - updated > max_age:
+            return None
+        return value
+
+    def get_entry(self, key: str):
+        """Return (value, updated_epoch) or None"""
+        try:
+            row = self._conn().execute("SELECT value, updated FROM kv WHERE key = ?", (key,)).fetchone()
+            return (json.loads(row[0]), row[1]) if row else None
+        except Exception as e:
+            logger.debug(f"Shared state read failed for {key}: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self._conn().execute(
+                "INSERT INTO kv (key, value, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                (key, json.dumps(value, ensure_ascii=False, default=str), time.time()))
+        except Exception as e:
+            logger.debug(f"Shared state write failed for {key}: {e}")
+
+    def acquire_lease(self, name: str, ttl: float) -> bool:
+        """Take or renew the lease `name` for this process; False if another live owner holds it"""
+        now = time.time()
+        try:
+            cur = self._conn().execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires < ?",
+                (name, self.owner, now + ttl, now))
+            return cur.rowcount > 0
+        except Exception as e:
+            logger.debug(f"Shared lease {name} failed: {e}")
+            return True
+
+    def incr(self, name: str, delta: int) -> Optional[int]:
+        """Atomically add to a counter and return the new value"""
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, int(delta)))
+                row = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return row[0]
+        except Exception as e:
+            logger.debug(f"Shared counter {name} update failed: {e}")
+            return None
+
+    def set_counter(self, name: str, value: int) -> None:
+        try:
+            self._conn().execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value", (name, int(value)))
+        except Exception as e:
+            logger.debug(f"Shared counter {name} write failed: {e}")
+
+    def counter(self, name: str) -> Optional[int]:
+        try:
+            row = self._conn().execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.debug(f"Shared counter {name} read failed: {e}")
+            return None
+
+
+def open_shared_state(path) -> Optional[SharedState]:
+    """Open the store at `path`; None (single-process behaviour) if it cannot be used"""
+    if not path:
+        return None
+    try:
+        return SharedState(path)
+    except Exception as e:
+        logger.warning(f"Shared state disabled ({path}): {e}")
+        return None
@@ -0,0 +1,66 @@
+"""
+In-flight request coalescing ("single flight").
+
+The first caller for a key becomes the leader and does the work; concurrent
+callers with the same key wait on the leader's future and receive the same
+result (or the same exception) instead of repeating the work.
+
+A leader that gives up for reasons of its own (its session was interrupted,
+its client went away) abandons the key instead: waiters get Abandoned and
+claim the key again, so one of them takes over the work.
+"""
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Optional, Tuple
+
+
+class Abandoned(Exception):
+    """The leader gave up without an outcome; claim the key again"""
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}  # key -> Future
+        self._stats = {'leaders': 0, 'coalesced': 0, 'abandoned': 0, 'in_flight': 0}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """Return (future, is_leader). The leader must call settle() or abandon() exactly once."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats['leaders'] += 1
+            self._stats['in_flight'] = len(self._calls)
+            return future, True
+
+    def settle(self, key: str, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Publish the leader's outcome to every waiter and forget the key"""
+        with self._lock:
+            future = self._calls.pop(key, None)
+            self._stats['in_flight'] = len(self._calls)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def abandon(self, key: str) -> None:
+        """Forget the key and tell its waiters to claim it again"""
+        with self._lock:
+            future = self._calls.pop(key, None)
+            self._stats['in_flight'] = len(self._calls)
+            if future is not None:
+                self._stats['abandoned'] += 1
+        if future is not None and not future.done():
+            future.set_exception(Abandoned(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
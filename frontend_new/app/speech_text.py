@@ -0,0 +1,92 @@
+"""
+Text preparation for speech synthesis.
+
+Server-side counterpart of segmentForTTS() in intelligent-chat-manager.js:
+strips agent signatures and markdown, then splits text into short phrases
+that synthesize quickly and can be fanned out across TTS backends.
+"""
+import re
+from typing import Dict, List, Optional
+
+_SIGNATURE_RE = re.compile(r'^\s*\[[^\]]+\]\s*')
+_NAME_PREFIX_RE = re.compile(r'^\s*[A-ZА-ЯІЇЄҐ]+\s*:\s*', re.IGNORECASE)
+_MD_HEADER_RE = re.compile(r'^#+\s+', re.MULTILINE)
+_MD_DIVIDER_RE = re.compile(r'^---+$', re.MULTILINE)
+_MD_INLINE_RE = re.compile(r'\*\*|__|`+')
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+_MD_BULLET_RE = re.compile(r'^\s*(?:[-*+•]|\d+[.)])\s+', re.MULTILINE)
+_VOICE_LINE_RE = re.compile(r'^\s*(?:\[VOICE\]|VOICE\s*:)\s*(.+)$', re.IGNORECASE)
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?…])\s+|\n+')
+_CLAUSE_SPLIT_RE = re.compile(r'[,;:—]\s+')
+
+
+def strip_signature(text: str) -> str:
+    """Remove a leading agent signature like [ATLAS] or NAME:"""
+    return _NAME_PREFIX_RE.sub('', _SIGNATURE_RE.sub('', str(text or ''), count=1), count=1)
+
+
+def detect_agent(text: str, signatures: Dict[str, str], default: Optional[str] = None) -> Optional[str]:
+    """Agent whose signature (e.g. [ТЕТЯНА]) or name prefix (ТЕТЯНА:) starts the text"""
+    head = str(text or '').lstrip()[:40].upper()
+    for agent, signature in signatures.items():
+        name = signature.strip('[]').upper()
+        if head.startswith(signature.upper()) or head.startswith(f'{name}:') or head.startswith(f'{agent.upper()}:'):
+            return agent
+    return default
+
+
+def strip_markdown_headers(text: str) -> str:
+    return _MD_DIVIDER_RE.sub('', _MD_HEADER_RE.sub('', text))
+
+
+def strip_markdown(text: str) -> str:
+    """Headers, dividers, emphasis, inline code, links and list markers -> plain speakable text"""
+    text = _MD_LINK_RE.sub(r'\1', strip_markdown_headers(text))
+    return _MD_BULLET_RE.sub('', _MD_INLINE_RE.sub('', text))
+
+
+def extract_voice_only(text: str, max_len: int = 220) -> str:
+    """Collect [VOICE] / VOICE: lines (Tetyana's spoken summary)"""
+    picked = []
+    for line in str(text or '').splitlines():
+        m = _VOICE_LINE_RE.match(line)
+        if m:
+            picked.append(m.group(1).strip())
+    result = ' '.join(picked).strip()
+    return result[:max_len]
+
+
+def split_phrases(text: str, max_len: int = 140, max_parts: int = 20) -> List[str]:
+    """Split into sentences; sentences longer than max_len are packed by clauses"""
+    parts = [p.strip() for p in _SENTENCE_SPLIT_RE.split(text or '') if p and p.strip()]
+    result = []
+    for part in parts:
+        if len(part) <= max_len:
+            result.append(part)
+            continue
+        buf = ''
+        for clause in (c.strip() for c in _CLAUSE_SPLIT_RE.split(part)):
+            if not clause:
+                continue
+            if len(f"{buf} {clause}".strip()) > max_len:
+                if buf:
+                    result.append(buf.strip())
+                buf = clause
+            else:
+                buf = f"{buf} {clause}" if buf else clause
+        if buf:
+            result.append(buf.strip())
+    return result[:max_parts]
+
+
+def clean_for_speech(text: str, agent: str = 'atlas') -> str:
+    """Agent message without signature and markdown; Tetyana's [VOICE] summary when she gives one"""
+    clean = strip_markdown(strip_signature(text))
+    if agent == 'tetyana':
+        clean = extract_voice_only(clean) or clean
+    return clean.strip()
+
+
+def segment_for_tts(text: str, agent: str = 'atlas', max_len: int = 140, max_parts: int = 20) -> List[str]:
+    """Clean an agent message and split it into short speakable phrases"""
+    return split_phrases(clean_for_speech(text, agent), max_len=max_len, max_parts=max_parts)
@@ -629,6 +629,11 @@ class AtlasIntelligentChatManager {
                 this.addMessage(`Помилка workflow: ${data.data.error}`, 'error');
                 break;
                 
+            case 'workflow_cancelled':
+                // Потік обірвано сервером після переривання користувачем
+                this.log(`[WORKFLOW] Workflow cancelled: ${data.data.reason}`);
+                break;
+                
             default:
                 this.log(`[STREAM] Unknown message type: ${data.type}`);
         }
@@ -728,13 +733,14 @@ class AtlasIntelligentChatManager {
     async processVoiceResponse(responseText) {
         try {
             // Визначаємо агента та підготовляємо відповідь
+            // Сервер чистить текст, ділить на фрази і одразу синтезує їх у фоні (той самий Accept, що й для синтезу)
             const prepareResponse = await fetch(`${this.frontendBase}/api/voice/prepare_response`, {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
+                headers: this.ttsRequestHeaders(),
                 body: JSON.stringify({
-                    text: responseText
+                    text: responseText,
+                    sessionId: this.getSessionId(),
+                    prefetch: this.isVoiceEnabled()
                 })
             });
             
@@ -751,11 +757,12 @@ class AtlasIntelligentChatManager {
                     // Синтезуємо голос якщо потрібно
                     if (this.isVoiceEnabled()) {
                         // Respect one-shot guard for the first TTS playback
-                        if (!this.voiceSystem.firstTtsDone) {
-                            this.voiceSystem.firstTtsDone = true;
-                            await this.synthesizeAndPlay(prepData.text, prepData.agent);
+                        this.voiceSystem.firstTtsDone = true;
+                        if (prepData.chunks && prepData.chunks.length > 0) {
+                            await this.playPreparedChunks(prepData.chunks, prepData.agent,
+                                prepData.speech_text || prepData.text);
                         } else {
-                            await this.synthesizeAndPlay(prepData.text, prepData.agent);
+                            await this.synthesizeAndPlay(prepData.speech_text || prepData.text, prepData.agent);
                         }
                     }
                     
@@ -773,6 +780,56 @@ class AtlasIntelligentChatManager {
         }
     }
     
+    // Відтворює фрази з /api/voice/prepare_response по черзі; сервер уже синтезує їх у фоні,
+    // тож запити здебільшого потрапляють у кеш. Наступну фразу запитуємо, поки грає поточна.
+    async playPreparedChunks(chunks, agent, fullText) {
+        const agentConfig = this.voiceSystem.agents[agent] || this.voiceSystem.agents.atlas;
+        const epoch = this.voiceSystem.interruptEpoch || 0;
+        const fetchChunk = (text) => fetch(`${this.frontendBase}/api/voice/synthesize`, {
+            method: 'POST',
+            headers: this.ttsRequestHeaders(),
+            body: JSON.stringify({
+                text,
+                agent,
+                voice: agentConfig.voice,
+                rate: agentConfig.rate || 1.0,
+                sessionId: this.getSessionId()
+            })
+        });
+        let played = 0;
+        try {
+            let next = fetchChunk(chunks[0]);
+            for (let i = 0; i < chunks.length; i++) {
+                const response = await next;
+                next = i + 1 < chunks.length ? fetchChunk(chunks[i + 1]) : null;
+                // Користувач перебив агента - решту фраз не відтворюємо
+                if (response.status === 499 || (this.voiceSystem.interruptEpoch || 0) !== epoch) return;
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const audioBlob = await response.blob();
+                await this.playAudioBlob(audioBlob, `${agent} (${agentConfig.voice}, ${i + 1}/${chunks.length})`,
+                    { agent, text: chunks[i] });
+                played++;
+            }
+        } catch (error) {
+            this.log(`[VOICE] Prepared chunk playback failed: ${error.message}`);
+            // Нічого ще не прозвучало - пробуємо звичайний синтез усього тексту
+            if (played === 0) await this.synthesizeAndPlay(fullText, agent);
+        }
+    }
+
+    // Заголовки для /api/voice/synthesize: просимо стиснене аудіо, яке браузер уміє відтворити
+    ttsRequestHeaders() {
+        if (!this._ttsAccept) {
+            const probe = new Audio();
+            const prefs = [];
+            if (probe.canPlayType('audio/ogg; codecs=opus')) prefs.push('audio/ogg; codecs=opus');
+            if (probe.canPlayType('audio/flac')) prefs.push('audio/flac;q=0.9');
+            prefs.push('audio/wav;q=0.5');
+            this._ttsAccept = prefs.join(', ');
+        }
+        return { 'Content-Type': 'application/json', 'Accept': this._ttsAccept };
+    }
+
     // Helper method for retry delays
     delay(ms) {
         return new Promise(resolve => setTimeout(resolve, ms));
@@ -797,13 +854,12 @@ class AtlasIntelligentChatManager {
             
             const response = await fetch(`${this.frontendBase}/api/voice/synthesize`, {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
+                headers: this.ttsRequestHeaders(),
                 body: JSON.stringify({
                     text: text,
                     voice: agentConfig.voice,
                     agent: agent,
+                    sessionId: this.getSessionId(), // щоб /api/voice/interrupt міг скасувати синтез
                     wait: true // ВАЖЛИВО: чекаємо завершення
                 })
             });
@@ -1114,6 +1170,21 @@ class AtlasIntelligentChatManager {
             
             this.log(`[VOICE] Synthesizing ${agent} voice with ${voice} (attempt ${retryCount + 1})`);
             
+            // Довгі відповіді: сервер ділить текст на речення, синтезує їх паралельно на всіх TTS
+            // і віддає один безперервний WAV — відтворення починається після першого речення
+            if (retryCount === 0 && this.voiceSystem.streamLongTexts !== false
+                && speechText.length > 160 && /[.!?…]\s/.test(speechText)) {
+                const params = new URLSearchParams({ text: speechText, agent, voice, rate: String(agentConfig.rate || 1.0),
+                    sessionId: this.getSessionId() });
+                try {
+                    await this.playAudioBlob(`${this.frontendBase}/api/voice/synthesize_stream?${params}`,
+                        `${agent} (${voice}, stream)`, { agent, text: speechText });
+                    return;
+                } catch (streamError) {
+                    this.log(`[VOICE] Streaming TTS failed (${streamError?.message || streamError}), falling back to single request`);
+                }
+            }
+            
             // Збільшуємо таймаут з 15 до 30 секунд для довгих текстів
             const controller = new AbortController();
             const timeout = Math.max(30000, speechText.length * 50); // Мінімум 30с, +50мс за символ
@@ -1122,25 +1193,39 @@ class AtlasIntelligentChatManager {
             // Синтезуємо голос з налаштуваннями агента
             const response = await fetch(`${this.frontendBase}/api/voice/synthesize`, {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
+                headers: this.ttsRequestHeaders(),
                 body: JSON.stringify({
                     text: speechText,
                     agent: agent,
                     voice: voice,
                     pitch: agentConfig.pitch || 1.0,
-                    rate: agentConfig.rate || 1.0
+                    rate: agentConfig.rate || 1.0,
+                    sessionId: this.getSessionId()
                 }),
                 signal: controller.signal
             });
             clearTimeout(t);
             
+            // 499: користувач перебив агента, синтез скасовано на сервері - нічого не відтворюємо
+            if (response.status === 499) {
+                this.log(`[VOICE] TTS for ${agent} cancelled by interruption`);
+                return;
+            }
+            
             if (!response.ok) {
                 // Покращена обробка помилок з детальним логуванням
                 const errorDetails = `HTTP ${response.status} ${response.statusText}`;
                 this.log(`[VOICE] TTS failed: ${errorDetails} (attempt ${retryCount + 1}/${this.voiceSystem.maxRetries + 1})`);
                 
+                // Черга TTS переповнена: чекаємо стільки, скільки просить сервер (Retry-After)
+                if ((response.status === 429 || response.status === 503) && retryCount < this.voiceSystem.maxRetries) {
+                    const retryAfter = parseFloat(response.headers.get('Retry-After'));
+                    const waitMs = Number.isFinite(retryAfter) ? Math.min(retryAfter * 1000, 10000) : 500 * (retryCount + 1);
+                    this.log(`[VOICE] TTS busy, retrying in ${waitMs}ms...`);
+                    await this.delay(waitMs);
+                    return await this.synthesizeAndPlay(text, agent, retryCount + 1);
+                }
+                
                 // Дозволяємо ретраї для всіх агентів; фолбек-голос лише якщо дозволено
                 if (retryCount < this.voiceSystem.maxRetries) {
                     this.log(`[VOICE] Retrying TTS in ${500 * (retryCount + 1)}ms...`);
@@ -1155,8 +1240,9 @@ class AtlasIntelligentChatManager {
                     const t2 = setTimeout(() => controller2.abort(), timeout2);
                     const fallbackResponse = await fetch(`${this.frontendBase}/api/voice/synthesize`, {
                         method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ text: speechText, agent, voice: fallbackVoice, pitch: 1.0, rate: 1.0 }),
+                        headers: this.ttsRequestHeaders(),
+                        body: JSON.stringify({ text: speechText, agent, voice: fallbackVoice, pitch: 1.0, rate: 1.0,
+                            sessionId: this.getSessionId() }),
                         signal: controller2.signal
                     });
                     clearTimeout(t2);
@@ -1319,8 +1405,10 @@ class AtlasIntelligentChatManager {
     async playAudioBlob(audioBlob, description, meta = {}) {
         return new Promise((resolve, reject) => {
             try {
-                console.log(`[ATLAS-TTS] Playing audio blob: ${description}, size=${audioBlob.size}, type=${audioBlob.type}`);
-                const audioUrl = URL.createObjectURL(audioBlob);
+                // Приймаємо Blob або готовий URL (потоковий синтез відтворюється напряму, по мірі надходження)
+                const isUrl = typeof audioBlob === 'string';
+                console.log(`[ATLAS-TTS] Playing audio ${isUrl ? 'stream' : 'blob'}: ${description}${isUrl ? '' : `, size=${audioBlob.size}, type=${audioBlob.type}`}`);
+                const audioUrl = isUrl ? audioBlob : URL.createObjectURL(audioBlob);
                 console.log(`[ATLAS-TTS] Created audio URL: ${audioUrl}`);
                 const audio = new Audio(audioUrl);
                 audio.preload = 'auto';
@@ -1341,7 +1429,7 @@ class AtlasIntelligentChatManager {
                 } catch (_) {}
                 
                 const cleanup = () => {
-                    URL.revokeObjectURL(audioUrl);
+                    if (!isUrl) URL.revokeObjectURL(audioUrl);
                     this.voiceSystem.currentAudio = null;
                     if (speakingEl) speakingEl.classList.remove('speaking');
                 };
@@ -1841,6 +1929,8 @@ class AtlasIntelligentChatManager {
             // Clear TTS queue
             this.voiceSystem.ttsQueue = [];
             this.voiceSystem.isProcessingTTS = false;
+            // Зупиняє відтворення підготовлених фраз (playPreparedChunks)
+            this.voiceSystem.interruptEpoch = (this.voiceSystem.interruptEpoch || 0) + 1;
             
             // Send interruption to backend
             try {
@@ -1857,7 +1947,7 @@ class AtlasIntelligentChatManager {
                 
                 if (response.ok) {
                     const data = await response.json();
-                    this.log(`[STT] Interruption processed: ${data.action}`);
+                    this.log(`[STT] Interruption processed: ${data.action} (cancelled in-flight: ${data.cancelled || 0})`);
                     
                     if (data.response && data.response.success) {
                         // Handle response from agents
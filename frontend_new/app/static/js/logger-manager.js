@@ -13,6 +13,10 @@ class AtlasLogger {
         this.lastActivity = Date.now();
         this.isActive = false;
         this.lastLogTimestamp = null; // Трекінг останнього лога для оптимізації
+        this.logCursor = null; // Курсор сервера: запитуємо лише нові записи
+        this.eventSource = null; // SSE /logs/stream; опитування лише як запасний варіант
+        this.streamFailures = 0;
+        this.logElements = new Map(); // id запису сервера -> рядок у контейнері (без дублікатів)
         
         this.init();
     }
@@ -62,9 +66,51 @@ class AtlasLogger {
         return desktop || mobile || null;
     }
     
+    openEventStream() {
+        if (!window.EventSource || this.eventSource) return false;
+        const sinceParam = this.logCursor ? `&since=${encodeURIComponent(this.logCursor)}` : '';
+        const source = new EventSource(`${this.apiBase}/logs/stream?limit=100${sinceParam}`);
+        source.onopen = () => {
+            this.streamFailures = 0;
+        };
+        source.onmessage = (event) => {
+            try {
+                const entry = JSON.parse(event.data);
+                this.displayLogs([entry], true);
+                if (event.lastEventId) this.logCursor = event.lastEventId;
+            } catch (_) { /* no-op */ }
+        };
+        // Продовження запису, який уже показано (багаторядкові повідомлення): той самий id, повний текст
+        source.addEventListener('update', (event) => {
+            try {
+                this.displayLogs([JSON.parse(event.data)], true);
+                if (event.lastEventId) this.logCursor = event.lastEventId;
+            } catch (_) { /* no-op */ }
+        });
+        source.addEventListener('dropped', (event) => {
+            try {
+                const info = JSON.parse(event.data);
+                console.warn(`[LOGGER] ${info.dropped} log entries skipped (slow connection)`);
+            } catch (_) { /* no-op */ }
+        });
+        source.onerror = () => {
+            // EventSource сам перепідключається з Last-Event-ID; після кількох невдач - опитування
+            this.streamFailures++;
+            if (this.streamFailures >= 3 || source.readyState === EventSource.CLOSED) {
+                source.close();
+                this.eventSource = null;
+                this.log('Log stream unavailable, falling back to polling', 'warn');
+            }
+        };
+        this.eventSource = source;
+        return true;
+    }
+
     startLogStream() {
-        // Початкове завантаження логів
-        this.refreshLogs();
+        // Push через SSE, якщо підтримується; інакше - початкове завантаження і опитування
+        if (!this.openEventStream()) {
+            this.refreshLogs();
+        }
         
         // Адаптивне періодичне оновлення
         setInterval(() => {
@@ -90,6 +136,9 @@ class AtlasLogger {
     }
     
     async refreshLogs() {
+        // Поки відкритий SSE-потік, опитування не потрібне
+        if (this.eventSource) return;
+
         const now = Date.now();
         const timeSinceActivity = now - this.lastActivity;
         
@@ -111,7 +160,8 @@ class AtlasLogger {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 5000); // 5 секунд timeout
             
-            const response = await fetch(`${this.apiBase}/logs?limit=100`, {
+            const sinceParam = this.logCursor ? `&since=${encodeURIComponent(this.logCursor)}` : '';
+            const response = await fetch(`${this.apiBase}/logs?limit=100${sinceParam}`, {
                 signal: controller.signal,
                 headers: {
                     'Cache-Control': 'no-cache'
@@ -123,7 +173,11 @@ class AtlasLogger {
             
             const data = await response.json();
             if (data.logs && Array.isArray(data.logs)) {
-                this.displayLogs(data.logs);
+                // З курсором сервер вже віддає лише нове - фільтр за часом не потрібен
+                this.displayLogs(data.logs, Boolean(this.logCursor));
+            }
+            if (data.cursor) {
+                this.logCursor = data.cursor;
             }
         } catch (error) {
             // Тихо ігноруємо помилки логів, щоб не спамити консоль
@@ -131,7 +185,7 @@ class AtlasLogger {
         }
     }
     
-    displayLogs(newLogs) {
+    displayLogs(newLogs, incremental = false) {
         // Не очищуємо контейнер! Логи повинні накопичуватися
         // Нормализуем и сортируем по времени по возрастанию, чтобы порядок был корректным
         const normalizeTime = (t) => new Date(t || Date.now()).getTime();
@@ -139,27 +193,37 @@ class AtlasLogger {
 
         let appended = 0;
         for (const log of sorted) {
+            // Той самий запис може прийти двічі (інший воркер, перепідключення) або дорости
+            // рядками-продовженнями - оновлюємо вже показаний рядок замість дубля
+            const shown = log.id ? this.logElements.get(log.id) : null;
+            if (shown) {
+                shown.className = `log-line ${log.level || 'info'}`;
+                shown.textContent = this.formatLogLine(log);
+                continue;
+            }
             const logTime = normalizeTime(log.timestamp);
             const lastTime = this.lastLogTimestamp ? normalizeTime(this.lastLogTimestamp) : -Infinity;
-            if (logTime <= lastTime) continue; // пропускаем уже показанные
-
-            const tsStr = log.timestamp || new Date().toTimeString().split(' ')[0];
-            const source = log.source ? `[${log.source}]` : '';
-            const message = log.message || '';
+            if (!incremental && logTime <= lastTime) continue; // пропускаем уже показанные
 
             const el = document.createElement('div');
             el.className = `log-line ${log.level || 'info'}`;
-            el.textContent = `${tsStr} ${source} ${message}`;
+            el.textContent = this.formatLogLine(log);
 
             // Добавляем вниз (хронологически), чтобы порядок сохранялся
             this.logsContainer.appendChild(el);
+            if (log.id) {
+                el.dataset.logId = log.id;
+                this.logElements.set(log.id, el);
+            }
             this.lastLogTimestamp = log.timestamp || new Date().toISOString();
             appended++;
         }
 
         // Если переполнились, удаляем лишнее сверху
         while (this.logsContainer.children.length > this.maxLogs) {
-            this.logsContainer.removeChild(this.logsContainer.firstChild);
+            const removed = this.logsContainer.firstChild;
+            if (removed.dataset && removed.dataset.logId) this.logElements.delete(removed.dataset.logId);
+            this.logsContainer.removeChild(removed);
         }
 
         if (appended > 0) {
@@ -167,6 +231,12 @@ class AtlasLogger {
         }
     }
     
+    formatLogLine(log) {
+        const tsStr = log.timestamp || new Date().toTimeString().split(' ')[0];
+        const source = log.source ? `[${log.source}]` : '';
+        return `${tsStr} ${source} ${log.message || ''}`;
+    }
+
     addLog(message, level = 'info', source = 'frontend') {
         const logEntry = {
             timestamp: new Date().toTimeString().split(' ')[0],
@@ -194,7 +264,9 @@ class AtlasLogger {
         
         // Видаляємо старі елементи DOM (знизу)
         while (this.logsContainer.children.length > this.maxLogs) {
-            this.logsContainer.removeChild(this.logsContainer.lastChild);
+            const removed = this.logsContainer.lastChild;
+            if (removed.dataset && removed.dataset.logId) this.logElements.delete(removed.dataset.logId);
+            this.logsContainer.removeChild(removed);
         }
     }
     
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The app modules are flat (imported as `from audio_cache import ...`), like atlas_server does
+APP_DIR = Path(__file__).resolve().parent.parent
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
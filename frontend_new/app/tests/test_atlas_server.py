@@ -0,0 +1,139 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cancellation import Cancelled
+from tts_admission import AdmissionRejected
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('atlas')
+    (tmp / 'app').mkdir()
+    (tmp / 'logs').mkdir()
+    patch = pytest.MonkeyPatch()
+    # The module logs to ../logs and keeps caches and traces next to the app; keep them out of the tree
+    patch.chdir(tmp / 'app')
+    patch.setenv('TTS_CACHE_DIR', str(tmp / 'tts'))
+    patch.setenv('ATLAS_SHARED_STATE', '')
+    patch.setenv('ATLAS_TRACE_FILE', str(tmp / 'logs' / 'traces.jsonl'))
+    patch.setenv('GOOSE_BASE_URL', 'http://127.0.0.1:1')
+    patch.setenv('TTS_SERVER_URL', 'http://127.0.0.1:1')
+    patch.setenv('ORCHESTRATOR_URL', 'http://127.0.0.1:1')
+    import atlas_server
+    yield atlas_server
+    patch.undo()
+
+
+def test_prepare_response_without_prefetch(server):
+    client = server.app.test_client()
+    resp = client.post('/api/voice/prepare_response', json={
+        'text': '[ТЕТЯНА] **Готово.** Файл збережено!\n[VOICE] Завдання виконано',
+        'prefetch': False,
+    })
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['agent'] == 'tetyana'
+    assert body['text'] == '**Готово.** Файл збережено!\n[VOICE] Завдання виконано'
+    assert body['speech_text'] == 'Завдання виконано'
+    assert body['chunks'] == ['Завдання виконано']
+    assert body['prefetch'] == {'queued': 0, 'format': None}
+
+
+def test_prepare_response_requires_text(server):
+    resp = server.app.test_client().post('/api/voice/prepare_response', json={'text': '  '})
+    assert resp.status_code == 400
+
+
+def test_full_queue_answers_429_with_retry_after(server, monkeypatch):
+    def rejected(*args, **kwargs):
+        raise AdmissionRejected('queue_full', 3)
+    monkeypatch.setattr(server, '_open_tts_stream', rejected)
+    resp = server.app.test_client().post('/api/voice/synthesize',
+                                         json={'text': 'Черга заповнена', 'agent': 'atlas'})
+    assert resp.status_code == 429
+    assert resp.headers['Retry-After'] == '3'
+    assert resp.get_json()['reason'] == 'queue_full'
+    # The failed leader must not leave the key claimed for the next request
+    assert server.tts_inflight.stats()['in_flight'] == 0
+
+
+def _fake_orchestrator(server, monkeypatch):
+    """Record what the interrupt forwards instead of posting it"""
+    posted = []
+
+    class Reply:
+        status_code = 200
+
+        def json(self):
+            return {'success': True}
+
+    def post(url, **kwargs):
+        posted.append((url, kwargs['json']['type']))
+        return Reply()
+    monkeypatch.setattr(server.http, 'post', post)
+    return posted
+
+
+def test_interrupt_needs_a_session(server, monkeypatch):
+    _fake_orchestrator(server, monkeypatch)
+    client = server.app.test_client()
+    named = server.inflight_ops.register('s1', 'tts')
+    anonymous = server.inflight_ops.register(None, 'tts')
+    try:
+        resp = client.post('/api/voice/interrupt', json={'transcript': 'стоп'})
+        assert resp.status_code == 400
+        resp = client.post('/api/voice/interrupt', json={'transcript': 'стоп', 'sessionId': 's1'})
+        assert resp.get_json()['cancelled'] == 1
+        assert named.cancelled and not anonymous.cancelled
+    finally:
+        server.inflight_ops.unregister(named)
+
+
+def test_waiter_takes_over_when_the_leaders_session_is_interrupted(server, monkeypatch):
+    calls = []
+
+    def upstream(payload, cache_key, cancel=None):
+        calls.append(cancel.session_id)
+        if len(calls) == 1:
+            cancel.wait(5)
+            raise Cancelled(cancel.reason)
+        return b'audio'
+    monkeypatch.setattr(server, '_synthesize_upstream', upstream)
+    params = server._parse_synthesis_request({'text': 'Передача лідерства', 'agent': 'atlas'})
+    coalesced = server.tts_inflight.stats()['coalesced']
+    leader = server.inflight_ops.register('a', 'tts')
+    waiter = server.inflight_ops.register('b', 'tts')
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            first = pool.submit(server._synthesize_cached, params, leader)
+            while not calls:
+                time.sleep(0.01)
+            second = pool.submit(server._synthesize_cached, params, waiter)
+            while server.tts_inflight.stats()['coalesced'] == coalesced:
+                time.sleep(0.01)
+            server.inflight_ops.cancel_session('a')
+            with pytest.raises(Cancelled):
+                first.result(5)
+            assert second.result(5) == (b'audio', 'miss')
+        assert calls == ['a', 'b']
+    finally:
+        server.inflight_ops.unregister(waiter)
+
+
+def test_interrupt_is_forwarded_on_the_pooled_session(server, monkeypatch):
+    posted = _fake_orchestrator(server, monkeypatch)
+    resp = server.app.test_client().post('/api/voice/interrupt', json={'transcript': 'стоп', 'sessionId': 's2'})
+    assert resp.get_json()['response'] == {'success': True}
+    assert posted == [(f'{server.ORCHESTRATOR_URL}/chat/stream', 'voice_interruption')]
+
+
+def test_orchestrator_5xx_counts_against_its_breaker(server, monkeypatch):
+    class Health:
+        status_code = 500
+    monkeypatch.setattr(server.http, 'get', lambda url, **kwargs: Health())
+    monkeypatch.setattr(server.orchestrator_breaker, 'allow', lambda: True)
+    failures = server.orchestrator_breaker.snapshot()['failures']
+    assert server._probe_orchestrator() == 'error'
+    assert server.orchestrator_breaker.snapshot()['failures'] == failures + 1
@@ -0,0 +1,72 @@
+import os
+import time
+
+from audio_cache import AudioCache, make_cache_key, normalize_text
+
+
+def test_normalize_text_collapses_whitespace():
+    assert normalize_text('  Привіт,\n  світ\t! ') == 'Привіт, світ !'
+    assert normalize_text(None) == ''
+
+
+def test_cache_key_ignores_cosmetic_differences():
+    base = make_cache_key('Привіт світ', 'dmytro', 1.0, None)
+    assert make_cache_key('  Привіт   світ ', 'dmytro ', 1.001, 'NONE') == base
+    assert make_cache_key('Привіт світ', 'dmytro', 1.0, 'none', 'WAV') == base
+
+
+def test_cache_key_separates_real_differences():
+    base = make_cache_key('Привіт', 'dmytro', 1.0, None)
+    assert make_cache_key('Привіт', 'tetiana', 1.0, None) != base
+    assert make_cache_key('Привіт', 'dmytro', 1.2, None) != base
+    assert make_cache_key('Привіт', 'dmytro', 1.0, 'robot') != base
+    assert make_cache_key('Привіт', 'dmytro', 1.0, None, 'opus') != base
+    assert make_cache_key('Привіт', 'dmytro', 1.0, None, sample_rate=16000) != base
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = AudioCache(memory_limit_bytes=30)
+    cache.put('a', b'a' * 10)
+    cache.put('b', b'b' * 10)
+    cache.put('c', b'c' * 10)
+    assert cache.get('a') == (b'a' * 10, 'memory')  # 'a' becomes the most recent
+    cache.put('d', b'd' * 10)
+    assert cache.get('b') == (None, 'miss')
+    assert cache.get('a')[1] == 'memory'
+    stats = cache.stats()
+    assert stats['evictions_memory'] == 1
+    assert stats['memory_bytes'] == 30
+
+
+def test_oversized_entries_are_not_stored():
+    cache = AudioCache(memory_limit_bytes=100, max_entry_bytes=10)
+    assert cache.put('big', b'x' * 11) is False
+    assert cache.put('empty', b'') is False
+    assert cache.get('big') == (None, 'miss')
+
+
+def test_disk_tier_serves_after_memory_eviction(tmp_path):
+    cache = AudioCache(cache_dir=tmp_path, memory_limit_bytes=10, disk_limit_bytes=1000)
+    cache.put('a', b'a' * 10)
+    cache.put('b', b'b' * 10)  # pushes 'a' out of memory
+    assert cache.get('a') == (b'a' * 10, 'disk')
+    assert cache.get('a')[1] == 'memory'  # promoted back
+
+
+def test_disk_eviction_removes_oldest_files(tmp_path):
+    cache = AudioCache(cache_dir=tmp_path, memory_limit_bytes=0, disk_limit_bytes=130)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, bytes([65 + i]) * 40)
+        # Distinct mtimes so eviction order is deterministic
+        past = time.time() - 100 + i
+        os.utime(tmp_path / f'{key}.bin', (past, past))
+    cache.put('d', b'd' * 40)
+    # Evicted down to 90% of the budget, oldest first
+    assert sorted(p.stem for p in tmp_path.glob('*.bin')) == ['c', 'd']
+    assert cache.stats()['disk_bytes'] == 80
+    assert cache.stats()['evictions_disk'] == 2
+
+
+def test_disk_usage_is_rescanned_on_start(tmp_path):
+    AudioCache(cache_dir=tmp_path).put('a', b'x' * 25)
+    assert AudioCache(cache_dir=tmp_path).stats()['disk_bytes'] == 25
@@ -0,0 +1,55 @@
+import pytest
+
+import audio_formats
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, 'wav'),
+    ('', 'wav'),
+    ('*/*', 'wav'),
+    ('audio/*', 'wav'),
+    ('audio/ogg', 'ogg'),
+    ('audio/ogg; codecs=opus', 'opus'),
+    ('audio/ogg; codecs="opus"', 'opus'),
+    ('audio/opus', 'opus'),
+    ('audio/x-flac', 'flac'),
+    ('audio/wav;q=0.5, audio/flac;q=0.9, */*;q=0.1', 'flac'),
+    ('audio/flac;q=0, audio/wav', 'wav'),
+    ('text/html, audio/mpeg', 'wav'),
+])
+def test_accept_negotiation(accept, expected):
+    assert audio_formats.negotiate(None, accept) == expected
+
+
+def test_format_field_wins_over_accept():
+    assert audio_formats.negotiate('FLAC', 'audio/ogg') == 'flac'
+    assert audio_formats.negotiate('vorbis', None) == 'ogg'
+    assert audio_formats.negotiate('wave', None) == 'wav'
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        audio_formats.negotiate('mp3', None)
+
+
+def test_sample_rate():
+    assert audio_formats.parse_sample_rate(None) is None
+    assert audio_formats.parse_sample_rate('0') is None
+    assert audio_formats.parse_sample_rate('16000') == 16000
+    with pytest.raises(ValueError):
+        audio_formats.parse_sample_rate(11025)
+    with pytest.raises(ValueError):
+        audio_formats.parse_sample_rate('fast')
+
+
+def test_sniff_and_content_type():
+    assert audio_formats.content_type(b'RIFF....WAVE') == ('audio/wav', 'wav')
+    assert audio_formats.content_type(b'fLaC\x00') == ('audio/flac', 'flac')
+    assert audio_formats.sniff(b'OggS' + b'\x00' * 24 + b'OpusHead') == 'opus'
+    assert audio_formats.sniff(b'OggS' + b'\x00' * 24 + b'\x01vorbis') == 'ogg'
+
+
+def test_from_content_type():
+    assert audio_formats.from_content_type('audio/ogg; codecs=opus') == 'opus'
+    assert audio_formats.from_content_type('application/octet-stream') == 'wav'
+    assert audio_formats.from_content_type(None) == 'wav'
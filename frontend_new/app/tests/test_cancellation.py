@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import cancellation
+from cancellation import CancelToken, Cancelled, InFlightRegistry
+
+
+def test_token_runs_callbacks_once():
+    token = CancelToken('s1', 'tts')
+    calls = []
+    token.on_cancel(lambda: calls.append('a'))
+    remove = token.on_cancel(lambda: calls.append('removed'))
+    remove()
+    assert token.cancel('interrupt') is True
+    assert token.cancel('again') is False
+    assert calls == ['a']
+    assert token.cancelled and token.reason == 'interrupt'
+    # Registering after cancellation runs the callback at once
+    token.on_cancel(lambda: calls.append('late'))
+    assert calls == ['a', 'late']
+    with pytest.raises(Cancelled):
+        token.raise_if_cancelled()
+
+
+def test_failing_callback_does_not_stop_the_others():
+    token = CancelToken('s1', 'tts')
+    calls = []
+    token.on_cancel(lambda: 1 / 0)
+    token.on_cancel(lambda: calls.append('ok'))
+    token.cancel()
+    assert calls == ['ok']
+
+
+def test_result_returns_early_on_cancel():
+    future, token = Future(), CancelToken('s1', 'goose')
+    threading.Timer(0.05, token.cancel, args=('interrupt',)).start()
+    started = time.monotonic()
+    with pytest.raises(Cancelled) as exc:
+        cancellation.result(future, 5, token)
+    assert exc.value.reason == 'interrupt'
+    assert time.monotonic() - started < 1
+
+
+def test_result_passes_value_and_timeout_through():
+    future = Future()
+    future.set_result(42)
+    assert cancellation.result(future, 1, CancelToken('s1', 'tts')) == 42
+    with pytest.raises(TimeoutError):
+        cancellation.result(Future(), 0.01, CancelToken('s1', 'tts'))
+
+
+def test_registry_cancels_only_the_session():
+    registry = InFlightRegistry()
+    a1, a2 = registry.register('a', 'tts'), registry.register('a', 'goose')
+    b = registry.register('b', 'tts')
+    registry.unregister(a2)
+    assert registry.cancel_session('a') == 1
+    assert a1.cancelled and not a2.cancelled and not b.cancelled
+    assert registry.cancel_session('a') == 0
+    stats = registry.stats()
+    assert stats['cancelled'] == 1 and stats['interrupts'] == 2
+    with registry.track('c', 'chat') as token:
+        assert registry.cancel_session('c') == 1
+    assert token.cancelled
+
+
+def test_work_without_a_session_is_not_registered():
+    registry = InFlightRegistry()
+    token = registry.register(None, 'tts')
+    assert token.session_id is None
+    assert registry.stats()['in_flight'] == 0
+    assert registry.cancel_session(None) == 0
+    assert registry.cancel_session('default') == 0
+    registry.unregister(token)
+    assert not token.cancelled
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.shutdown_called = False
+
+    def shutdown(self, how):
+        self.shutdown_called = True
+
+
+class _FakeResponse:
+    def __init__(self, sock):
+        self.raw = type('Raw', (), {'connection': type('Conn', (), {'sock': sock})()})()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_abort_response_shuts_the_socket_down():
+    sock = _FakeSocket()
+    response = _FakeResponse(sock)
+    cancellation.abort_response(response)
+    assert sock.shutdown_called and response.closed
+    bare = _FakeResponse(None)
+    cancellation.abort_response(bare)
+    assert bare.closed
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _open_breaker(**kwargs):
+    breaker = CircuitBreaker('test', min_calls=3, failure_rate=0.5, open_seconds=0.05, **kwargs)
+    for _ in range(3):
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_once_failure_rate_is_reached():
+    breaker = CircuitBreaker('test', min_calls=3, failure_rate=0.5)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED  # below min_calls
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_successes_keep_it_closed():
+    breaker = CircuitBreaker('test', min_calls=3, failure_rate=0.5)
+    for _ in range(5):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_fails_fast():
+    breaker = _open_breaker()
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.check()
+    assert exc.value.name == 'test'
+    assert 0 < exc.value.retry_in <= 0.05
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_half_open_lets_one_trial_through_and_success_closes():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() is True
+
+
+def test_failed_trial_reopens_with_backoff():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_in() > 0.05  # open period doubled
+
+
+def test_probe_decides_in_background():
+    breaker = _open_breaker(probe=lambda: True)
+    time.sleep(0.06)
+    assert breaker.allow() is False  # callers keep failing fast while the probe runs
+    deadline = time.monotonic() + 2
+    while breaker.state != CLOSED and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['probes'] == 1
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from aiohttp import WSMsgType, web
+
+from goose_client import GooseClient
+from goose_ws_pool import GooseWSPool
+
+
+@pytest.fixture
+def client():
+    return GooseClient(base_url='http://127.0.0.1:1')
+
+
+def _count_probes(monkeypatch, client, is_web=True):
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return is_web
+    monkeypatch.setattr(client, '_is_web', probe)
+    return calls
+
+
+def test_transport_is_probed_once_within_ttl(monkeypatch, client):
+    calls = _count_probes(monkeypatch, client)
+    assert [client._transport_mode() for _ in range(5)] == ['ws'] * 5
+    assert len(calls) == 1
+    client.transport_ttl = 0
+    client._transport_mode()
+    assert len(calls) == 2
+
+
+def test_http_errors_invalidate_the_transport(monkeypatch, client):
+    calls = _count_probes(monkeypatch, client, is_web=False)
+    assert client._transport_mode() == 'sse'
+    client._check_transport('sse', {'success': False, 'error': 'model refused'})
+    client._check_transport('sse', {'success': False, 'cancelled': True, 'error': 'HTTP 499'})
+    client._transport_mode()
+    assert len(calls) == 1
+    client._check_transport('sse', {'success': False, 'error': 'HTTP 500'})
+    assert client.transport_status()['mode'] is None
+    client._transport_mode()
+    assert len(calls) == 2
+    assert client.transport_status()['invalidations'] == 1
+
+
+def test_concurrent_async_callers_share_one_probe(monkeypatch, client):
+    calls = []
+
+    async def probe():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return True
+    monkeypatch.setattr(client, '_is_web_async', probe)
+
+    async def main():
+        return await asyncio.gather(*(client._transport_mode_async() for _ in range(20)))
+    assert asyncio.run(main()) == ['ws'] * 20
+    assert len(calls) == 1
+
+
+def _fake_replies(monkeypatch, client, delays=None):
+    seen = {'active': 0, 'peak': 0, 'sessions': []}
+
+    async def send_reply_async(session_name, message, timeout=90):
+        seen['active'] += 1
+        seen['peak'] = max(seen['peak'], seen['active'])
+        seen['sessions'].append(session_name)
+        try:
+            await asyncio.sleep((delays or {}).get(message, 0.02))
+            return {'success': True, 'response': message.upper()}
+        finally:
+            seen['active'] -= 1
+    monkeypatch.setattr(client, 'send_reply_async', send_reply_async)
+    return seen
+
+
+def test_send_many_bounds_concurrency_and_keeps_order(monkeypatch, client):
+    seen = _fake_replies(monkeypatch, client, delays={'a': 0.1})
+    prompts = ['a', 'b', 'c', 'd', 'e', ('own_session', 'f')]
+    results = client.send_many(prompts, concurrency=2, lane_prefix='lane')
+    assert [r['response'] for r in results] == ['A', 'B', 'C', 'D', 'E', 'F']
+    assert seen['peak'] == 2
+    assert set(seen['sessions']) == {'lane_0', 'lane_1', 'own_session'}
+
+
+def test_send_many_times_out_each_request(monkeypatch, client):
+    _fake_replies(monkeypatch, client, delays={'slow': 5})
+    started = time.monotonic()
+    results = client.send_many(['slow', 'fast'], concurrency=2, timeout=0.2)
+    assert time.monotonic() - started < 2
+    assert results[0] == {'success': False, 'error': 'Timed out after 0.2s'}
+    assert results[1]['success'] is True
+    assert client.send_many([]) == []
+
+
+class _GooseWS:
+    """Local stand-in for the Goose web UI: answers each message with its text and 'complete'"""
+
+    def __init__(self):
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait(5)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/ws', self._handle)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, request):
+        self.connections += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            content = json.loads(msg.data)['content']
+            if content == 'hang up':
+                await ws.close()
+                break
+            await ws.send_str(json.dumps({'type': 'response', 'content': content}))
+            await ws.send_str(json.dumps({'type': 'complete'}))
+        return ws
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def goose_ws():
+    server = _GooseWS()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def pool():
+    pool = GooseWSPool(heartbeat=30, backoff=0.01)
+    yield pool
+    # Open sockets would keep the server's shutdown waiting for their handlers
+    for sock in list(pool._sockets.values()):
+        pool.submit(sock.close()).result(5)
+
+
+def _turn(pool, base_url, session, text):
+    replies = []
+
+    def on_message(data):
+        frame = json.loads(data)
+        if frame['type'] == 'response':
+            replies.append(frame['content'])
+        return frame['type'] == 'complete'
+    pool.exchange(base_url, session, {'type': 'message', 'content': text}, 5, on_message).result(5)
+    return replies
+
+
+def test_ws_pool_reuses_and_reconnects(goose_ws, pool):
+    base = f'http://127.0.0.1:{goose_ws.port}'
+    assert _turn(pool, base, 's1', 'one') == ['one']
+    assert _turn(pool, base, 's1', 'two') == ['two']
+    assert _turn(pool, base, 's2', 'three') == ['three']
+    stats = pool.stats()
+    assert (stats['connects'], stats['reuses'], stats['open']) == (2, 1, 2)
+
+    # The server hangs up on a reused socket: the turn reconnects and is retried once
+    assert _turn(pool, base, 's1', 'hang up') == []
+    assert pool.stats()['reconnects'] == 1
+    # The dead socket's entry is gone right away, not at the next sweep
+    assert (base, 's1') not in pool._sockets
+    assert _turn(pool, base, 's1', 'four') == ['four']
+    assert goose_ws.connections == 4
+
+
+def test_ws_pool_evicts_idle_sockets(goose_ws, pool):
+    pool.idle_ttl = 0.1
+    base = f'http://127.0.0.1:{goose_ws.port}'
+    _turn(pool, base, 's1', 'one')
+    time.sleep(0.2)
+    pool.submit(pool._evict_idle()).result(5)
+    stats = pool.stats()
+    assert stats['evicted'] == 1 and stats['open'] == 0
+    assert _turn(pool, base, 's1', 'two') == ['two']
+    assert pool.stats()['connects'] == 2
+
+
+def test_ws_pool_sweeper_spares_a_socket_between_two_turns(goose_ws, pool):
+    base = f'http://127.0.0.1:{goose_ws.port}'
+    _turn(pool, base, 's1', 'one')
+    sock = pool._sockets[(base, 's1')]
+    replies = []
+
+    def on_message(data):
+        frame = json.loads(data)
+        replies.append(frame['type'])
+        return frame['type'] == 'complete'
+
+    async def scenario():
+        sock.last_used -= pool.idle_ttl + 1
+        async with sock.lock:
+            waiter = asyncio.ensure_future(
+                pool._exchange(base, 's1', {'type': 'message', 'content': 'two'}, 5, on_message, None))
+            await asyncio.sleep(0)
+        # The lock is free now, but the waiter has not run yet
+        await pool._evict_idle()
+        await waiter
+    pool.submit(scenario()).result(5)
+    stats = pool.stats()
+    assert replies == ['response', 'complete']
+    assert (stats['evicted'], stats['connects'], stats['reuses']) == (0, 1, 1)
+    assert pool._sockets[(base, 's1')] is sock
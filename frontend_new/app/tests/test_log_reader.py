@@ -0,0 +1,84 @@
+import os
+
+from log_reader import LogReader, make_cursor, parse_cursor
+
+
+def _write(path, text, mode='a'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.write(text)
+
+
+def _messages(entries):
+    return [e['message'] for e in entries]
+
+
+def test_cursor_round_trip_and_garbage():
+    positions = [(0x1a, 0x200), None]
+    assert parse_cursor(make_cursor(positions), 2) == positions
+    assert parse_cursor(make_cursor(positions), 3) is None
+    assert parse_cursor('zz.1-0.0', 2) is None
+    assert parse_cursor('', 2) is None
+
+
+def test_cursor_is_valid_in_another_reader(tmp_path):
+    a, b = tmp_path / 'a.log', tmp_path / 'b.log'
+    _write(a, '2025-09-04 20:19:54,360 INFO: a1\n')
+    _write(b, '2025-09-04 20:19:55,000 ERROR: b1\n')
+    files = [(a, 'a'), (b, 'b')]
+    entries, cursor = LogReader(files).read()
+    assert _messages(entries) == ['2025-09-04 20:19:54,360 INFO: a1', '2025-09-04 20:19:55,000 ERROR: b1']
+    assert entries[1]['level'] == 'error'
+
+    _write(a, '2025-09-04 20:19:56,000 INFO: a2\n')
+    # A fresh reader stands in for another worker process
+    other = LogReader(files)
+    entries, cursor2 = other.read(since=cursor)
+    assert _messages(entries) == ['2025-09-04 20:19:56,000 INFO: a2']
+    assert other.read(since=cursor2)[0] == []
+    # Garbage falls back to the full tail
+    assert len(other.read(since='nonsense')[0]) == 3
+
+
+def test_unfinished_line_waits_for_newline(tmp_path):
+    path = tmp_path / 'a.log'
+    _write(path, '2025-09-04 20:19:54,360 INFO: a1\n2025-09-04 20:19:55')
+    reader = LogReader([(path, 'a')])
+    entries, cursor = reader.read()
+    assert len(entries) == 1
+    _write(path, ',000 INFO: a2\n')
+    assert _messages(reader.read(since=cursor)[0]) == ['2025-09-04 20:19:55,000 INFO: a2']
+
+
+def test_continuation_lines_return_the_grown_entry(tmp_path):
+    path = tmp_path / 'a.log'
+    _write(path, '2025-09-04 20:19:54,360 INFO: ### [ТЕТЯНА]\n')
+    reader = LogReader([(path, 'a')])
+    entries, cursor = reader.read()
+    _write(path, 'Завдання виконано\n')
+    grown, _ = reader.read(since=cursor)
+    assert grown[0]['id'] == entries[0]['id']
+    assert grown[0]['message'] == '2025-09-04 20:19:54,360 INFO: ### [ТЕТЯНА]\nЗавдання виконано'
+
+
+def test_rotation_and_truncation_restart_the_file(tmp_path):
+    path = tmp_path / 'a.log'
+    _write(path, '2025-09-04 20:19:54,360 INFO: before\n' * 3)
+    reader = LogReader([(path, 'a')])
+    old, cursor = reader.read()
+
+    _write(path, '2025-09-04 20:20:00,000 INFO: truncated\n', mode='w')
+    entries, cursor = reader.read(since=cursor)
+    assert _messages(entries) == ['2025-09-04 20:20:00,000 INFO: truncated']
+    assert entries[0]['id'] not in {e['id'] for e in old}
+
+    os.rename(path, str(path) + '.1')
+    _write(path, '2025-09-04 20:21:00,000 INFO: rotated\n')
+    entries, _ = reader.read(since=cursor)
+    assert _messages(entries) == ['2025-09-04 20:21:00,000 INFO: rotated']
+
+
+def test_limit_keeps_the_newest(tmp_path):
+    path = tmp_path / 'a.log'
+    _write(path, ''.join(f'2025-09-04 20:19:{s:02d},000 INFO: line {s}\n' for s in range(10)))
+    entries, _ = LogReader([(path, 'a')]).read(limit=3)
+    assert [e['message'][-6:] for e in entries] == ['line 7', 'line 8', 'line 9']
@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+import pytest
+
+import log_stream
+from log_reader import LogFile
+
+
+@pytest.fixture
+def hub(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_stream, 'INotify', None)
+    path = tmp_path / 'a.log'
+    path.write_text('2025-09-04 20:19:54,360 INFO: old\n', encoding='utf-8')
+    hub = log_stream.LogStreamHub([LogFile(path, 'a')], poll_interval=0.1, max_clients=2)
+    hub.path = path
+    yield hub
+    hub.stop()
+
+
+def _append(path, text, mode='a'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.write(text)
+
+
+def _frames(sub, count, timeout=3.0):
+    """Parse up to `count` SSE frames as (event, id, data)"""
+    frames = []
+    deadline = time.monotonic() + timeout
+    while len(frames) < count and time.monotonic() < deadline:
+        if sub.queue.empty():
+            time.sleep(0.05)
+            continue
+        _, raw = sub.queue.get()
+        fields = dict(line.split(': ', 1) for line in raw.strip().split('\n'))
+        frames.append((fields.get('event'), fields.get('id'), json.loads(fields['data'])))
+    return frames
+
+
+def _started(hub):
+    sub = hub.subscribe()
+    deadline = time.monotonic() + 3
+    while hub._positions[0] is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return sub
+
+
+def test_new_entries_and_continuations(hub):
+    sub = _started(hub)
+    _append(hub.path, '2025-09-04 20:19:55,000 INFO: first\n')
+    [(event, cursor, entry)] = _frames(sub, 1)
+    assert event is None and entry['message'].endswith('first')
+    assert cursor == log_stream.make_cursor([(os.stat(hub.path).st_ino, os.path.getsize(hub.path))])
+
+    _append(hub.path, '  continuation\n')
+    [(event, _, grown)] = _frames(sub, 1)
+    assert event == 'update'
+    assert grown['id'] == entry['id']
+    assert grown['message'].endswith('first\n  continuation')
+
+
+def test_truncation_and_rotation(hub):
+    _append(hub.path, '2025-09-04 20:19:55,000 INFO: filler\n' * 3)
+    sub = _started(hub)
+    # Truncated in place to less than was already read
+    _append(hub.path, '2025-09-04 20:20:00,000 INFO: truncated\n', mode='w')
+    [(event, _, entry)] = _frames(sub, 1)
+    assert event is None and entry['message'].endswith('truncated')
+
+    os.rename(hub.path, str(hub.path) + '.1')
+    _append(hub.path, '2025-09-04 20:21:00,000 INFO: rotated\n')
+    [(event, _, entry)] = _frames(sub, 1)
+    assert event is None and entry['message'].endswith('rotated')
+
+
+def test_full_queue_counts_drops():
+    sub = log_stream.Subscriber(maxsize=1)
+    sub.offer((0, 1, 10), 'a')
+    sub.offer((0, 1, 20), 'b')
+    assert sub.dropped == 1 and sub.queue.qsize() == 1
+
+
+def test_client_cap(hub):
+    first, second = hub.subscribe(), hub.subscribe()
+    assert first and second
+    assert hub.subscribe() is None
+    hub.unsubscribe(first)
+    assert hub.subscribe() is not None
+    stats = hub.stats()
+    assert stats['rejected'] == 1 and stats['clients'] == 2 and stats['backend'] == 'poll'
+
+
+def test_default_cap_serves_ten_dashboards(tmp_path):
+    hub = log_stream.LogStreamHub([LogFile(tmp_path / 'a.log', 'a')], poll_interval=0.1)
+    try:
+        assert all(hub.subscribe() is not None for _ in range(10))
+    finally:
+        hub.stop()
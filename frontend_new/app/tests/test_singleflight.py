@@ -0,0 +1,55 @@
+import pytest
+
+from singleflight import Abandoned, SingleFlight
+
+
+def test_first_caller_leads_and_others_share_its_result():
+    flight = SingleFlight()
+    future, leader = flight.claim('k')
+    same, follower = flight.claim('k')
+    assert leader and not follower
+    assert same is future
+    flight.settle('k', result=b'audio')
+    assert future.result(timeout=0) == b'audio'
+    assert flight.stats() == {'leaders': 1, 'coalesced': 1, 'abandoned': 0, 'in_flight': 0}
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    future, _ = flight.claim('k')
+    flight.settle('k', error=RuntimeError('backend down'))
+    with pytest.raises(RuntimeError, match='backend down'):
+        future.result(timeout=0)
+
+
+def test_key_is_forgotten_after_settle():
+    flight = SingleFlight()
+    first, _ = flight.claim('k')
+    flight.settle('k', result=1)
+    second, leader = flight.claim('k')
+    assert leader and second is not first
+
+
+def test_keys_are_independent_and_settle_is_idempotent():
+    flight = SingleFlight()
+    a, lead_a = flight.claim('a')
+    b, lead_b = flight.claim('b')
+    assert lead_a and lead_b
+    flight.settle('a', result='A')
+    flight.settle('a', result='again')
+    assert a.result(timeout=0) == 'A'
+    assert not b.done()
+
+
+def test_abandoned_key_is_taken_over_by_a_waiter():
+    flight = SingleFlight()
+    first, leader = flight.claim('k')
+    waiter_future, waiter_leads = flight.claim('k')
+    assert leader and not waiter_leads
+    flight.abandon('k')
+    with pytest.raises(Abandoned):
+        waiter_future.result(timeout=1)
+    # Claiming again makes the waiter the new leader
+    _, leader = flight.claim('k')
+    assert leader
+    assert flight.stats()['abandoned'] == 1
@@ -0,0 +1,49 @@
+from speech_text import (clean_for_speech, detect_agent, extract_voice_only, segment_for_tts, split_phrases,
+                         strip_markdown, strip_signature)
+
+SIGNATURES = {'atlas': '[ATLAS]', 'tetyana': '[ТЕТЯНА]', 'grisha': '[ГРИША]'}
+
+
+def test_strip_signature():
+    assert strip_signature('[ATLAS] Привіт') == 'Привіт'
+    assert strip_signature('ТЕТЯНА: Готово') == 'Готово'
+    assert strip_signature('Без підпису [ATLAS]') == 'Без підпису [ATLAS]'
+
+
+def test_detect_agent():
+    assert detect_agent('[ТЕТЯНА] Виконую', SIGNATURES) == 'tetyana'
+    assert detect_agent('  гриша: перевірив', SIGNATURES) == 'grisha'
+    assert detect_agent('Просто текст', SIGNATURES, 'atlas') == 'atlas'
+
+
+def test_strip_markdown():
+    text = '### Заголовок\n---\n**Жирний** і `код`, [посилання](http://x)\n- пункт\n2) другий'
+    assert strip_markdown(text) == 'Заголовок\n\nЖирний і код, посилання\nпункт\nдругий'
+
+
+def test_clean_for_speech_uses_tetyanas_voice_summary():
+    message = '[ТЕТЯНА] ## Звіт\nДовгий технічний опис\n[VOICE] Завдання виконано'
+    assert clean_for_speech(message, 'tetyana') == 'Завдання виконано'
+    # Without a summary she is read like anyone else
+    assert clean_for_speech('[ТЕТЯНА] **Готово**', 'tetyana') == 'Готово'
+    # Other agents ignore [VOICE] lines
+    assert 'Довгий технічний опис' in clean_for_speech(message, 'atlas')
+
+
+def test_extract_voice_only():
+    assert extract_voice_only('a\nVOICE: перше\n[VOICE] друге') == 'перше друге'
+    assert extract_voice_only('VOICE: ' + 'x' * 300, max_len=10) == 'x' * 10
+
+
+def test_split_phrases_respects_limits():
+    assert split_phrases('Перше речення. Друге! Третє?') == ['Перше речення.', 'Друге!', 'Третє?']
+    long_sentence = ', '.join(['частина номер десять'] * 12) + '.'
+    parts = split_phrases(long_sentence, max_len=60)
+    assert len(parts) > 1
+    assert all(len(p) <= 60 for p in parts)
+    assert len(split_phrases('Так. ' * 50, max_parts=5)) == 5
+
+
+def test_segment_for_tts():
+    assert segment_for_tts('[ATLAS] **Привіт!** Як справи?') == ['Привіт!', 'Як справи?']
+    assert segment_for_tts('') == []
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from cancellation import CancelToken, Cancelled
+from tts_admission import AdmissionRejected, TTSAdmission
+
+BACKENDS = ['http://a', 'http://b']
+
+
+def _first(free):
+    return free[0]
+
+
+def test_slots_follow_advertised_capacity():
+    admission = TTSAdmission(default_capacity=1)
+    admission.set_capacity('http://a', 2)
+    assert admission.try_acquire(lambda: BACKENDS, _first) == 'http://a'
+    assert admission.try_acquire(lambda: BACKENDS, _first) == 'http://a'
+    assert admission.try_acquire(lambda: BACKENDS, _first) == 'http://b'
+    assert admission.try_acquire(lambda: BACKENDS, _first) is None
+    admission.release('http://a', 0.5)
+    assert admission.in_flight('http://a') == 1
+    assert admission.try_acquire(lambda: BACKENDS, _first) == 'http://a'
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    admission = TTSAdmission(default_capacity=1, max_queue=0)
+    admission.acquire(lambda: ['http://a'], _first)
+    with pytest.raises(AdmissionRejected) as exc:
+        admission.acquire(lambda: ['http://a'], _first)
+    assert exc.value.reason == 'queue_full'
+    assert exc.value.retry_after >= 1
+    assert admission.stats()['rejected_full'] == 1
+
+
+def test_waiter_times_out():
+    admission = TTSAdmission(default_capacity=1, max_queue=4, queue_timeout=0.05)
+    admission.acquire(lambda: ['http://a'], _first)
+    with pytest.raises(AdmissionRejected) as exc:
+        admission.acquire(lambda: ['http://a'], _first)
+    assert exc.value.reason == 'queue_timeout'
+    assert admission.stats()['waiting'] == 0
+
+
+def test_waiter_gets_released_slot():
+    admission = TTSAdmission(default_capacity=1, queue_timeout=5)
+    admission.acquire(lambda: ['http://a'], _first)
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(admission.acquire(lambda: ['http://a'], _first)))
+    waiter.start()
+    time.sleep(0.05)
+    assert got == [] and admission.stats()['waiting'] == 1
+    admission.release('http://a')
+    waiter.join(2)
+    assert got == ['http://a']
+
+
+def test_try_acquire_does_not_jump_the_queue():
+    admission = TTSAdmission(default_capacity=1, queue_timeout=5)
+    admission.acquire(lambda: ['http://a'], _first)
+    waiter = threading.Thread(target=admission.acquire, args=(lambda: ['http://a'], _first))
+    waiter.start()
+    time.sleep(0.05)
+    assert admission.stats()['waiting'] == 1
+    # 'http://b' is free, but a caller is already queued
+    assert admission.try_acquire(lambda: ['http://b'], _first) is None
+    admission.release('http://a')
+    waiter.join(2)
+    assert admission.in_flight('http://a') == 1
+    assert admission.try_acquire(lambda: ['http://b'], _first) == 'http://b'
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    admission = TTSAdmission(default_capacity=1, queue_timeout=5)
+    admission.acquire(lambda: ['http://a'], _first)
+    token = CancelToken('s1', 'tts')
+    errors = []
+
+    def wait():
+        try:
+            admission.acquire(lambda: ['http://a'], _first, cancel=token)
+        except Cancelled as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    token.cancel('interrupt')
+    waiter.join(2)
+    assert len(errors) == 1 and errors[0].reason == 'interrupt'
+    assert time.monotonic() - started < 1
+    assert admission.stats()['waiting'] == 0
+    assert admission.stats()['cancelled'] == 1
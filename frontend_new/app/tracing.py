@@ -0,0 +1,253 @@
+"""
+Lightweight request tracing.
+
+Every request gets a trace ID, taken from the incoming X-Request-ID header or
+generated, which is forwarded to the orchestrator, Goose and the TTS servers.
+Spans (name, start, duration, parent, attributes) are recorded at each hop and
+written as JSON lines by a background thread, so recording never blocks a
+request on disk I/O. Recent traces are also kept in memory for /api/traces.
+
+The current trace and span live in context variables; work handed to thread
+pools must be wrapped with `bound()` to keep its spans in the same trace.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('atlas.tracing')
+
+TRACE_HEADER = 'X-Request-ID'
+
+_VALID_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+_trace_id: contextvars.ContextVar = contextvars.ContextVar('atlas_trace_id', default=None)
+_span_id: contextvars.ContextVar = contextvars.ContextVar('atlas_span_id', default=None)
+_sink = None
+
+
+def new_id() -> str:
+    return secrets.token_hex(8)
+
+
+def accept_trace_id(value: Optional[str]) -> str:
+    """Use a caller-supplied ID when it looks sane, otherwise start a new trace"""
+    value = (value or '').strip()
+    return value if _VALID_ID.match(value) else new_id()
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def current_span_id() -> Optional[str]:
+    return _span_id.get()
+
+
+def bind(trace_id: str, span_id: Optional[str] = None) -> None:
+    """Make `trace_id` (and `span_id` as parent of new spans) current in this context"""
+    _trace_id.set(trace_id)
+    _span_id.set(span_id)
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers that carry the current trace to an upstream service"""
+    trace_id = _trace_id.get()
+    return {TRACE_HEADER: trace_id} if trace_id else {}
+
+
+def bound(fn: Callable) -> Callable:
+    """`fn` bound to a copy of the current context (for thread pools)"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def configure(sink: Optional['TraceSink']) -> None:
+    global _sink
+    _sink = sink
+
+
+def record_span(name: str, duration: float, end: Optional[float] = None, trace_id: Optional[str] = None,
+                parent_id: Optional[str] = None, span_id: Optional[str] = None, status: str = 'ok',
+                **attrs) -> Optional[str]:
+    """Record an interval that was measured by the caller; returns the span ID.
+    The parent defaults to the current span; pass parent_id='' for a root span."""
+    trace_id = trace_id or _trace_id.get()
+    if _sink is None or not trace_id:
+        return None
+    span_id = span_id or new_id()
+    end = time.time() if end is None else end
+    _sink.emit({
+        'trace_id': trace_id,
+        'span_id': span_id,
+        'parent_id': (parent_id if parent_id is not None else _span_id.get()) or None,
+        'name': name,
+        'start': round(end - duration, 6),
+        'duration_ms': round(duration * 1000, 3),
+        'status': status,
+        'pid': os.getpid(),
+        'attrs': {k: v for k, v in attrs.items() if v is not None},
+    })
+    return span_id
+
+
+class span:
+    """Context manager timing a block as a child of the current span"""
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = new_id()
+        self.status = 'ok'
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._parent = _span_id.get()
+        self._token = _span_id.set(self.span_id)
+        self._started = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = monotonic() - self._started
+        _span_id.reset(self._token)
+        if exc_type is not None and self.status == 'ok':
+            self.status = 'error'
+            self.attrs.setdefault('error', f"{exc_type.__name__}: {exc}"[:200])
+        record_span(self.name, duration, parent_id=self._parent, span_id=self.span_id,
+                    status=self.status, **self.attrs)
+        return False
+
+
+def parse_server_timing(header: Optional[str]) -> List[tuple]:
+    """`Server-Timing: name;dur=12.3, other;dur=4` -> [(name, seconds), ...]"""
+    stages = []
+    for part in (header or '').split(','):
+        fields = [f.strip() for f in part.split(';')]
+        if not fields[0]:
+            continue
+        for f in fields[1:]:
+            if f.startswith('dur='):
+                try:
+                    stages.append((fields[0], float(f[4:]) / 1000.0))
+                except ValueError:
+                    pass
+    return stages
+
+
+class TraceSink:
+    """Background JSONL writer plus an in-memory index of recent traces"""
+
+    def __init__(self, path, max_bytes: int = 20 * 1024 * 1024, recent_traces: int = 500,
+                 queue_size: int = 10000):
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.recent_traces = max(1, int(recent_traces))
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()  # trace_id -> [span, ...]
+        self._stats = {'spans': 0, 'dropped': 0, 'write_errors': 0}
+        self._thread = None
+
+    def emit(self, record: dict) -> None:
+        with self._lock:
+            spans = self._recent.get(record['trace_id'])
+            if spans is None:
+                spans = self._recent[record['trace_id']] = []
+                while len(self._recent) > self.recent_traces:
+                    self._recent.popitem(last=False)
+            spans.append(record)
+            self._stats['spans'] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='trace-sink', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+
+    def trace(self, trace_id: str) -> List[dict]:
+        """All spans of one trace, oldest first (memory, else the JSONL files)"""
+        with self._lock:
+            spans = list(self._recent.get(trace_id, ()))
+        if not spans:
+            spans = self._scan(trace_id)
+        return sorted(spans, key=lambda s: s['start'])
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            items = list(self._recent.items())[-max(1, limit):]
+        summaries = []
+        for trace_id, spans in reversed(items):
+            root = next((s for s in spans if not s.get('parent_id')), spans[0])
+            summaries.append({
+                'trace_id': trace_id,
+                'name': root['name'],
+                'route': root['attrs'].get('route'),
+                'start': min(s['start'] for s in spans),
+                'duration_ms': root['duration_ms'],
+                'spans': len(spans),
+                'status': 'error' if any(s['status'] == 'error' for s in spans) else 'ok',
+            })
+        return summaries
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['traces_in_memory'] = len(self._recent)
+        stats['queued'] = self._queue.qsize()
+        stats['path'] = str(self.path)
+        return stats
+
+    # --- internals ---
+
+    def _scan(self, trace_id: str) -> List[dict]:
+        needle = f'"trace_id": "{trace_id}"'
+        spans = []
+        for path in (self.path.with_name(self.path.name + '.1'), self.path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if needle in line:
+                            try:
+                                spans.append(json.loads(line))
+                            except ValueError:
+                                continue
+            except OSError:
+                continue
+        return spans
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                with self._lock:
+                    self._stats['write_errors'] += 1
+                logger.debug(f"Writing {len(batch)} spans failed: {e}")
+
+    def _write(self, batch: List[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if self.path.stat().st_size > self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + '.1'))
+        except FileNotFoundError:
+            pass
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(r, ensure_ascii=False, default=str) + '\n' for r in batch))
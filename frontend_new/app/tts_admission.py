@@ -0,0 +1,165 @@
+"""
+Admission control for TTS backends.
+
+Every backend gets a bounded number of concurrent synthesis slots (sized
+from the capacity it advertises in /health). Callers that find no free slot
+wait in a bounded FIFO queue with a deadline; when the queue is full they are
+rejected immediately so the HTTP layer can answer 429 with Retry-After.
+A waiter whose session is interrupted leaves the queue at once.
+"""
+import logging
+import math
+from collections import deque
+from threading import Condition
+from time import monotonic
+from typing import Callable, Iterable, List, Optional
+
+from cancellation import CancelToken, Cancelled
+
+logger = logging.getLogger('atlas.tts_admission')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait deadline hit)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason  # 'queue_full' | 'queue_timeout'
+        self.retry_after = max(1, int(retry_after))
+
+
+class TTSAdmission:
+    """Per-backend concurrency slots plus a bounded FIFO admission queue"""
+
+    def __init__(self, default_capacity: int = 1, max_queue: int = 16, queue_timeout: float = 20.0,
+                 on_wait: Optional[Callable[[float], None]] = None):
+        self.on_wait = on_wait  # called with the seconds each admitted caller waited
+        self.default_capacity = max(1, int(default_capacity))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = float(queue_timeout)
+        self._cond = Condition()
+        self._capacity = {}   # base -> slots
+        self._in_flight = {}  # base -> busy slots
+        self._waiters = deque()
+        self._avg_hold = 2.0  # EWMA of slot hold time, seconds
+        self._stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected_full': 0,
+            'rejected_timeout': 0,
+            'cancelled': 0,
+            'wait_seconds_total': 0.0,
+        }
+
+    def set_capacity(self, base: str, capacity) -> None:
+        try:
+            capacity = max(1, int(capacity))
+        except (TypeError, ValueError):
+            return
+        with self._cond:
+            if self._capacity.get(base) != capacity:
+                logger.info(f"TTS backend {base} capacity set to {capacity}")
+                self._capacity[base] = capacity
+                self._cond.notify_all()
+
+    def capacity(self, base: str) -> int:
+        return self._capacity.get(base, self.default_capacity)
+
+    def in_flight(self, base: str) -> int:
+        return self._in_flight.get(base, 0)
+
+    def _free_backends(self, backends: Iterable[str]) -> List[str]:
+        return [b for b in backends if self._in_flight.get(b, 0) < self.capacity(b)]
+
+    def _retry_after(self) -> int:
+        total_slots = sum(self.capacity(b) for b in self._in_flight) or self.default_capacity
+        return math.ceil((len(self._waiters) + 1) / total_slots * self._avg_hold)
+
+    def acquire(self, backends: Callable[[], List[str]], choose: Callable[[List[str]], str],
+                timeout: Optional[float] = None, cancel: Optional[CancelToken] = None) -> str:
+        """Block until a backend slot is free and return the chosen backend.
+
+        `backends` returns the current candidate list; `choose` picks one of the
+        free candidates. Waiters are served strictly in arrival order.
+        Raises Cancelled when `cancel` fires before a slot is taken.
+        """
+        deadline = monotonic() + (self.queue_timeout if timeout is None else float(timeout))
+        started = monotonic()
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        with self._cond:
+            free = self._free_backends(backends())
+            if free and not self._waiters:
+                return self._take(choose(free), started)
+            if len(self._waiters) >= self.max_queue:
+                self._stats['rejected_full'] += 1
+                raise AdmissionRejected('queue_full', self._retry_after())
+            token = object()
+            self._waiters.append(token)
+            self._stats['queued'] += 1
+            remove_callback = cancel.on_cancel(self._wake) if cancel is not None else None
+            try:
+                while True:
+                    if cancel is not None and cancel.cancelled:
+                        self._stats['cancelled'] += 1
+                        raise Cancelled(cancel.reason or 'cancelled')
+                    if self._waiters[0] is token:
+                        free = self._free_backends(backends())
+                        if free:
+                            self._waiters.popleft()
+                            return self._take(choose(free), started)
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self._stats['rejected_timeout'] += 1
+                        raise AdmissionRejected('queue_timeout', self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                if remove_callback is not None:
+                    remove_callback()
+                if token in self._waiters:
+                    self._waiters.remove(token)
+                # Let the next waiter re-check now that the head may have changed
+                self._cond.notify_all()
+
+    def try_acquire(self, backends: Callable[[], List[str]], choose: Callable[[List[str]], str]) -> Optional[str]:
+        """Take a free slot without queueing (never jumps ahead of waiters); None if none is free"""
+        with self._cond:
+            if self._waiters:
+                return None
+            free = self._free_backends(backends())
+            if not free:
+                return None
+            return self._take(choose(free), monotonic())
+
+    def _take(self, base: str, started: float) -> str:
+        self._in_flight[base] = self._in_flight.get(base, 0) + 1
+        waited = monotonic() - started
+        self._stats['admitted'] += 1
+        self._stats['wait_seconds_total'] += waited
+        if self.on_wait is not None:
+            self.on_wait(waited)
+        return base
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def release(self, base: str, held_seconds: Optional[float] = None) -> None:
+        with self._cond:
+            self._in_flight[base] = max(0, self._in_flight.get(base, 0) - 1)
+            if held_seconds is not None:
+                self._avg_hold = 0.8 * self._avg_hold + 0.2 * max(0.0, held_seconds)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['waiting'] = len(self._waiters)
+            stats['max_queue'] = self.max_queue
+            stats['avg_hold_seconds'] = round(self._avg_hold, 3)
+            stats['backends'] = {
+                b: {'in_flight': self._in_flight.get(b, 0), 'capacity': self.capacity(b)}
+                for b in set(self._in_flight) | set(self._capacity)
+            }
+        stats['wait_seconds_total'] = round(stats['wait_seconds_total'], 3)
+        return stats
@@ -0,0 +1,88 @@
+"""
+Latency- and load-aware TTS backend selection.
+
+Each backend keeps an EWMA of synthesis latency normalized by text length
+(seconds per character) plus the load it last reported in /health
+(in_flight, queue_depth). Selection uses the power of two choices: sample
+two candidates and take the one with the lower expected cost, which keeps a
+slow or busy replica from receiving as much traffic as a fast idle one.
+"""
+import logging
+import random
+from threading import Lock
+from time import monotonic
+from typing import Callable, List, Optional
+
+logger = logging.getLogger('atlas.tts_balancer')
+
+
+class BackendBalancer:
+    """Chooses the backend with the lowest expected completion cost"""
+
+    def __init__(self, alpha: float = 0.3, min_chars: int = 20, load_ttl: float = 15.0):
+        self.alpha = float(alpha)
+        self.min_chars = max(1, int(min_chars))
+        self.load_ttl = float(load_ttl)
+        self._lock = Lock()
+        self._ewma = {}     # base -> seconds per char
+        self._samples = {}  # base -> observations count
+        self._load = {}     # base -> (in_flight, queue_depth, reported_at)
+        self._picks = {}    # base -> times chosen
+
+    def observe(self, base: str, elapsed: float, chars: int) -> None:
+        """Record a completed synthesis"""
+        per_char = max(0.0, float(elapsed)) / max(self.min_chars, int(chars or 0))
+        with self._lock:
+            prev = self._ewma.get(base)
+            self._ewma[base] = per_char if prev is None else (1 - self.alpha) * prev + self.alpha * per_char
+            self._samples[base] = self._samples.get(base, 0) + 1
+
+    def update_load(self, base: str, in_flight, queue_depth) -> None:
+        """Record load reported by the backend's /health"""
+        try:
+            in_flight = max(0, int(in_flight or 0))
+            queue_depth = max(0, int(queue_depth or 0))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._load[base] = (in_flight, queue_depth, monotonic())
+
+    def _cost(self, base: str, local_in_flight: int, default_ewma: float) -> float:
+        ewma = self._ewma.get(base, default_ewma)
+        busy = local_in_flight
+        load = self._load.get(base)
+        if load and monotonic() - load[2] <= self.load_ttl:
+            # Remote in_flight includes our own requests; queue depth is extra work ahead of us
+            busy = max(busy, load[0]) + load[1]
+        return ewma * (1 + busy)
+
+    def choose(self, candidates: List[str], in_flight: Callable[[str], int]) -> Optional[str]:
+        """Pick one of `candidates` (ordered by preference for ties)"""
+        if not candidates:
+            return None
+        with self._lock:
+            if len(candidates) == 1 or not self._ewma:
+                chosen = candidates[0]
+            else:
+                # Unmeasured backends get the average so they still receive traffic
+                default_ewma = sum(self._ewma.values()) / len(self._ewma)
+                pair = candidates if len(candidates) == 2 else random.sample(candidates, 2)
+                chosen = min(pair, key=lambda b: (self._cost(b, in_flight(b), default_ewma), candidates.index(b)))
+            self._picks[chosen] = self._picks.get(chosen, 0) + 1
+        return chosen
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = monotonic()
+            result = {}
+            for base in set(self._ewma) | set(self._load) | set(self._picks):
+                load = self._load.get(base)
+                result[base] = {
+                    'sec_per_char': round(self._ewma[base], 5) if base in self._ewma else None,
+                    'samples': self._samples.get(base, 0),
+                    'picks': self._picks.get(base, 0),
+                    'reported_in_flight': load[0] if load else None,
+                    'reported_queue_depth': load[1] if load else None,
+                    'load_age_seconds': round(now - load[2], 1) if load else None,
+                }
+            return result
@@ -0,0 +1,68 @@
+"""
+Hedging policy for TTS requests.
+
+Latencies are tracked per text-length bucket. Once a bucket has enough
+samples, a request that has not finished by that bucket's quantile (p90 by
+default) may be duplicated to a second backend; the first good answer wins.
+"""
+import bisect
+from collections import deque
+from threading import Lock
+from typing import Optional
+
+# Upper bounds (chars) of the text-length buckets; the last bucket is open-ended
+_BUCKET_BOUNDS = (40, 80, 160, 320, 640)
+
+
+class HedgePolicy:
+    """Decides when to hedge and keeps hedge/win counters"""
+
+    def __init__(self, enabled: bool = False, quantile: float = 0.9, min_samples: int = 10,
+                 min_delay: float = 0.25, history: int = 200):
+        self.enabled = bool(enabled)
+        self.quantile = min(0.999, max(0.5, float(quantile)))
+        self.min_samples = max(1, int(min_samples))
+        self.min_delay = max(0.0, float(min_delay))
+        self._lock = Lock()
+        self._samples = [deque(maxlen=history) for _ in range(len(_BUCKET_BOUNDS) + 1)]
+        self._stats = {'eligible': 0, 'hedged': 0, 'hedge_wins': 0, 'primary_wins': 0,
+                       'no_spare_backend': 0, 'both_failed': 0}
+
+    @staticmethod
+    def _bucket(chars: int) -> int:
+        return bisect.bisect_right(_BUCKET_BOUNDS, max(0, int(chars)))
+
+    def observe(self, chars: int, elapsed: float) -> None:
+        with self._lock:
+            self._samples[self._bucket(chars)].append(max(0.0, float(elapsed)))
+
+    def threshold(self, chars: int) -> Optional[float]:
+        """Seconds to wait for the primary before hedging, or None to not hedge"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            samples = sorted(self._samples[self._bucket(chars)])
+        if len(samples) < self.min_samples:
+            return None
+        idx = min(len(samples) - 1, int(self.quantile * len(samples)))
+        return max(self.min_delay, samples[idx])
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] = self._stats.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            buckets = {}
+            lower = 0
+            for i, samples in enumerate(self._samples):
+                upper = _BUCKET_BOUNDS[i] if i < len(_BUCKET_BOUNDS) else None
+                label = f"{lower}-{upper}" if upper else f"{lower}+"
+                buckets[label] = len(samples)
+                lower = upper or lower
+        stats['enabled'] = self.enabled
+        stats['quantile'] = self.quantile
+        stats['samples_per_bucket'] = buckets
+        stats['hedge_rate'] = round(stats['hedged'] / stats['eligible'], 4) if stats['eligible'] else 0.0
+        return stats
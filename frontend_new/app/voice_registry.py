@@ -0,0 +1,168 @@
+"""
+Registry of voices offered by the TTS backends.
+
+A background thread polls /voices on every backend and merges the per-backend
+sets into one immutable snapshot (voice list, name set, voice -> backends and
+an ETag). Request handlers only read the current snapshot: sanitizing a voice
+is a set lookup and never does network I/O on the synthesis path.
+"""
+import hashlib
+import json
+import logging
+import threading
+from time import monotonic
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger('atlas.voice_registry')
+
+
+def normalize_voices(payload) -> List[dict]:
+    """Normalize a /voices payload to a list of {'name', 'locale'} dicts"""
+    if isinstance(payload, dict):
+        raw_voices = payload.get('voices', [])
+    elif isinstance(payload, list):
+        raw_voices = payload
+    else:
+        raw_voices = []
+    voices = []
+    for v in raw_voices:
+        if isinstance(v, dict):
+            name = v.get('name') or v.get('id') or v.get('voice')
+            if not name and len(v) == 1:
+                # single-key dict
+                name = list(v.values())[0]
+            if name:
+                voices.append({'name': str(name), 'locale': v.get('locale') or v.get('lang') or ''})
+        elif isinstance(v, str):
+            voices.append({'name': v, 'locale': ''})
+    return voices
+
+
+class VoiceSnapshot:
+    """Immutable merged view; replaced as a whole on every change"""
+
+    def __init__(self, per_backend: Dict[str, List[dict]]):
+        merged = {}
+        backends = {}
+        for base, voices in per_backend.items():
+            for v in voices:
+                merged.setdefault(v['name'], {'name': v['name'], 'locale': v.get('locale', '')})
+                if not merged[v['name']]['locale'] and v.get('locale'):
+                    merged[v['name']]['locale'] = v['locale']
+                backends.setdefault(v['name'], []).append(base)
+        self.per_backend = per_backend
+        self.voices = [merged[name] for name in sorted(merged)]
+        self.names: FrozenSet[str] = frozenset(merged)
+        self.backends = {name: tuple(bases) for name, bases in backends.items()}
+        self.uk_names = [v['name'] for v in self.voices if str(v['locale']).startswith('uk')]
+        self.etag = hashlib.sha1(json.dumps(self.voices, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class VoiceRegistry:
+    """Background-refreshed union of the voices of all TTS backends"""
+
+    def __init__(self, fetch: Callable[[str], object], backends: Callable[[], List[str]],
+                 refresh_interval: float = 60.0, retry_interval: float = 10.0, shared=None):
+        self._fetch = fetch          # base -> raw /voices payload (raises on failure)
+        self._backends = backends
+        self.refresh_interval = max(1.0, float(refresh_interval))
+        self.retry_interval = max(1.0, float(retry_interval))
+        self.shared = shared
+        self._snapshot = VoiceSnapshot({})
+        self._refreshed_at = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- reads (lock-free: the snapshot is replaced atomically) ---
+
+    @property
+    def snapshot(self) -> VoiceSnapshot:
+        return self._snapshot
+
+    def voices(self) -> List[dict]:
+        return self._snapshot.voices
+
+    def has(self, name: str) -> bool:
+        return name in self._snapshot.names
+
+    def backends_for(self, name: str) -> tuple:
+        """Backends known to offer `name` (empty if unknown)"""
+        return self._snapshot.backends.get(name, ())
+
+    def sanitize(self, requested: Optional[str], default: str) -> str:
+        """Pick a voice that exists: requested, else default, else a uk voice, else any"""
+        snap = self._snapshot
+        voice = (requested or default).strip()
+        if not snap.names or voice in snap.names:
+            return voice
+        if default in snap.names:
+            return default
+        if snap.uk_names:
+            return snap.uk_names[0]
+        return snap.voices[0]['name'] if snap.voices else voice
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            'voices': len(snap.voices),
+            'etag': snap.etag,
+            'backends': {base: len(v) for base, v in snap.per_backend.items()},
+            'age_seconds': round(monotonic() - self._refreshed_at, 1) if self._refreshed_at else None,
+        }
+
+    # --- refresh ---
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='voice-registry', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def refresh(self) -> bool:
+        """Poll all backends now; returns True if at least one answered"""
+        with self._refresh_lock:
+            if self.shared is not None and not self.shared.acquire_lease('voices', self.refresh_interval * 2):
+                return self._adopt()
+            previous = self._snapshot.per_backend
+            per_backend = {}
+            answered = False
+            for base in self._backends():
+                try:
+                    per_backend[base] = normalize_voices(self._fetch(base))
+                    answered = True
+                except Exception as e:
+                    logger.debug(f"Fetching voices from {base} failed: {e}")
+                    # Keep what the backend offered last time until it answers again
+                    if base in previous:
+                        per_backend[base] = previous[base]
+            if answered:
+                self._install(per_backend)
+                if self.shared is not None:
+                    self.shared.set('tts:voices_by_backend', per_backend)
+            return answered
+
+    def _adopt(self) -> bool:
+        published = self.shared.get('tts:voices_by_backend', max_age=self.refresh_interval * 3)
+        if not isinstance(published, dict) or not published:
+            return False
+        self._install(published)
+        return True
+
+    def _install(self, per_backend: Dict[str, List[dict]]) -> None:
+        snap = VoiceSnapshot(per_backend)
+        if snap.etag != self._snapshot.etag:
+            logger.info(f"Voice registry updated: {len(snap.voices)} voices from {len(per_backend)} backends")
+        self._snapshot = snap
+        self._refreshed_at = monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ok = self.refresh()
+            except Exception as e:
+                logger.warning(f"Voice registry refresh failed: {e}")
+                ok = False
+            self._stop.wait(self.refresh_interval if ok else self.retry_interval)
@@ -27,7 +27,8 @@ const PORT = process.env.ORCH_PORT || 5101;
 app.use(cors({
     origin: '*',
     methods: ['GET', 'POST', 'OPTIONS'],
-    allowedHeaders: ['Content-Type', 'Authorization', 'X-Secret-Key']
+    allowedHeaders: ['Content-Type', 'Authorization', 'X-Secret-Key', 'X-Request-ID'],
+    exposedHeaders: ['X-Request-ID']
 }));
 app.use(express.json({ limit: '10mb' }));
 
@@ -178,9 +179,16 @@ app.post('/chat/stream', async (req, res) => {
     res.setHeader('Cache-Control', 'no-cache');
     res.setHeader('Connection', 'keep-alive');
     
+    // Ідентифікатор траси від фронтенду - передаємо далі до Goose
+    const traceId = req.get('X-Request-ID') || null;
+    if (traceId) {
+        res.setHeader('X-Request-ID', traceId);
+    }
+    
     // Створюємо нову сесію
     const session = { 
         id: sessionId,
+        traceId,
         history: [],
         currentStage: 1,
         retryCycle: 0,
@@ -540,7 +548,8 @@ async function executeAgentStageStepByStep(agentName, stageName, systemPrompt, u
         // Спроба через Goose з правильним промптом
         const fullPrompt = `${systemPrompt}\n\nUser Request: ${userPrompt}`;
         const gooseText = await callGooseAgentFixed(fullPrompt, session.id, {
-            enableTools: options.enableTools === true
+            enableTools: options.enableTools === true,
+            traceId: session.traceId
         });
         
         if (gooseText && gooseText.trim().length > 0) {
@@ -612,7 +621,8 @@ async function executeAgentStage(agentName, stageName, systemPrompt, userPrompt,
         // Спроба через Goose з правильним промптом
         const fullPrompt = `${systemPrompt}\n\nUser Request: ${userPrompt}`;
         const gooseText = await callGooseAgentFixed(fullPrompt, session.id, {
-            enableTools: options.enableTools === true
+            enableTools: options.enableTools === true,
+            traceId: session.traceId
         });
         
         if (gooseText && gooseText.trim().length > 0) {
@@ -731,19 +741,23 @@ async function callGooseAgentFixed(message, sessionId, opts = {}) {
     }
     const gooseBaseUrl = process.env.GOOSE_BASE_URL || `http://localhost:${goosePort}`;
     
-    logMessage('info', `Calling Goose for session ${sessionId} - NO SIMULATION FALLBACK`);
+    const traceTag = opts.traceId ? `[trace ${opts.traceId}] ` : '';
+    logMessage('info', `${traceTag}Calling Goose for session ${sessionId} - NO SIMULATION FALLBACK`);
     
     try {
+        const started = Date.now();
         // Спробуємо HTTP API спочатку, потім WebSocket
-        let result = await callGooseHTTP(gooseBaseUrl, message, sessionId);
+        let transport = 'http';
+        let result = await callGooseHTTP(gooseBaseUrl, message, sessionId, opts.traceId);
         
         if (!result || result.trim().length === 0) {
             // Якщо HTTP не працює, спробуємо WebSocket
-            result = await callGooseWebSocket(gooseBaseUrl, message, sessionId);
+            transport = 'ws';
+            result = await callGooseWebSocket(gooseBaseUrl, message, sessionId, opts.traceId);
         }
         
         if (result && result.trim().length > 0) {
-            logMessage('info', `Goose execution successful: ${result.length} chars`);
+            logMessage('info', `${traceTag}Goose execution successful via ${transport} in ${Date.now() - started}ms: ${result.length} chars`);
             return result;
         }
         
@@ -758,7 +772,7 @@ async function callGooseAgentFixed(message, sessionId, opts = {}) {
 }
 
 // HTTP API виклик до Goose
-async function callGooseHTTP(baseUrl, message, sessionId) {
+async function callGooseHTTP(baseUrl, message, sessionId, traceId = null) {
     try {
         logMessage('info', `Attempting HTTP API call to: ${baseUrl}/api/chat`);
         
@@ -780,6 +794,9 @@ async function callGooseHTTP(baseUrl, message, sessionId) {
         const headers = {
             'Content-Type': 'application/json'
         };
+        if (traceId) {
+            headers['X-Request-ID'] = traceId;
+        }
         
         if (authToken) {
             headers['Authorization'] = `Bearer ${authToken}`;
@@ -813,7 +830,7 @@ async function callGooseHTTP(baseUrl, message, sessionId) {
 }
 
 // WebSocket інтеграція з Goose з детальним логуванням
-async function callGooseWebSocket(baseUrl, message, sessionId) {
+async function callGooseWebSocket(baseUrl, message, sessionId, traceId = null) {
     return new Promise((resolve) => {
         const wsUrl = baseUrl.replace(/^http/, 'ws') + '/ws';
         let collected = '';
@@ -824,6 +841,9 @@ async function callGooseWebSocket(baseUrl, message, sessionId) {
         try {
             // Додаємо авторизацію для WebSocket підключення
             const headers = {};
+            if (traceId) {
+                headers['X-Request-ID'] = traceId;
+            }
             
             // Спробуємо отримати GitHub токен з конфігурації Goose
             try {
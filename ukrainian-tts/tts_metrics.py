@@ -0,0 +1,103 @@
+"""
+Метрики TTS сервера у текстовому форматі Prometheus (/metrics).
+
+Без залежності від prometheus_client: лічильники та гістограми з мітками,
+значення живуть у пам'яті процесу.
+"""
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# RTF = час синтезу / тривалість аудіо; < 1 означає швидше за реальний час
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    return '{' + ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs) + '}'
+
+
+def _num(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def lines(self):
+        with self._lock:
+            items = list(self._values.items())
+        return ['%s%s %s' % (self.name, _labels(self.labelnames, key), _num(v)) for key, v in items]
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def lines(self):
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self._values.items()]
+        out = []
+        for key, counts, count, total in items:
+            for bound, n in zip(self.buckets, counts):
+                out.append('%s_bucket%s %d' % (self.name, _labels(self.labelnames, key, {'le': _num(bound)}), n))
+            out.append('%s_bucket%s %d' % (self.name, _labels(self.labelnames, key, {'le': '+Inf'}), count))
+            out.append('%s_count%s %d' % (self.name, _labels(self.labelnames, key), count))
+            out.append('%s_sum%s %s' % (self.name, _labels(self.labelnames, key), _num(total)))
+        return out
+
+
+class TTSMetrics:
+    """Набір метрик сервера; gauges (черга, слоти) додаються під час запиту /metrics"""
+
+    def __init__(self):
+        self.http_latency = Histogram('tts_http_request_duration_seconds', 'HTTP request duration',
+                                      ['route', 'method', 'status'])
+        self.synthesis = Histogram('tts_synthesis_duration_seconds', 'Model synthesis time per voice', ['voice'])
+        self.rtf = Histogram('tts_synthesis_rtf', 'Real-time factor (synthesis time / audio duration) per voice',
+                             ['voice'], buckets=RTF_BUCKETS)
+        self.slot_wait = Histogram('tts_slot_wait_seconds', 'Time waiting for a synthesis slot')
+        self.audio_seconds = Counter('tts_audio_seconds_total', 'Seconds of audio synthesized', ['voice'])
+        self.audio_bytes = Counter('tts_audio_bytes_served_total', 'Encoded audio bytes returned to clients')
+        self.errors = Counter('tts_synthesis_errors_total', 'Failed synthesis requests')
+        self.cancelled = Counter('tts_synthesis_cancelled_total', 'Requests dropped by /cancel, by stage', ['stage'])
+        self._metrics = [self.http_latency, self.synthesis, self.rtf, self.slot_wait,
+                         self.audio_seconds, self.audio_bytes, self.errors, self.cancelled]
+
+    def render(self, gauges=None):
+        lines = []
+        for metric in self._metrics:
+            lines.append('# HELP %s %s' % (metric.name, metric.help))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            lines.extend(metric.lines())
+        for name, help_text, value in gauges or ():
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s gauge' % name)
+            lines.append('%s %s' % (name, _num(value)))
+        return '\n'.join(lines) + '\n'
@@ -11,9 +11,11 @@ import logging
 import argparse
 import io
 import json
-import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, g, request, jsonify, send_file
+from tts_metrics import TTSMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 # ukrainian_tts import is done lazily in _init_tts() so we can log environment
 # early and avoid module import-time crashes that prevent useful logs.
 
@@ -36,12 +38,89 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ukrainian-tts-server')
 
+# Формати відповіді /tts: назва -> (формат soundfile, subtype, mimetype, розширення)
+AUDIO_FORMATS = {
+    'wav': ('WAV', 'PCM_16', 'audio/wav', 'wav'),
+    'flac': ('FLAC', 'PCM_16', 'audio/flac', 'flac'),
+    'ogg': ('OGG', 'VORBIS', 'audio/ogg', 'ogg'),
+    'opus': ('OGG', 'OPUS', 'audio/ogg; codecs=opus', 'opus'),
+}
+# Opus кодує лише ці частоти дискретизації
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class SynthesisCancelled(Exception):
+    """Запит скасовано через POST /cancel (користувач перебив агента)"""
+
+    def __init__(self, stage):
+        super().__init__(stage)
+        self.stage = stage
+
+
+def _format_from_accept(accept):
+    """Найкращий формат із заголовка Accept (None, якщо клієнт просить лише WAV/*/*)"""
+    best, best_q = None, 0.0
+    for item in (accept or '').split(','):
+        parts = [p.strip().lower() for p in item.split(';')]
+        params = dict(p.partition('=')[::2] for p in parts[1:])
+        try:
+            q = float(params.get('q', 1.0))
+        except ValueError:
+            q = 0.0
+        fmt = {'audio/wav': 'wav', 'audio/x-wav': 'wav', 'audio/flac': 'flac',
+               'audio/ogg': 'ogg', 'audio/opus': 'opus'}.get(parts[0])
+        if fmt == 'ogg' and params.get('codecs', '').strip('"') == 'opus':
+            fmt = 'opus'
+        if fmt and q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def _encode_audio(audio, sr, fmt, sample_rate=None):
+    """Кодуємо моно float-аудіо у потрібний формат.
+    Повертає (BytesIO, формат); якщо libsndfile не вміє формат — WAV."""
+    if fmt not in AUDIO_FORMATS:
+        fmt = 'wav'
+    target_sr = int(sample_rate) if sample_rate else sr
+    if fmt == 'opus' and target_sr not in OPUS_RATES:
+        target_sr = 48000
+    if target_sr != sr:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=target_sr)
+        sr = target_sr
+    sf_format, subtype = AUDIO_FORMATS[fmt][:2]
+    if fmt != 'wav' and not sf.check_format(sf_format, subtype):
+        logger.warning(f"libsndfile has no {sf_format}/{subtype} support, falling back to WAV")
+        fmt = 'wav'
+        sf_format, subtype = AUDIO_FORMATS[fmt][:2]
+    out = io.BytesIO()
+    sf.write(out, audio, sr, format=sf_format, subtype=subtype)
+    return out, fmt
+
 class UkrainianTTSServer:
-    def __init__(self, host='127.0.0.1', port=3001, device='cpu'):
+    def __init__(self, host='127.0.0.1', port=3001, device='cpu', max_concurrency=1, model_thread_safe=False):
         self.host = host
         self.port = port
         self.device = device
         
+        # Скільки синтезів модель виконує одночасно (рекламується у /health як capacity).
+        # Усі запити ділять один екземпляр моделі, тож більше одного - лише для моделі,
+        # про яку відомо, що її tts() можна викликати з кількох потоків
+        self.max_concurrency = max(1, int(max_concurrency))
+        if self.max_concurrency > 1 and not model_thread_safe:
+            raise ValueError(f"max_concurrency={self.max_concurrency} needs a thread-safe model: "
+                             "the shared model's tts() would run concurrently (set TTS_MODEL_THREAD_SAFE=1 "
+                             "or --model-thread-safe only if it is)")
+        self._synth_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._load_lock = threading.Lock()
+        self._in_flight = 0
+        self._queue_depth = 0
+        # session_id -> події скасування запитів цієї сесії (для POST /cancel)
+        self._session_jobs = {}
+        # request_id -> подія скасування одного запиту (POST /cancel з request_id)
+        self._request_jobs = {}
+        # Метрики для /metrics (затримки, RTF по голосах, очікування слоту)
+        self.metrics = TTSMetrics()
+        
         # Створюємо Flask app
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'ukrainian-tts-server-key'
@@ -100,9 +179,112 @@ class UkrainianTTSServer:
             logger.exception(f"Failed to initialize Ukrainian TTS: {e}")
             self.tts = None
     
+    def _register_job(self, session_id, request_id=None):
+        """Подія, яку встановить /cancel для цієї сесії чи цього запиту (None без обох id)"""
+        if not session_id and not request_id:
+            return None
+        cancelled = threading.Event()
+        with self._load_lock:
+            if session_id:
+                self._session_jobs.setdefault(session_id, set()).add(cancelled)
+            if request_id:
+                self._request_jobs[request_id] = cancelled
+        return cancelled
+
+    def _unregister_job(self, session_id, request_id, cancelled):
+        if cancelled is None:
+            return
+        with self._load_lock:
+            jobs = self._session_jobs.get(session_id)
+            if jobs is not None:
+                jobs.discard(cancelled)
+                if not jobs:
+                    del self._session_jobs[session_id]
+            if self._request_jobs.get(request_id) is cancelled:
+                del self._request_jobs[request_id]
+
+    def cancel_session(self, session_id):
+        """Скасовує всі запити сесії; повертає їх кількість"""
+        with self._load_lock:
+            jobs = self._session_jobs.pop(session_id, set())
+        for cancelled in jobs:
+            cancelled.set()
+        return len(jobs)
+
+    def cancel_request(self, request_id):
+        """Скасовує один запит за його request_id (програвший хедж-запит фронтенду)"""
+        with self._load_lock:
+            cancelled = self._request_jobs.pop(request_id, None)
+        if cancelled is None:
+            return 0
+        cancelled.set()
+        return 1
+
+    @contextmanager
+    def _synthesis_slot(self, cancelled=None):
+        """Обмежує кількість одночасних синтезів і веде лічильники черги.
+        Якщо cancelled встановлено під час очікування - запит покидає чергу."""
+        with self._load_lock:
+            self._queue_depth += 1
+        wait_started = time.monotonic()
+        if cancelled is None:
+            self._synth_slots.acquire()
+        else:
+            while not self._synth_slots.acquire(timeout=0.1):
+                if cancelled.is_set():
+                    with self._load_lock:
+                        self._queue_depth -= 1
+                    raise SynthesisCancelled('queue')
+        waited = time.monotonic() - wait_started
+        self.metrics.slot_wait.observe(waited)
+        with self._load_lock:
+            self._queue_depth -= 1
+            self._in_flight += 1
+        try:
+            yield waited
+        finally:
+            with self._load_lock:
+                self._in_flight -= 1
+            self._synth_slots.release()
+
     def _register_routes(self):
         """Реєструємо API маршрути"""
         
+        @self.app.before_request
+        def start_timer():
+            g.request_started = time.monotonic()
+            g.stages = []  # (етап, секунди) для Server-Timing
+
+        @self.app.after_request
+        def record_request(response):
+            started = g.get('request_started')
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                self.metrics.http_latency.observe(time.monotonic() - started, route=route,
+                                                  method=request.method, status=response.status_code)
+            # Трасування: повертаємо X-Request-ID і час етапів, фронтенд додає їх у свою трасу
+            request_id = request.headers.get('X-Request-ID')
+            if request_id:
+                response.headers['X-Request-ID'] = request_id
+            stages = g.get('stages')
+            if stages:
+                response.headers['Server-Timing'] = ', '.join(
+                    f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages)
+                logger.info(f"[{request_id or '-'}] stages: " +
+                            ' '.join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in stages))
+            return response
+
+        @self.app.route('/metrics', methods=['GET'])
+        def metrics():
+            """Метрики у форматі Prometheus"""
+            body = self.metrics.render([
+                ('tts_in_flight', 'Syntheses running now', self._in_flight),
+                ('tts_queue_depth', 'Requests waiting for a synthesis slot', self._queue_depth),
+                ('tts_capacity', 'Concurrent synthesis slots', self.max_concurrency),
+                ('tts_ready', 'Model loaded (1) or not (0)', 1 if self.tts else 0),
+            ])
+            return Response(body, content_type=METRICS_CONTENT_TYPE)
+
         @self.app.route('/health', methods=['GET'])
         def health():
             """Health check endpoint"""
@@ -110,6 +292,9 @@ class UkrainianTTSServer:
                 'status': 'ok' if self.tts else 'error',
                 'tts_ready': self.tts is not None,
                 'device': self.device,
+                'capacity': self.max_concurrency,
+                'in_flight': self._in_flight,
+                'queue_depth': self._queue_depth,
                 'timestamp': time.time()
             })
         
@@ -129,9 +314,28 @@ class UkrainianTTSServer:
                 logger.error(f"Error getting voices: {e}")
                 return jsonify({'error': str(e)}), 500
         
+        @self.app.route('/cancel', methods=['POST'])
+        def cancel_session():
+            """Скасовує запити сесії (session_id) або один запит (request_id):
+            з черги вони виходять одразу, після синтезу не кодуються"""
+            data = request.get_json(silent=True) or {}
+            session_id = str(data.get('session_id') or '').strip()
+            request_id = str(data.get('request_id') or '').strip()
+            if not session_id and not request_id:
+                return jsonify({'error': 'session_id or request_id is required'}), 400
+            cancelled = 0
+            if session_id:
+                cancelled += self.cancel_session(session_id)
+            if request_id:
+                cancelled += self.cancel_request(request_id)
+            if cancelled:
+                logger.info(f"Cancelled {cancelled} request(s) of session {session_id or '-'}, request {request_id or '-'}")
+            return jsonify({'success': True, 'cancelled': cancelled})
+
         @self.app.route('/tts', methods=['POST'])
         def synthesize_text():
             """Основний ендпойнт для синтезу мови"""
+            session_id, request_id, cancelled = None, None, None
             try:
                 if not self.tts:
                     return jsonify({'error': 'TTS not initialized'}), 503
@@ -148,8 +352,22 @@ class UkrainianTTSServer:
                 fx = data.get('fx', 'none')  # Звукові ефекти
                 speed = float(data.get('speed', 1.0))
                 return_audio = data.get('return_audio', False)  # Повертати аудіо файл
+                # Формат: поле format важливіше за Accept; sample_rate — опційне пониження частоти
+                audio_format = str(data.get('format') or _format_from_accept(request.headers.get('Accept')) or 'wav').lower()
+                if audio_format not in AUDIO_FORMATS:
+                    return jsonify({'error': f'Unsupported format: {audio_format}'}), 400
+                sample_rate = data.get('sample_rate')
+                try:
+                    sample_rate = int(sample_rate) if sample_rate else None
+                except (TypeError, ValueError):
+                    return jsonify({'error': f'Invalid sample_rate: {sample_rate}'}), 400
+                if sample_rate is not None and not 8000 <= sample_rate <= 48000:
+                    return jsonify({'error': f'Unsupported sample_rate: {sample_rate}'}), 400
                 
                 logger.info(f"TTS request: text='{text[:50]}...', voice={voice}, fx={fx}")
+                session_id = str(data.get('session_id') or '') or None
+                request_id = str(data.get('request_id') or '') or None
+                cancelled = self._register_job(session_id, request_id)
                 
                 # Синтезуємо в пам'яті
                 buf = io.BytesIO()
@@ -158,16 +376,31 @@ class UkrainianTTSServer:
                 if getattr(self, '_Stress', None) is not None:
                     stress_val = self._Stress.Dictionary.value
 
-                _, accented = self.tts.tts(text, voice, stress_val, buf)
+                with self._synthesis_slot(cancelled) as waited:
+                    model_started = time.monotonic()
+                    _, accented = self.tts.tts(text, voice, stress_val, buf)
+                    model_time = time.monotonic() - model_started
                 synthesis_time = time.time() - start_time
+                g.stages += [('queue', waited), ('synth', model_time)]
+                # Модель не перервати посередині, але ефекти й кодування вже не потрібні
+                if cancelled is not None and cancelled.is_set():
+                    raise SynthesisCancelled('synth')
                 
                 # Читаємо аудіо
+                stage_started = time.monotonic()
                 buf.seek(0)
                 audio, sr = sf.read(buf, dtype="float32")
                 
                 if audio.ndim > 1:
                     audio = audio.mean(axis=1)
                 
+                # RTF рахуємо від тривалості сирого виходу моделі (до зміни швидкості)
+                audio_seconds = len(audio) / sr if sr else 0.0
+                self.metrics.synthesis.observe(model_time, voice=voice)
+                self.metrics.audio_seconds.inc(audio_seconds, voice=voice)
+                if audio_seconds > 0:
+                    self.metrics.rtf.observe(model_time / audio_seconds, voice=voice)
+                
                 # Застосовуємо швидкість
                 if speed and abs(speed - 1.0) > 1e-3:
                     try:
@@ -185,17 +418,22 @@ class UkrainianTTSServer:
                 # Нормалізуємо
                 peak = float(np.max(np.abs(audio)) or 1.0)
                 audio = (audio / peak) * 0.95
+                g.stages.append(('effects', time.monotonic() - stage_started))
                 
                 if return_audio:
-                    # Повертаємо аудіо файл
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-                    sf.write(temp_file.name, audio, sr, subtype="PCM_16")
+                    # Повертаємо аудіо з пам'яті (без тимчасових файлів у /tmp)
+                    stage_started = time.monotonic()
+                    out, audio_format = _encode_audio(audio, sr, audio_format, sample_rate)
+                    self.metrics.audio_bytes.inc(out.tell())
+                    out.seek(0)
+                    g.stages.append(('encode', time.monotonic() - stage_started))
+                    mimetype, ext = AUDIO_FORMATS[audio_format][2:]
                     
                     return send_file(
-                        temp_file.name,
-                        mimetype='audio/wav',
+                        out,
+                        mimetype=mimetype,
                         as_attachment=True,
-                        download_name=f'tts_{int(time.time())}.wav'
+                        download_name=f'tts_{int(time.time())}.{ext}'
                     )
                 else:
                     # Повертаємо JSON відповідь
@@ -210,10 +448,17 @@ class UkrainianTTSServer:
                         'timestamp': time.time()
                     })
                 
+            except SynthesisCancelled as e:
+                logger.info(f"TTS request of session {session_id} cancelled at {e.stage}")
+                self.metrics.cancelled.inc(stage=e.stage)
+                return jsonify({'error': 'Cancelled', 'cancelled': True, 'stage': e.stage}), 499
             except Exception as e:
                 # Log full traceback to help diagnose issues (was logging only str(e))
                 logger.exception("TTS synthesis error")
+                self.metrics.errors.inc()
                 return jsonify({'error': str(e)}), 500
+            finally:
+                self._unregister_job(session_id, request_id, cancelled)
         
         @self.app.route('/speak', methods=['POST'])
         def speak_text():
@@ -258,15 +503,26 @@ def main():
     parser.add_argument("--port", type=int, default=3001, help="Port to bind to")
     parser.add_argument("--device", default="cpu", choices=["cpu", "mps", "gpu"], help="Device to use")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--max-concurrency", type=int, default=int(os.environ.get('TTS_MAX_CONCURRENCY', 1)),
+                        help="Concurrent syntheses advertised as capacity in /health (above 1 needs "
+                             "--model-thread-safe)")
+    parser.add_argument("--model-thread-safe", action="store_true",
+                        default=os.environ.get('TTS_MODEL_THREAD_SAFE', '').lower() in ('1', 'true', 'yes'),
+                        help="The model's tts() may run in several threads at once")
     
     args = parser.parse_args()
     
     # Створюємо і запускаємо сервер
-    server = UkrainianTTSServer(
-        host=args.host,
-        port=args.port,
-        device=args.device
-    )
+    try:
+        server = UkrainianTTSServer(
+            host=args.host,
+            port=args.port,
+            device=args.device,
+            max_concurrency=args.max_concurrency,
+            model_thread_safe=args.model_thread_safe
+        )
+    except ValueError as e:
+        parser.error(str(e))
     server.run(debug=args.debug)
 
 if __name__ == '__main__':